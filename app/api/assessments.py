@@ -1,35 +1,60 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.auth.auth_router import get_db
-from app.auth.dependencies import get_current_user
+from datetime import date, datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.database import get_async_db, SessionLocal
+from app.auth.dependencies import get_current_user, require_role
 from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import (
+    list_assessments,
+    get_assessment,
+    parse_fields,
+    cohort_conditions,
+    cohort_assessments,
+)
+from app.assessments.promoted_fields import PROMOTED
+from app.assessments.export_service import check_format, iter_export, export_watermark
+from app.assessments.summary_service import get_user_stats, get_population_stats
 from app.users.user_models import User
+from app.storage.blob_store import blob_store, parse_ref, media_type, BlobNotFound
 import uuid
 
 router = APIRouter(prefix="/api/assessments", tags=["Assessments"])
 
 @router.get("/my-history")
-def get_my_assessments(
-    db: Session = Depends(get_db),
+async def get_my_assessments(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated columns; tabular_data and prediction only if listed",
+    ),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Convert user_id to UUID if it's a string
-    user_id = current_user.id
-    if isinstance(user_id, str):
-        user_id = uuid.UUID(user_id)
-    
-    assessments = (
-        db.query(PCOSAssessment)
-        .filter(PCOSAssessment.user_id == user_id)
-        .order_by(PCOSAssessment.created_at.desc())
-        .all()
-    )
+    """
+    Page of the current user's assessments, newest first.
+    Pass `next_cursor` from the previous page as `cursor`.
+    """
+    try:
+        items, next_cursor = await list_assessments(
+            db,
+            current_user.id,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return assessments
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/history")
-def get_assessment_history(
-    db: Session = Depends(get_db),
+async def get_assessment_history(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -41,13 +66,17 @@ def get_assessment_history(
     if isinstance(user_id, str):
         user_id = uuid.UUID(user_id)
     
-    assessments = (
-        db.query(PCOSAssessment)
-        .filter(PCOSAssessment.user_id == user_id)
+    result = await db.execute(
+        select(
+            PCOSAssessment.id,
+            PCOSAssessment.created_at,
+            PCOSAssessment.final_pcos_probability,
+        )
+        .where(PCOSAssessment.user_id == user_id)
         .order_by(PCOSAssessment.created_at.desc())
         .limit(10)  # Last 10 assessments
-        .all()
     )
+    assessments = result.all()
 
     history = []
     for assessment in assessments:
@@ -66,4 +95,160 @@ def get_assessment_history(
             "probability": assessment.final_pcos_probability
         })
     
-    return history
\ No newline at end of file
+    return history
+
+
+@router.get("/stats/me")
+async def get_my_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Assessment counts and average probability per risk level for the
+    current user, read from the summary table.
+    """
+    return await get_user_stats(db, current_user.id)
+
+
+@router.get("/stats/population")
+async def get_clinic_stats(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    granularity: Literal["day", "month"] = Query("month"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_role("clinician", "admin")),
+):
+    """
+    Clinic-wide risk distribution and average probability per day or
+    month. Clinicians and admins only.
+    """
+    return await get_population_stats(db, start=start, end=end, granularity=granularity)
+
+
+@router.get("/cohort")
+async def get_cohort(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_role("clinician", "admin")),
+):
+    """
+    Assessments across all patients filtered on the promoted clinical
+    columns, newest first. Clinicians and admins only.
+
+    Filters: `<field>_min` / `<field>_max` for numeric fields,
+    `<field>=true|false` for boolean ones, `risk_level` (repeatable).
+    Available fields are listed under `fields` in the response.
+    """
+    try:
+        conditions = cohort_conditions(request.query_params)
+        items, next_cursor = await cohort_assessments(db, conditions, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "fields": {
+            name: {"type": "range" if field.is_range else "boolean", "description": field.description}
+            for name, field in PROMOTED.items()
+        },
+    }
+
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _stream_export(fmt: str, since: Optional[datetime], until: datetime):
+    # Own sync session: the response outlives the request's session and
+    # Starlette iterates sync generators in the threadpool
+    with SessionLocal() as db:
+        yield from iter_export(db, fmt, since=since, until=until)
+
+
+@router.get("/export")
+def export_assessments(
+    format: Literal["csv", "parquet"] = Query("csv"),
+    since: Optional[datetime] = Query(None, description="Only rows stored after this (exclusive)"),
+    current_user: User = Depends(require_role("admin")),
+):
+    """
+    Streams all assessments stored after `since`, flattened to the
+    canonical feature columns. Admins only.
+
+    The `X-Export-Until` header is the upper bound of this export (a
+    little behind now, see export_service); pass it as `since` next time
+    to fetch only newer rows.
+    """
+    try:
+        check_format(format)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    until = export_watermark()
+    filename = f"assessments-{until.strftime('%Y%m%dT%H%M%SZ')}.{format}"
+
+    return StreamingResponse(
+        _stream_export(format, since, until),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Until": until.isoformat(),
+        },
+    )
+
+
+@router.get("/{assessment_id}")
+async def get_assessment_detail(
+    assessment_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Full record of one assessment, including tabular_data and prediction.
+    """
+    assessment = await get_assessment(db, current_user.id, assessment_id)
+    if assessment is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return assessment
+
+
+@router.get("/{assessment_id}/artifacts/{kind}")
+async def get_assessment_artifact(
+    assessment_id: uuid.UUID,
+    kind: Literal["ultrasound", "heatmap_overlay", "heatmap_only"],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ultrasound image or Grad-CAM heatmap of one of the current user's
+    assessments, served from the blob store.
+    """
+    # Someone else's assessment is reported as missing, not forbidden
+    assessment = await get_assessment(db, current_user.id, assessment_id)
+    if assessment is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
+    ref = getattr(assessment, f"{kind}_ref")
+    if not ref:
+        raise HTTPException(status_code=404, detail=f"No {kind} stored for this assessment")
+
+    # Blobs are immutable, so the digest is a strong validator
+    headers = {
+        "ETag": f'"{parse_ref(ref)}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+
+    path = blob_store.local_path(ref)
+    if path is not None:
+        with open(path, "rb") as f:
+            head = f.read(16)
+        return FileResponse(path, media_type=media_type(head), headers=headers)
+
+    try:
+        data = await run_in_threadpool(blob_store.get, ref)
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail=f"No {kind} stored for this assessment")
+
+    return Response(content=data, media_type=media_type(data), headers=headers)
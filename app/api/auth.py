@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.auth_service import create_user, authenticate_user
+from app.database import get_async_db
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
@@ -18,8 +20,9 @@ class LoginRequest(BaseModel):
 
 
 @router.post("/register")
-def register(data: RegisterRequest):
-    user = create_user(
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await create_user(
+        db,
         email=data.email,
         password=data.password,
         first_name=data.first_name,
@@ -37,8 +40,8 @@ def register(data: RegisterRequest):
 
 
 @router.post("/login")
-def login(data: LoginRequest):
-    token, user = authenticate_user(data.email, data.password)
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    token, user = await authenticate_user(db, data.email, data.password)
     if not token:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
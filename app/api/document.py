@@ -1,16 +1,214 @@
 # app/api/document.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.services.document_router import process_document
+import asyncio
+import json
+import threading
+import zipfile
+from typing import List, Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.dependencies import get_current_user
+from app.core.config import BULK_PARSE_CONCURRENCY, UPLOAD_MAX_DOCUMENT_MB
+from app.services.parse_sandbox import (
+    process_document_sandboxed,
+    parse_document_sandboxed,
+    ParseWorkerError,
+    STATUS_ERROR,
+)
+from app.users.user_models import User
+from app.utils.uploads import read_upload, sniff_kind, DOCUMENT_KINDS, KIND_PDF
 
 router = APIRouter(prefix="/api/document", tags=["Document"])
 
+SUPPORTED_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+
 @router.post("/parse")
 async def parse_document(file: UploadFile = File(...)):
-    if not file.filename.lower().endswith((".pdf", ".png", ".jpg", ".jpeg")):
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(400, "Unsupported file type")
 
-    contents = await file.read()
-    result = process_document(contents, file.filename)
+    upload = await read_upload(file, allowed_kinds=DOCUMENT_KINDS, max_mb=UPLOAD_MAX_DOCUMENT_MB)
+
+    try:
+        parsed = await run_in_threadpool(
+            process_document_sandboxed,
+            upload.source(),
+            file.filename,
+            digest=upload.digest
+        )
+    except ParseWorkerError as e:
+        # The document, not the server, is at fault
+        raise HTTPException(422, e.detail())
+    finally:
+        upload.close()
+
+    result = parsed["result"]
+    result["parse_status"] = parsed["status"]
+    result["truncation_reason"] = parsed["truncation_reason"]
+    result["cached"] = parsed["cached"]
 
     return result
+
+
+# ======================================================
+# BULK INGESTION (NDJSON STREAM)
+# ======================================================
+def _iter_zip_documents(archive: UploadFile):
+    """
+    Returns an iterator of (filename, size, loader) per archive entry.
+    Entry bytes are only read when a parse slot is free, so the archive
+    is never held in memory.
+    """
+    try:
+        zf = zipfile.ZipFile(archive.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(400, "Archive is not a valid zip file")
+
+    lock = threading.Lock()
+
+    def loader(info):
+        def load(max_bytes):
+            # file_size is only what the archive declares; never inflate
+            # more than the cap
+            with lock, zf.open(info) as entry:
+                return entry.read(max_bytes + 1)
+        return load
+
+    return (
+        (info.filename, info.file_size, loader(info))
+        for info in zf.infolist()
+        if not info.is_dir()
+    )
+
+
+def _iter_uploaded_documents(files: List[UploadFile]):
+    for upload in files:
+        def load(max_bytes, upload=upload):
+            upload.file.seek(0)
+            return upload.file.read(max_bytes + 1)
+        yield upload.filename, upload.size, load
+
+
+def _parse_one(index: int, filename: str, size: Optional[int], load, parser: str, cancelled: threading.Event):
+    """
+    Extension, declared size and (after a capped read) magic bytes are
+    checked the same way as single uploads before anything is parsed.
+    """
+    line = {"index": index, "filename": filename}
+    max_bytes = UPLOAD_MAX_DOCUMENT_MB * 1024 * 1024
+    allowed_kinds = (KIND_PDF,) if parser == "pcos" else DOCUMENT_KINDS
+
+    if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return {**line, "status": "skipped", "error": "Unsupported file type"}
+
+    if parser == "pcos" and not filename.lower().endswith(".pdf"):
+        return {**line, "status": "skipped", "error": "Only PDF documents are supported"}
+
+    too_large = {**line, "status": "skipped", "error": f"Document exceeds {UPLOAD_MAX_DOCUMENT_MB} MB"}
+    if size is not None and size > max_bytes:
+        return too_large
+
+    if cancelled.is_set():
+        return {**line, "status": "cancelled"}
+
+    try:
+        contents = load(max_bytes)
+        if len(contents) > max_bytes:
+            return too_large
+
+        if sniff_kind(contents[:16]) not in allowed_kinds:
+            return {**line, "status": "skipped", "error": f"Content must be one of: {', '.join(allowed_kinds)}"}
+
+        if parser == "pcos":
+            parsed = parse_document_sandboxed(contents, cancelled=cancelled)
+        else:
+            parsed = process_document_sandboxed(contents, filename, cancelled=cancelled)
+    except ParseWorkerError as e:
+        return {**line, "status": "error", "error": str(e), "parse_status": STATUS_ERROR}
+    except Exception as e:
+        return {**line, "status": "error", "error": str(e)}
+
+    return {
+        **line,
+        "status": "success",
+        "parse_status": parsed["status"],
+        "truncation_reason": parsed["truncation_reason"],
+        "cached": parsed["cached"],
+        "elapsed_ms": parsed["elapsed_ms"],
+        "result": parsed["result"],
+    }
+
+
+async def _stream_results(documents, parser: str):
+    """
+    Keeps at most BULK_PARSE_CONCURRENCY parses in flight and emits one
+    NDJSON line per document in completion order.
+
+    If the client disconnects, Starlette cancels this generator; the
+    in-flight parses are then cancelled too (their workers killed)
+    instead of running to completion for nobody.
+    """
+    documents = enumerate(documents)
+    pending = set()
+    exhausted = False
+    cancelled = threading.Event()
+
+    try:
+        while True:
+            while not exhausted and len(pending) < BULK_PARSE_CONCURRENCY:
+                item = next(documents, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, (filename, size, load) = item
+                pending.add(asyncio.ensure_future(
+                    run_in_threadpool(_parse_one, index, filename, size, load, parser, cancelled)
+                ))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield json.dumps(task.result(), default=str) + "\n"
+    finally:
+        if pending:
+            cancelled.set()
+            for task in pending:
+                task.cancel()
+
+
+@router.post("/bulk")
+async def parse_documents_bulk(
+    archive: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
+    parser: str = Query("document", pattern="^(document|pcos)$"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bulk ingestion for back-loading historical lab reports.
+
+    Accepts either a zip `archive` or a multipart list of `files` and
+    streams one NDJSON line per document as each parse finishes.
+    `parser=document` matches /api/document/parse, `parser=pcos`
+    matches /api/pcos/parse-document.
+
+    Requires authentication: one request can occupy every parse worker.
+    """
+    if archive is not None and files:
+        raise HTTPException(400, "Send either an archive or files, not both")
+
+    if archive is not None:
+        documents = _iter_zip_documents(archive)
+    elif files:
+        documents = _iter_uploaded_documents(files)
+    else:
+        raise HTTPException(400, "No documents uploaded")
+
+    return StreamingResponse(
+        _stream_results(documents, parser),
+        media_type="application/x-ndjson"
+    )
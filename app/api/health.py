@@ -1,6 +1,9 @@
 # app/api/health.py
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.warmup import readiness
 
 router = APIRouter()
 
@@ -9,4 +12,13 @@ def health_check():
     return {
         "status": "ok",
         "service": "PCOS Multimodal ML Backend"
-    }
\ No newline at end of file
+    }
+
+@router.get("/ready")
+def readiness_check():
+    """
+    503 until every required model is loaded and warmed up, with
+    per-model load / warm-up status and timings.
+    """
+    ready, report = readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
@@ -0,0 +1,16 @@
+# app/api/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus text exposition.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,19 +1,28 @@
 # app/api/pcos.py
 
 import json
+import logging
 from typing import Optional
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.services import multimodal_service
-from app.parsing.document_parser import parse_document
-from app.auth.dependencies import get_current_user, get_current_user_optional, get_db
+from app.services.parse_sandbox import parse_document_sandboxed, ParseWorkerError
+from app.utils.uploads import read_upload, SpooledUpload, IMAGE_KINDS, KIND_PDF
+from app.core.config import UPLOAD_MAX_IMAGE_MB, UPLOAD_MAX_DOCUMENT_MB, WRITE_BEHIND_ENABLED
+from app.auth.dependencies import get_current_user, get_current_user_optional
+from app.database import get_async_db
 from app.users.user_models import User
-from app.assessments.assessment_service import save_assessment
-from app.services.gradcam_service import gradcam_service
-from app.services.recommendation_service import recommendation_service
+from app.assessments.assessment_service import save_assessment, store_artifacts
+from app.assessments.write_behind import assessment_writer
+from app.core.metrics import stage, record_fallback, record_insufficient_data
+from app.core.admission import predict_admission
 
 router = APIRouter(prefix="/api/pcos", tags=["PCOS"])
+# Served by the documents subsystem (see ENABLED_SUBSYSTEMS)
+documents_router = APIRouter(prefix="/api/pcos", tags=["PCOS"])
+
+logger = logging.getLogger(__name__)
 
 REQUIRED_FIELDS = [
     "Age (yrs)",
@@ -60,7 +69,7 @@ async def predict(
     tabular_data: str = Form(...),
     ultrasound: UploadFile = File(...),
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     PCOS prediction endpoint with Grad-CAM visualization.
@@ -79,6 +88,7 @@ async def predict(
     # Validate required fields
     missing_fields = validate_minimum_inputs(tabular_dict)
     if missing_fields:
+        record_insufficient_data("request")
         raise HTTPException(
             status_code=400,
             detail=f"Missing required fields: {', '.join(missing_fields)}"
@@ -91,15 +101,97 @@ async def predict(
             detail="Ultrasound image is required"
         )
     
-    ultrasound_bytes = await ultrasound.read()
-    
-    # Validate image file
-    if len(ultrasound_bytes) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Uploaded image file is empty"
+    # Starlette has already spooled the body (capped by
+    # UploadSizeLimitMiddleware); type and dimensions are checked from
+    # the first chunk and the spooled file is used without a copy
+    with stage("upload_read"):
+        upload = await read_upload(
+            ultrasound,
+            allowed_kinds=IMAGE_KINDS,
+            max_mb=UPLOAD_MAX_IMAGE_MB,
+            label="Uploaded image file"
         )
-    
+
+    save = current_user is not None
+    artifact_refs, stored_prediction = {}, None
+
+    try:
+        # Bounded: past capacity requests get 503 + Retry-After instead
+        # of piling up in the threadpool (app/core/admission.py). The
+        # slot is held until the thread finishes, even if the client leaves.
+        response = await predict_admission.run(
+            _run_prediction,
+            tabular_dict,
+            upload,
+            user_key=str(current_user.id) if current_user else None,
+            priority=current_user is not None,
+        )
+
+        if response["status"] == "success":
+            # Network-bound, so it runs after the slot is released
+            await run_in_threadpool(_add_recommendations, response, tabular_dict, upload.view())
+        save = save and response["status"] == "success"
+
+        if save:
+            # Ultrasound and heatmaps go to the blob store; the row keeps refs
+            try:
+                with stage("artifact_store"):
+                    artifact_refs, stored_prediction = await run_in_threadpool(
+                        store_artifacts, upload.view(), upload.digest, response
+                    )
+            except Exception as e:
+                # Fall back to keeping the images inline in the row
+                record_fallback("artifact_store")
+                logger.warning("Failed to store assessment artifacts: %s", e)
+                artifact_refs, stored_prediction = {}, response
+    finally:
+        upload.close()
+
+    # =====================================================
+    # SAVE TO DATABASE (if user is authenticated)
+    # =====================================================
+    if save:
+        try:
+            with stage("db_save"):
+                if WRITE_BEHIND_ENABLED:
+                    # Journaled now, inserted by the background writer
+                    assessment_id = await run_in_threadpool(
+                        assessment_writer.submit,
+                        current_user.id,
+                        tabular_dict,
+                        upload.filename,
+                        stored_prediction,
+                        artifact_refs,
+                    )
+                else:
+                    assessment = await save_assessment(
+                        db=db,
+                        user_id=current_user.id,
+                        tabular_data=tabular_dict,
+                        ultrasound_filename=upload.filename,
+                        prediction=stored_prediction,
+                        artifact_refs=artifact_refs,
+                    )
+                    assessment_id = assessment.id
+            response["assessment_id"] = str(assessment_id)
+            logger.info("Assessment saved", extra={"assessment_id": str(assessment_id)})
+        except Exception as e:
+            record_fallback("db_save")
+            logger.exception("Failed to save assessment")
+            # Don't fail the request if DB save fails
+
+    return response
+
+
+def _run_prediction(tabular_dict: dict, upload: SpooledUpload):
+    # Imported on first use (or at startup when the prediction subsystem
+    # is enabled): these pull in TensorFlow, Torch and CatBoost
+    from app.services import multimodal_service
+    from app.services.gradcam_service import gradcam_service
+
+    # Zero-copy view over the upload (memoryview or mmap)
+    ultrasound_bytes = upload.view()
+
     # =====================================================
     # MAIN PREDICTION - Using multimodal service
     # =====================================================
@@ -109,7 +201,7 @@ async def predict(
             ultrasound_bytes=ultrasound_bytes
         )
     except Exception as e:
-        print(f"❌ Prediction error: {e}")
+        logger.exception("Prediction failed")
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
@@ -117,6 +209,7 @@ async def predict(
     
     # Check if data was insufficient
     if prediction_result.get("status") == "INSUFFICIENT_DATA":
+        record_insufficient_data("model")
         return {
             "status": "insufficient_data",
             "message": prediction_result["message"],
@@ -132,13 +225,15 @@ async def predict(
     
     if gradcam_service:
         try:
-            gradcam_visualization = gradcam_service.generate_heatmap(ultrasound_bytes)
-            print(f"✅ Grad-CAM heatmap generated successfully")
+            with stage("gradcam"):
+                gradcam_visualization = gradcam_service.generate_heatmap(ultrasound_bytes)
         except Exception as e:
-            print(f"⚠️ Grad-CAM generation failed: {e}")
+            record_fallback("gradcam")
+            logger.warning("Grad-CAM generation failed: %s", e)
             # Don't fail the entire request if Grad-CAM fails
     else:
-        print("⚠️ Grad-CAM service not available")
+        record_fallback("gradcam")
+        logger.warning("Grad-CAM service not available")
     
     # =====================================================
     # BUILD RESPONSE
@@ -155,65 +250,62 @@ async def predict(
         "assessment_date": None  # Will be set if saved to DB
     }
     
+    return response
+
+
+def _add_recommendations(response: dict, tabular_dict: dict, ultrasound_bytes):
+    from app.services.recommendation_service import recommendation_service
+
     # =====================================================
     # GENERATE AI RECOMMENDATIONS (NEW!)
     # =====================================================
     try:
-        print("🤖 Generating personalized AI recommendations...")
-        ai_recommendations = recommendation_service.generate_personalized_recommendations(
-            assessment_data=tabular_dict,
-            prediction_result={
-                "risk_level": prediction_result["risk_level"],
-                "final_pcos_probability": prediction_result["final_pcos_probability"],
-                "tabular_risk": prediction_result["tabular_risk"],
-                "ultrasound_risk": prediction_result["ultrasound_risk"]
-            },
-            ultrasound_image=ultrasound_bytes  # Pass image for multimodal analysis
-        )
+        with stage("gemini"):
+            ai_recommendations = recommendation_service.generate_personalized_recommendations(
+                assessment_data=tabular_dict,
+                prediction_result={
+                    "risk_level": response["risk_level"],
+                    "final_pcos_probability": response["final_pcos_probability"],
+                    "tabular_risk": response["tabular_risk"],
+                    "ultrasound_risk": response["ultrasound_risk"]
+                },
+                ultrasound_image=ultrasound_bytes  # Pass image for multimodal analysis
+            )
         
         if ai_recommendations["status"] == "success" and ai_recommendations["recommendations"]:
             response["personalized_recommendations"] = ai_recommendations["recommendations"]
             response["recommendations_source"] = "gemini-ai"
             response["multimodal_analysis"] = ai_recommendations.get("multimodal", False)
-            print(f"✅ Generated {len(ai_recommendations['recommendations'])} AI recommendations")
+            logger.debug("Generated %d AI recommendations", len(ai_recommendations["recommendations"]))
         else:
+            record_fallback("recommendations")
             response["personalized_recommendations"] = None
             response["recommendations_source"] = "fallback"
-            print(f"⚠️ AI recommendations failed: {ai_recommendations.get('message', 'Unknown error')}")
+            logger.warning("AI recommendations failed: %s", ai_recommendations.get("message", "Unknown error"))
             
     except Exception as e:
-        print(f"⚠️ AI recommendation generation error: {e}")
+        record_fallback("recommendations")
+        logger.exception("AI recommendation generation error")
         response["personalized_recommendations"] = None
         response["recommendations_source"] = "fallback"
-    
-    # =====================================================
-    # SAVE TO DATABASE (if user is authenticated)
-    # =====================================================
-    if current_user:
-        try:
-            assessment_id = save_assessment(
-                db=db,
-                user_id=current_user.id,
-                tabular_data=tabular_dict,
-                ultrasound_filename=ultrasound.filename if ultrasound else None,
-                prediction=response,
-            )
-            response["assessment_id"] = assessment_id
-            print(f"✅ Assessment saved to database (ID: {assessment_id})")
-        except Exception as e:
-            print(f"⚠️ Failed to save assessment: {e}")
-            # Don't fail the request if DB save fails
-    
-    return response
 
 
-@router.post("/parse-document")
+@documents_router.post("/parse-document")
 async def parse_medical_document(
-    document: UploadFile = File(...)
+    document: UploadFile = File(...),
+    streaming: bool = Query(False),
+    max_pages: Optional[int] = Query(None, ge=1),
 ):
     """
     Parse medical PDF document and extract clinical parameters.
     Supports laboratory reports and medical records.
+
+    With `streaming=true` pages are read in order and parsing stops
+    once every field is found (or `max_pages` is reached).
+
+    Parsing runs in a sandboxed worker; if it exceeds its time, memory
+    or page budget the partial result is returned with
+    `parse_status="truncated"` and a `truncation_reason`.
     """
     if not document.filename.lower().endswith(".pdf"):
         raise HTTPException(
@@ -221,25 +313,43 @@ async def parse_medical_document(
             detail="Only PDF documents are supported"
         )
 
-    pdf_bytes = await document.read()
-    
-    if len(pdf_bytes) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Uploaded PDF file is empty"
-        )
+    upload = await read_upload(
+        document,
+        allowed_kinds=(KIND_PDF,),
+        max_mb=UPLOAD_MAX_DOCUMENT_MB,
+        label="Uploaded PDF file"
+    )
 
     try:
-        extracted = parse_document(pdf_bytes)
+        parsed = await run_in_threadpool(
+            parse_document_sandboxed,
+            upload.source(),
+            streaming=streaming,
+            max_pages=max_pages,
+            digest=upload.digest
+        )
+        result = parsed["result"]
         return {
             "status": "success",
-            "fields": extracted,
-            "fields_count": len(extracted)
+            "fields": result["fields"],
+            "fields_count": len(result["fields"]),
+            "pages_read": result["pages_read"],
+            "pages_total": result["pages_total"],
+            "early_stop": result["early_stop"],
+            "parse_status": parsed["status"],
+            "truncation_reason": parsed["truncation_reason"],
+            "cached": parsed["cached"]
         }
 
+    except ParseWorkerError as e:
+        raise HTTPException(status_code=422, detail=e.detail())
+
     except Exception as e:
-        print(f"[ERROR] Document parsing failed: {str(e)}")
+        logger.exception("Document parsing failed")
         raise HTTPException(
             status_code=500,
             detail=f"Document parsing failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+    finally:
+        upload.close()
\ No newline at end of file
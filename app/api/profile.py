@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.auth.dependencies import get_current_user
 from app.users.profile_schemas import ProfileCreate, ProfileUpdate, ProfileResponse
 from app.users.profile_service import get_profile, create_or_update_profile
@@ -8,13 +8,6 @@ from app.users.user_models import User
 
 router = APIRouter(prefix="/api/profile", tags=["Profile"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def check_profile_complete(profile) -> bool:
     """Check if essential profile fields are filled"""
     if not profile:
@@ -28,11 +21,11 @@ def check_profile_complete(profile) -> bool:
     ])
 
 @router.get("/me", response_model=ProfileResponse)
-def fetch_profile(
-    db: Session = Depends(get_db),
+async def fetch_profile(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    profile = get_profile(db, current_user.id)
+    profile = await get_profile(db, current_user.id)
     if not profile:
         return {
             "first_name": current_user.first_name,
@@ -59,12 +52,12 @@ def fetch_profile(
 
 @router.post("/me", response_model=ProfileResponse)
 @router.put("/me", response_model=ProfileResponse)
-def save_profile(
+async def save_profile(
     data: ProfileCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    profile = create_or_update_profile(db, current_user, data)
+    profile = await create_or_update_profile(db, current_user, data)
     profile_dict = {
         "email": profile.email,
         "first_name": profile.first_name,
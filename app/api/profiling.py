@@ -0,0 +1,36 @@
+# app/api/profiling.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.auth.dependencies import require_role
+from app.core.profiling import sampler
+from app.users.user_models import User
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiling"])
+
+@router.get("")
+def list_profiles(current_user: User = Depends(require_role("admin"))):
+    """
+    Stored on-demand profiles, newest first. Request one by sending
+    `X-Profile: 1` (or `?profile=1`) with an admin token; its id comes
+    back in the X-Profile-Id header.
+    """
+    return {"profiles": sampler.list_profiles()}
+
+@router.get("/aggregate", response_class=PlainTextResponse)
+def get_aggregate_profile(current_user: User = Depends(require_role("admin"))):
+    """
+    Folded stacks summed over all sampled requests (PROFILE_SAMPLE_RATE).
+    """
+    return sampler.read_aggregate()
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, current_user: User = Depends(require_role("admin"))):
+    """
+    One request's folded stacks, for flamegraph.pl / speedscope.
+    """
+    folded = sampler.read_profile(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
@@ -1,7 +1,10 @@
 import uuid
-from sqlalchemy import Column, String, Float, ForeignKey, DateTime, JSON, UUID
-from sqlalchemy.sql import func
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Float, ForeignKey, DateTime, UUID, Index, event
+from sqlalchemy.orm import Session
 from app.database import Base
+from app.utils.compressed_json import CompressedJSON
+from app.assessments.promoted_fields import promoted_columns
 
 class PCOSAssessment(Base):
     __tablename__ = "pcos_assessments"
@@ -9,14 +12,50 @@ class PCOSAssessment(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
-    tabular_data = Column(JSON, nullable=False)
+    tabular_data = Column(CompressedJSON, nullable=False)
     ultrasound_filename = Column(String)
 
+    # Blob store references ("sha256:<hex>", see app/storage/blob_store.py)
+    ultrasound_ref = Column(String(71))
+    heatmap_overlay_ref = Column(String(71))
+    heatmap_only_ref = Column(String(71))
+
     tabular_risk = Column(Float, nullable=False)
     ultrasound_risk = Column(Float, nullable=False)
     final_pcos_probability = Column(Float, nullable=False)
-    risk_level = Column(String, nullable=False)
+    risk_level = Column(String, nullable=False, index=True)
 
     model_version = Column(String, default="v1")
-    prediction = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    prediction = Column(CompressedJSON, nullable=False)
+    # Set by the application, never by the database: SQLite's
+    # CURRENT_TIMESTAMP has no fractional seconds, and since SQLite
+    # compares the stored text, mixed formats break keyset pagination
+    # (see app.init_db._normalize_sqlite_timestamps for older rows)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # When the row was flushed to the database, i.e. just before its
+    # transaction commits. Write-behind rows can commit long after their
+    # created_at, so incremental exports page on this instead.
+    inserted_at = Column(DateTime(timezone=True))
+
+    # History queries filter on user_id and page by (created_at, id);
+    # the trailing id lets the keyset ORDER BY run off the index.
+    # Exports and cohort queries range over created_at for all users.
+    __table_args__ = (
+        Index("ix_pcos_assessments_user_created", "user_id", "created_at", "id"),
+        Index("ix_pcos_assessments_created", "created_at", "id"),
+        Index("ix_pcos_assessments_inserted", "inserted_at", "id"),
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_inserted_at(session, flush_context, instances):
+    now = None
+    for obj in session.new:
+        if isinstance(obj, PCOSAssessment):
+            now = now or datetime.now(timezone.utc)
+            obj.inserted_at = now
+
+
+# Typed, indexed copies of selected tabular_data fields (PROMOTED_FIELDS)
+for _name, _column in promoted_columns().items():
+    setattr(PCOSAssessment, _name, _column)
@@ -1,19 +1,74 @@
+import base64
+import binascii
+import copy
+import json
 import uuid
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from sqlalchemy import select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.promoted_fields import PROMOTED, promoted_values
+from app.assessments.summary_service import apply_summaries_async
+from app.storage.blob_store import blob_store
 
-def save_assessment(
-        db: Session,
+# Grad-CAM images in the response -> assessment column holding their reference
+HEATMAP_REF_COLUMNS = {
+    "heatmap_overlay": "heatmap_overlay_ref",
+    "heatmap_only": "heatmap_only_ref",
+}
+
+
+def _decode_data_uri(value):
+    if isinstance(value, str) and value.startswith("data:") and ";base64," in value:
+        return base64.b64decode(value.split(";base64,", 1)[1])
+    return None
+
+
+def store_artifacts(ultrasound=None, ultrasound_digest: str = None, prediction: dict = None):
+    """
+    Moves binary artifacts out of the assessment row into the blob store.
+
+    Returns (artifact_refs, prediction) where `prediction` is a copy
+    with the base64 Grad-CAM images removed (the original response is
+    left untouched) and `artifact_refs` maps column names to references.
+    """
+    refs = {}
+
+    if ultrasound is not None:
+        refs["ultrasound_ref"] = blob_store.put(ultrasound, digest=ultrasound_digest)
+
+    if prediction is None:
+        return refs, prediction
+
+    gradcam = prediction.get("gradcam_visualization")
+    if not gradcam:
+        return refs, prediction
+
+    slim_gradcam = dict(gradcam)
+    for key, column in HEATMAP_REF_COLUMNS.items():
+        png = _decode_data_uri(gradcam.get(key))
+        if png is not None:
+            refs[column] = blob_store.put(png)
+            del slim_gradcam[key]
+
+    slim = copy.copy(prediction)
+    slim["gradcam_visualization"] = slim_gradcam
+    return refs, slim
+
+
+def build_assessment(
         user_id,
         tabular_data: dict,
         ultrasound_filename: str,
         prediction: dict,
-):
+        artifact_refs: dict = None,
+        created_at: datetime = None,
+) -> PCOSAssessment:
     # Convert user_id to UUID if it's a string
     if isinstance(user_id, str):
         user_id = uuid.UUID(user_id)
-    
-    assessment = PCOSAssessment(
+
+    return PCOSAssessment(
         user_id=user_id,
         tabular_data=tabular_data,
         ultrasound_filename=ultrasound_filename,
@@ -21,11 +76,204 @@ def save_assessment(
         ultrasound_risk=prediction["ultrasound_risk"],
         final_pcos_probability=prediction["final_pcos_probability"],
         risk_level=prediction["risk_level"],
-        prediction=prediction, 
+        prediction=prediction,
+        # Set here rather than by the server so summaries can bucket
+        # the row by day before it is flushed
+        created_at=created_at or datetime.now(timezone.utc),
+        **promoted_values(tabular_data),
+        **(artifact_refs or {}),
     )
 
+async def save_assessment(
+        db: AsyncSession,
+        user_id,
+        tabular_data: dict,
+        ultrasound_filename: str,
+        prediction: dict,
+        artifact_refs: dict = None,
+):
+    assessment = build_assessment(user_id, tabular_data, ultrasound_filename, prediction, artifact_refs)
+
     db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
+    await apply_summaries_async(db, [assessment])
+    await db.commit()
+    await db.refresh(assessment)
+
+    return assessment
+
+
+# ======================================================
+# HISTORY QUERIES
+# ======================================================
+# Columns a history listing may project. The JSON columns are only
+# loaded when asked for explicitly.
+LIST_FIELDS = (
+    "id",
+    "created_at",
+    "risk_level",
+    "final_pcos_probability",
+    "tabular_risk",
+    "ultrasound_risk",
+    "model_version",
+    "ultrasound_filename",
+    "ultrasound_ref",
+    "heatmap_overlay_ref",
+    "heatmap_only_ref",
+)
+HEAVY_FIELDS = ("tabular_data", "prediction")
+DEFAULT_LIST_FIELDS = ("id", "created_at", "risk_level", "final_pcos_probability")
+
+
+def _as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def encode_cursor(created_at: datetime, assessment_id) -> str:
+    payload = json.dumps([created_at.isoformat(), str(assessment_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, assessment_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), uuid.UUID(assessment_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields: str = None):
+    """
+    "id,risk_level" -> ("id", "risk_level"). `id` and `created_at` are
+    always included since the cursor is built from them.
+    """
+    if not fields:
+        return DEFAULT_LIST_FIELDS
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LIST_FIELDS + HEAVY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return tuple(dict.fromkeys(["id", "created_at"] + requested))
+
+
+async def _fetch_page(db: AsyncSession, query, limit: int, cursor: str = None):
+    """
+    Newest-first keyset page of `query` on (created_at, id). The query
+    must select the id and created_at columns.
+    """
+    if cursor:
+        created_at, assessment_id = decode_cursor(cursor)
+        query = query.where(or_(
+            PCOSAssessment.created_at < created_at,
+            and_(
+                PCOSAssessment.created_at == created_at,
+                PCOSAssessment.id < assessment_id,
+            ),
+        ))
+
+    # One extra row tells whether another page exists
+    query = query.order_by(
+        PCOSAssessment.created_at.desc(),
+        PCOSAssessment.id.desc(),
+    ).limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+
+    return items, next_cursor
+
+
+async def list_assessments(
+        db: AsyncSession,
+        user_id,
+        limit: int = 20,
+        cursor: str = None,
+        fields=DEFAULT_LIST_FIELDS,
+):
+    """
+    One page of a user's assessments, newest first, using keyset
+    pagination on (created_at, id). Only `fields` are selected.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    columns = [getattr(PCOSAssessment, name) for name in fields]
+    query = select(*columns).where(PCOSAssessment.user_id == _as_uuid(user_id))
+    return await _fetch_page(db, query, limit, cursor)
+
+
+# ======================================================
+# COHORT QUERIES (promoted columns)
+# ======================================================
+def _parse_bool(name: str, value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ("true", "1", "yes"):
+        return True
+    if lowered in ("false", "0", "no"):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def cohort_conditions(params) -> list:
+    """
+    WHERE clauses from query parameters: `<field>_min` / `<field>_max`
+    for numeric promoted fields, `<field>=true|false` for boolean ones
+    and `risk_level` (repeatable). Raises ValueError on bad input.
+    """
+    conditions = []
+
+    for name, field in PROMOTED.items():
+        column = getattr(PCOSAssessment, name)
+
+        if field.is_range:
+            for suffix, compare in (("_min", column.__ge__), ("_max", column.__le__)):
+                raw = params.get(name + suffix)
+                if raw is None:
+                    continue
+                try:
+                    conditions.append(compare(float(raw)))
+                except ValueError:
+                    raise ValueError(f"{name + suffix} must be a number")
+        elif params.get(name) is not None:
+            conditions.append(column == _parse_bool(name, params.get(name)))
+
+    risk_levels = params.getlist("risk_level") if hasattr(params, "getlist") else params.get("risk_level")
+    if risk_levels:
+        if isinstance(risk_levels, str):
+            risk_levels = [risk_levels]
+        conditions.append(PCOSAssessment.risk_level.in_([r.upper() for r in risk_levels]))
+
+    return conditions
+
+
+async def cohort_assessments(db: AsyncSession, conditions: list, limit: int = 50, cursor: str = None):
+    """
+    Assessments of all users matching `conditions`, newest first.
+    Returns the promoted columns only, never the JSON blobs.
+    """
+    columns = [
+        PCOSAssessment.id,
+        PCOSAssessment.user_id,
+        PCOSAssessment.created_at,
+        PCOSAssessment.risk_level,
+        PCOSAssessment.final_pcos_probability,
+    ] + [getattr(PCOSAssessment, name) for name in PROMOTED]
+
+    query = select(*columns).where(*conditions)
+    return await _fetch_page(db, query, limit, cursor)
+
 
-    return assessment
\ No newline at end of file
+async def get_assessment(db: AsyncSession, user_id, assessment_id):
+    """
+    A single assessment with all columns, or None if it does not exist
+    or belongs to someone else.
+    """
+    assessment = await db.get(PCOSAssessment, _as_uuid(assessment_id))
+    if assessment is None or assessment.user_id != _as_uuid(user_id):
+        return None
+    return assessment
@@ -0,0 +1,276 @@
+"""
+Bulk export of assessments for research / retraining.
+
+Rows are streamed from the database in `batch_size` chunks (yield_per)
+and written out chunk by chunk, so memory stays flat however many rows
+are exported. tabular_data is flattened into the 41 canonical feature
+columns the tabular model is trained on; the JSON blobs themselves are
+not exported.
+
+Exports are bounded by (since, until] on inserted_at, the time the row
+was flushed inside its inserting transaction, and nightly jobs pass the
+previous run's `until` as the next `since`. created_at cannot be used:
+it is set when the assessment is built, and a write-behind row can
+commit long after it (retries, journal replay), landing behind a
+`since` that was already exported. A row's inserted_at is at most its
+transaction's flush-to-commit time older than its commit, and
+`export_watermark()` keeps `until` EXPORT_SETTLE_SECONDS behind now, so
+every row up to `until` has committed when the export reads it.
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from app.assessments.assessment_model import PCOSAssessment
+from app.core.config import EXPORT_SETTLE_SECONDS
+from app.utils.column_mapping import COLUMN_RENAME_MAP
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+META_COLUMNS = (
+    "assessment_id",
+    "user_id",
+    "created_at",
+    "model_version",
+    "risk_level",
+    "tabular_risk",
+    "ultrasound_risk",
+    "final_pcos_probability",
+)
+
+# Same names and order as the tabular model's feature list
+FEATURE_COLUMNS = tuple(COLUMN_RENAME_MAP.values())
+CATEGORICAL_FEATURES = {
+    "blood_group", "cycler/i", "pregnanty/n",
+    "weight_gainy/n", "hair_growthy/n",
+    "skin_darkening_y/n", "hair_lossy/n",
+    "pimplesy/n", "fast_food_y/n", "reg.exercisey/n",
+}
+
+EXPORT_COLUMNS = META_COLUMNS + FEATURE_COLUMNS
+
+_CANONICAL = set(FEATURE_COLUMNS)
+
+
+# ======================================================
+# ROWS
+# ======================================================
+def export_watermark() -> datetime:
+    """
+    Upper bound for an export started now (see module docstring).
+    """
+    return datetime.now(timezone.utc) - timedelta(seconds=EXPORT_SETTLE_SECONDS)
+
+
+def _bound(value: Optional[datetime], dialect_name: str) -> Optional[datetime]:
+    if value is None:
+        return None
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    # SQLite stores naive UTC text and compares as strings
+    return value.replace(tzinfo=None) if dialect_name == "sqlite" else value
+
+
+def _feature(name: str, value):
+    if value is None or value == "":
+        return None
+    if name in CATEGORICAL_FEATURES:
+        return str(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None  # drop NaN
+
+
+def flatten(row) -> dict:
+    """
+    One export row: metadata columns plus the canonical features.
+    Accepts raw form keys ("AMH(ng/mL)") and canonical ones ("amhng/ml").
+    """
+    flat = {
+        "assessment_id": str(row.id),
+        "user_id": str(row.user_id),
+        "created_at": row.created_at,
+        "model_version": row.model_version,
+        "risk_level": row.risk_level,
+        "tabular_risk": row.tabular_risk,
+        "ultrasound_risk": row.ultrasound_risk,
+        "final_pcos_probability": row.final_pcos_probability,
+    }
+    flat.update(dict.fromkeys(FEATURE_COLUMNS))
+
+    for key, value in (row.tabular_data or {}).items():
+        name = COLUMN_RENAME_MAP.get(key, key)
+        if name in _CANONICAL:
+            flat[name] = _feature(name, value)
+
+    return flat
+
+
+def iter_batches(
+        db,
+        since: datetime = None,
+        until: datetime = None,
+        batch_size: int = 5000,
+) -> Iterator[List[dict]]:
+    """
+    Flattened assessments with since < inserted_at <= until, in insert
+    order, in lists of at most `batch_size` (sync session).
+    """
+    dialect_name = db.get_bind().dialect.name
+    query = select(
+        PCOSAssessment.id,
+        PCOSAssessment.user_id,
+        PCOSAssessment.created_at,
+        PCOSAssessment.model_version,
+        PCOSAssessment.risk_level,
+        PCOSAssessment.tabular_risk,
+        PCOSAssessment.ultrasound_risk,
+        PCOSAssessment.final_pcos_probability,
+        PCOSAssessment.tabular_data,
+    ).order_by(PCOSAssessment.inserted_at, PCOSAssessment.id)
+
+    if since is not None:
+        query = query.where(PCOSAssessment.inserted_at > _bound(since, dialect_name))
+    if until is not None:
+        query = query.where(PCOSAssessment.inserted_at <= _bound(until, dialect_name))
+
+    result = db.execute(query.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [flatten(row) for row in partition]
+
+
+# ======================================================
+# WRITERS
+# ======================================================
+def iter_csv(batches: Iterable[List[dict]]) -> Iterator[str]:
+    """
+    CSV text, header first, one chunk per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+
+    for batch in batches:
+        for row in batch:
+            if isinstance(row["created_at"], datetime):
+                row["created_at"] = row["created_at"].isoformat()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file for ParquetWriter that hands written bytes back to
+    the caller. tell() keeps counting across drains because the footer
+    records absolute offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _pyarrow():
+    """
+    pyarrow (with numpy) is imported on the first Parquet export rather
+    than with this module. None if it is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # optional; only needed for Parquet
+        return None
+    return pyarrow
+
+
+def parquet_schema():
+    pyarrow = _pyarrow()
+    fields = [
+        pyarrow.field("assessment_id", pyarrow.string()),
+        pyarrow.field("user_id", pyarrow.string()),
+        pyarrow.field("created_at", pyarrow.timestamp("us", tz="UTC")),
+        pyarrow.field("model_version", pyarrow.string()),
+        pyarrow.field("risk_level", pyarrow.string()),
+        pyarrow.field("tabular_risk", pyarrow.float64()),
+        pyarrow.field("ultrasound_risk", pyarrow.float64()),
+        pyarrow.field("final_pcos_probability", pyarrow.float64()),
+    ]
+    fields += [
+        pyarrow.field(name, pyarrow.string() if name in CATEGORICAL_FEATURES else pyarrow.float64())
+        for name in FEATURE_COLUMNS
+    ]
+    return pyarrow.schema(fields)
+
+
+def iter_parquet(batches: Iterable[List[dict]], compression: str = "zstd") -> Iterator[bytes]:
+    """
+    Parquet bytes, one row group per batch. Requires pyarrow.
+    """
+    pyarrow = _pyarrow()
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression=compression)
+    try:
+        for batch in batches:
+            for row in batch:
+                created_at = row["created_at"]
+                if isinstance(created_at, datetime) and created_at.tzinfo is None:
+                    row["created_at"] = created_at.replace(tzinfo=timezone.utc)
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def check_format(fmt: str):
+    """
+    ValueError for unknown formats, RuntimeError if the format's
+    writer is not installed. Call before starting a streamed response.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet" and _pyarrow() is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+
+
+def iter_export(db, fmt: str, since: datetime = None, until: datetime = None, batch_size: int = 5000):
+    """
+    Encoded export chunks (str for CSV, bytes for Parquet).
+    """
+    check_format(fmt)
+
+    batches = iter_batches(db, since=since, until=until, batch_size=batch_size)
+    if fmt == "csv":
+        return iter_csv(batches)
+    return iter_parquet(batches)
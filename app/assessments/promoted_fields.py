@@ -0,0 +1,111 @@
+"""
+Clinical fields promoted out of `tabular_data` into typed, indexed
+columns on pcos_assessments.
+
+`tabular_data` is stored compressed and cannot be filtered in SQL, so
+fields clinicians filter on are copied into real columns when the row
+is built. Which ones is set by PROMOTED_FIELDS; the catalogue below
+lists what can be promoted. Columns are attached to PCOSAssessment
+when the model is defined and added to existing databases by init_db.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import Boolean, Column, Float
+
+from app.core.config import PROMOTED_FIELDS
+
+
+def _number(value) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None  # drop NaN
+
+
+def _field(key: str) -> Callable[[dict], Optional[float]]:
+    return lambda tabular: _number(tabular.get(key))
+
+
+def _lh_fsh_ratio(tabular: dict) -> Optional[float]:
+    lh = _number(tabular.get("LH(mIU/mL)"))
+    fsh = _number(tabular.get("FSH(mIU/mL)"))
+    if lh is None or not fsh:
+        return None
+    return round(lh / fsh, 4)
+
+
+# "R"/"I" from the form and parsed documents; 2/4 (and 5) in the
+# source datasets
+_CYCLE_REGULAR = {"R": True, "I": False, "2": True, "4": False, "5": False}
+
+
+def _cycle_regular(tabular: dict) -> Optional[bool]:
+    value = tabular.get("Cycle(R/I)")
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return _CYCLE_REGULAR.get(str(value).strip().upper())
+
+
+class PromotedField:
+    def __init__(self, column_type, extract: Callable[[dict], Any], source: str, description: str):
+        self.column_type = column_type
+        self.extract = extract
+        self.source = source
+        self.description = description
+
+    @property
+    def is_range(self) -> bool:
+        return self.column_type is Float
+
+
+# name -> how to derive it from tabular_data
+CATALOGUE: Dict[str, PromotedField] = {
+    "age": PromotedField(Float, _field("Age (yrs)"), "Age (yrs)", "Age in years"),
+    "bmi": PromotedField(Float, _field("BMI"), "BMI", "Body mass index"),
+    "amh": PromotedField(Float, _field("AMH(ng/mL)"), "AMH(ng/mL)", "AMH (ng/mL)"),
+    "lh": PromotedField(Float, _field("LH(mIU/mL)"), "LH(mIU/mL)", "LH (mIU/mL)"),
+    "fsh": PromotedField(Float, _field("FSH(mIU/mL)"), "FSH(mIU/mL)", "FSH (mIU/mL)"),
+    "lh_fsh_ratio": PromotedField(
+        Float, _lh_fsh_ratio, "LH(mIU/mL) / FSH(mIU/mL)", "LH:FSH ratio"
+    ),
+    "cycle_length": PromotedField(
+        Float, _field("Cycle length(days)"), "Cycle length(days)", "Cycle length (days)"
+    ),
+    "cycle_regular": PromotedField(
+        Boolean, _cycle_regular, "Cycle(R/I)", "Regular menstrual cycle"
+    ),
+    "follicles_left": PromotedField(
+        Float, _field("Follicle No. (L)"), "Follicle No. (L)", "Follicle count, left ovary"
+    ),
+    "follicles_right": PromotedField(
+        Float, _field("Follicle No. (R)"), "Follicle No. (R)", "Follicle count, right ovary"
+    ),
+}
+
+_unknown = [name for name in PROMOTED_FIELDS if name not in CATALOGUE]
+if _unknown:
+    raise ValueError(
+        f"PROMOTED_FIELDS has unknown entries {_unknown}; choose from {sorted(CATALOGUE)}"
+    )
+
+PROMOTED: Dict[str, PromotedField] = {name: CATALOGUE[name] for name in PROMOTED_FIELDS}
+
+
+def promoted_columns() -> Dict[str, Column]:
+    """
+    Fresh Column objects for the promoted fields (attached to
+    PCOSAssessment in assessment_model.py).
+    """
+    return {name: Column(field.column_type, index=True) for name, field in PROMOTED.items()}
+
+
+def promoted_values(tabular_data: Optional[dict]) -> Dict[str, Any]:
+    """
+    Column values for the promoted fields of one assessment.
+    """
+    tabular_data = tabular_data or {}
+    return {name: field.extract(tabular_data) for name, field in PROMOTED.items()}
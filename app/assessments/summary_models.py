@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime, UUID
+from app.database import Base
+
+
+class UserRiskSummary(Base):
+    """
+    Running totals per user and risk level, kept in step with
+    pcos_assessments by app/assessments/summary_service.py.
+    """
+    __tablename__ = "user_risk_summaries"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    risk_level = Column(String, primary_key=True)
+
+    assessment_count = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+    last_assessment_at = Column(DateTime(timezone=True))
+
+
+class DailyRiskSummary(Base):
+    """
+    Population-wide running totals per UTC day and risk level.
+    """
+    __tablename__ = "daily_risk_summaries"
+
+    day = Column(Date, primary_key=True)
+    risk_level = Column(String, primary_key=True)
+
+    assessment_count = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
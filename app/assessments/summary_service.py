@@ -0,0 +1,285 @@
+"""
+Incrementally maintained assessment aggregates.
+
+Every path that inserts assessments (save_assessment and the
+write-behind writer) adds the new rows' counts and probability sums to
+the summary tables in the same transaction, so stats endpoints read a
+handful of summary rows instead of scanning pcos_assessments.
+`rebuild_summaries` recomputes them from scratch for backfills.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.summary_models import UserRiskSummary, DailyRiskSummary
+
+RISK_LEVELS = ("LOW", "MODERATE", "HIGH")
+
+# Dialects with a native upsert (every driver in app.database.ASYNC_DRIVERS)
+UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql, "mysql": mysql}
+
+
+def check_dialect(dialect_name: str):
+    """
+    Called at start-up: without an upsert every assessment save would
+    fail, so an unsupported database is refused before serving.
+    """
+    if dialect_name not in UPSERT_DIALECTS:
+        raise RuntimeError(
+            f"Assessment summaries need one of {', '.join(UPSERT_DIALECTS)}; "
+            f"DATABASE_URL uses {dialect_name}"
+        )
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; stored values are UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# ======================================================
+# DELTAS
+# ======================================================
+def summarize(rows: Iterable):
+    """
+    Folds assessments (anything with user_id, risk_level,
+    final_pcos_probability and created_at) into per-key deltas:
+      users: (user_id, risk_level) -> [count, probability_sum, last_at]
+      days:  (day, risk_level)     -> [count, probability_sum]
+    """
+    users = defaultdict(lambda: [0, 0.0, None])
+    days = defaultdict(lambda: [0, 0.0])
+
+    for row in rows:
+        created_at = _utc(row.created_at or datetime.now(timezone.utc))
+        user_id = row.user_id if isinstance(row.user_id, uuid.UUID) else uuid.UUID(str(row.user_id))
+
+        user = users[(user_id, row.risk_level)]
+        user[0] += 1
+        user[1] += row.final_pcos_probability
+        if user[2] is None or created_at > user[2]:
+            user[2] = created_at
+
+        day = days[(created_at.date(), row.risk_level)]
+        day[0] += 1
+        day[1] += row.final_pcos_probability
+
+    return users, days
+
+
+def _upsert(dialect_name: str, model, key_columns, values: dict, increments: dict, latest: dict = None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE (MySQL: ON DUPLICATE KEY UPDATE)
+    adding `increments` to the stored totals (and keeping the max of
+    `latest` columns).
+    """
+    check_dialect(dialect_name)
+
+    stmt = UPSERT_DIALECTS[dialect_name].insert(model).values(**values, **increments, **(latest or {}))
+    table = model.__table__
+    # The row that would have been inserted
+    proposed = stmt.inserted if dialect_name == "mysql" else stmt.excluded
+
+    set_ = {name: table.c[name] + proposed[name] for name in increments}
+    for name in latest or {}:
+        set_[name] = _greatest(dialect_name, table.c[name], proposed[name])
+
+    if dialect_name == "mysql":
+        # Keyed on the primary key (key_columns)
+        return stmt.on_duplicate_key_update(**set_)
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=set_)
+
+
+def _greatest(dialect_name: str, current, new):
+    if dialect_name == "postgresql":
+        return func.greatest(current, new)
+    # SQLite's scalar max() and MySQL's GREATEST() return NULL if any
+    # argument is NULL
+    return case((current.is_(None), new), (current < new, new), else_=current)
+
+
+def summary_statements(dialect_name: str, rows: Iterable):
+    users, days = summarize(rows)
+    statements = []
+
+    for (user_id, risk_level), (count, probability_sum, last_at) in users.items():
+        statements.append(_upsert(
+            dialect_name,
+            UserRiskSummary,
+            ["user_id", "risk_level"],
+            {"user_id": user_id, "risk_level": risk_level},
+            {"assessment_count": count, "probability_sum": probability_sum},
+            {"last_assessment_at": last_at},
+        ))
+
+    for (day, risk_level), (count, probability_sum) in days.items():
+        statements.append(_upsert(
+            dialect_name,
+            DailyRiskSummary,
+            ["day", "risk_level"],
+            {"day": day, "risk_level": risk_level},
+            {"assessment_count": count, "probability_sum": probability_sum},
+        ))
+
+    return statements
+
+
+def apply_summaries(db, rows: Iterable):
+    """
+    Adds `rows` to the summaries inside the caller's (sync) transaction.
+    """
+    for stmt in summary_statements(db.get_bind().dialect.name, rows):
+        db.execute(stmt)
+
+
+async def apply_summaries_async(db: AsyncSession, rows: Iterable):
+    for stmt in summary_statements(db.get_bind().dialect.name, rows):
+        await db.execute(stmt)
+
+
+# ======================================================
+# READS
+# ======================================================
+def _levels(rows):
+    levels = {
+        level: {"count": 0, "average_probability": None}
+        for level in RISK_LEVELS
+    }
+    total = 0
+    probability_sum = 0.0
+
+    for row in rows:
+        levels[row.risk_level] = {
+            "count": row.assessment_count,
+            "average_probability": round(row.probability_sum / row.assessment_count, 4)
+            if row.assessment_count else None,
+        }
+        total += row.assessment_count
+        probability_sum += row.probability_sum
+
+    return {
+        "total": total,
+        "average_probability": round(probability_sum / total, 4) if total else None,
+        "by_risk_level": levels,
+    }
+
+
+async def get_user_stats(db: AsyncSession, user_id):
+    user_id = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+    rows = (await db.execute(
+        select(UserRiskSummary).where(UserRiskSummary.user_id == user_id)
+    )).scalars().all()
+
+    stats = _levels(rows)
+    last = [row.last_assessment_at for row in rows if row.last_assessment_at]
+    stats["last_assessment_at"] = max(last) if last else None
+    return stats
+
+
+async def get_population_stats(
+        db: AsyncSession,
+        start: date = None,
+        end: date = None,
+        granularity: str = "month",
+):
+    """
+    Risk distribution and average probability per day or month
+    between `start` and `end` (inclusive), plus the overall totals.
+    """
+    query = select(DailyRiskSummary).order_by(DailyRiskSummary.day)
+    if start:
+        query = query.where(DailyRiskSummary.day >= start)
+    if end:
+        query = query.where(DailyRiskSummary.day <= end)
+
+    rows = (await db.execute(query)).scalars().all()
+
+    buckets = defaultdict(list)
+    for row in rows:
+        key = row.day.isoformat() if granularity == "day" else row.day.strftime("%Y-%m")
+        buckets[key].append(row)
+
+    return {
+        "granularity": granularity,
+        "overall": _levels(_merge(rows)),
+        "periods": [{"period": key, **_levels(_merge(group))} for key, group in buckets.items()],
+    }
+
+
+class _Total:
+    def __init__(self, risk_level):
+        self.risk_level = risk_level
+        self.assessment_count = 0
+        self.probability_sum = 0.0
+
+
+def _merge(rows):
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row.risk_level, _Total(row.risk_level))
+        total.assessment_count += row.assessment_count
+        total.probability_sum += row.probability_sum
+    return totals.values()
+
+
+# ======================================================
+# REBUILD
+# ======================================================
+def rebuild_summaries(db, batch_size: int = 10_000) -> int:
+    """
+    Recomputes both summary tables from pcos_assessments (sync session,
+    one transaction). Only the four needed columns are read.
+    Returns the number of assessments counted.
+    """
+    query = select(
+        PCOSAssessment.user_id,
+        PCOSAssessment.risk_level,
+        PCOSAssessment.final_pcos_probability,
+        PCOSAssessment.created_at,
+    ).execution_options(yield_per=batch_size)
+
+    counted = 0
+
+    def rows():
+        nonlocal counted
+        for row in db.execute(query):
+            counted += 1
+            yield row
+
+    users, days = summarize(rows())
+
+    db.execute(delete(UserRiskSummary))
+    db.execute(delete(DailyRiskSummary))
+
+    if users:
+        db.execute(insert(UserRiskSummary), [
+            {
+                "user_id": user_id,
+                "risk_level": risk_level,
+                "assessment_count": count,
+                "probability_sum": probability_sum,
+                "last_assessment_at": last_at,
+            }
+            for (user_id, risk_level), (count, probability_sum, last_at) in users.items()
+        ])
+    if days:
+        db.execute(insert(DailyRiskSummary), [
+            {
+                "day": day,
+                "risk_level": risk_level,
+                "assessment_count": count,
+                "probability_sum": probability_sum,
+            }
+            for (day, risk_level), (count, probability_sum) in days.items()
+        ])
+
+    db.commit()
+    return counted
@@ -0,0 +1,474 @@
+# app/assessments/write_behind.py
+
+"""
+Write-behind persistence for assessments.
+
+`submit()` assigns the assessment ID, appends the record to an on-disk
+journal segment and returns immediately. A background thread inserts
+queued records in batched transactions every WRITE_BEHIND_FLUSH_MS or
+WRITE_BEHIND_BATCH_SIZE rows, whichever comes first, and deletes a
+segment once all its records are committed.
+
+Each segment is flock()ed by its writer until all its records are
+committed. Segments nobody holds a lock on were left behind by a
+crash; they are replayed on start-up, skipping records whose ID is
+already stored, so a record that was committed but not yet removed from
+the journal is not inserted twice.
+
+A failed batch is retried every RETRY_SECONDS while newer batches keep
+draining. After WRITE_BEHIND_MAX_RETRIES failures it is inserted record
+by record, and records that still fail (bad data, constraint violations)
+go to <spill dir>/dead_letter/ so they stop holding up the journal.
+While the database itself is unreachable nothing is dead-lettered.
+
+Rows become visible to history queries after the next flush, not when
+the request returns.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import psutil
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to checking the writer's PID
+    fcntl = None
+
+from app.core.config import (
+    WRITE_BEHIND_FLUSH_MS,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_SPILL_DIR,
+    WRITE_BEHIND_FSYNC,
+    WRITE_BEHIND_MAX_RETRIES,
+)
+from sqlalchemy import select
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.database import SessionLocal
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import build_assessment
+from app.assessments.summary_service import apply_summaries
+from app.core.metrics import record_dead_letter
+
+logger = logging.getLogger(__name__)
+
+# Back-off before retrying a batch whose insert failed
+RETRY_SECONDS = 1.0
+
+# The database is unreachable (or locked): retry, never dead-letter
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def _segment_pid(path: str) -> Optional[int]:
+    try:
+        return int(os.path.basename(path).split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def _claim_segment(path: str) -> Optional[int]:
+    """
+    Opens and locks a segment whose writer is gone. Returns the fd
+    (closing it releases the lock), or None if a live writer holds it
+    or it has been removed meanwhile.
+    """
+    if fcntl is None:
+        pid = _segment_pid(path)
+        if pid is not None and pid != os.getpid() and psutil.pid_exists(pid):
+            return None
+
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return None
+
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+
+    return fd
+
+
+def _read_segment(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    # A crash mid-append leaves at most one partial trailing line
+    return [line for line in lines if line]
+
+
+def _to_assessment(line: str):
+    record = json.loads(line)
+    assessment = build_assessment(
+        record["user_id"],
+        record["tabular_data"],
+        record["ultrasound_filename"],
+        record["prediction"],
+        record.get("artifact_refs"),
+        created_at=datetime.fromisoformat(record["created_at"]),
+    )
+    assessment.id = uuid.UUID(record["id"])
+    return assessment
+
+
+class _Batch:
+    """
+    Records taken from one segment, with the segment's (locked) fd.
+    """
+
+    def __init__(self, path: str, fd: int, lines: List[str]):
+        self.path = path
+        self.fd = fd
+        self.lines = lines
+        self.attempts = 0
+        self.retry_at = 0.0
+
+
+class AssessmentWriter:
+    def __init__(
+        self,
+        spill_dir: str = WRITE_BEHIND_SPILL_DIR,
+        flush_ms: int = WRITE_BEHIND_FLUSH_MS,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        fsync: bool = WRITE_BEHIND_FSYNC,
+        session_factory=SessionLocal,
+    ):
+        self.spill_dir = spill_dir
+        self.flush_interval = flush_ms / 1000
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.session_factory = session_factory
+
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._first_pending_at = None
+        self._retry: List[_Batch] = []
+        self._in_flight = 0
+        self._segment_seq = 0
+        self._segment_path = None
+        self._segment_fd = None
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ======================================================
+    # LIFECYCLE
+    # ======================================================
+    def start(self):
+        """
+        Replays journal segments from earlier runs, then starts the
+        writer thread. Call after the tables exist.
+        """
+        if self.running:
+            return
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+        replayed = self.replay()
+        if replayed:
+            logger.info("Replayed journaled assessments", extra={"count": replayed})
+
+        with self._cond:
+            self._stopping = False
+            self._open_segment()
+
+        self._thread = threading.Thread(
+            target=self._run, name="assessment-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Flushes everything queued and stops the writer. Records that
+        could not be inserted stay in the journal for the next start.
+        """
+        if not self.running:
+            return
+
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+        self._thread.join(timeout)
+        self._thread = None
+
+        with self._cond:
+            self._close_segment(delete_if_empty=True)
+            # Unlocked, so the next start-up replays them
+            for batch in self._retry:
+                os.close(batch.fd)
+            self._retry = []
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Blocks until everything submitted so far is committed.
+        Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            self._first_pending_at = 0.0
+            self._cond.notify_all()
+
+            while self._pending or self._retry or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+        return True
+
+    # ======================================================
+    # PRODUCER SIDE (REQUEST HANDLERS)
+    # ======================================================
+    def submit(
+        self,
+        user_id,
+        tabular_data: dict,
+        ultrasound_filename: str,
+        prediction: dict,
+        artifact_refs: dict = None,
+    ) -> uuid.UUID:
+        """
+        Journals one assessment and queues it for insertion.
+        Returns the assessment ID it will be stored under.
+        """
+        assessment_id = uuid.uuid4()
+        line = json.dumps({
+            "id": str(assessment_id),
+            "user_id": str(user_id),
+            "tabular_data": tabular_data,
+            "ultrasound_filename": ultrasound_filename,
+            "prediction": prediction,
+            "artifact_refs": artifact_refs,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+        with self._cond:
+            if self._segment_fd is None:
+                raise RuntimeError("Assessment writer is not running")
+
+            os.write(self._segment_fd, (line + "\n").encode("utf-8"))
+            if self.fsync:
+                os.fsync(self._segment_fd)
+
+            if not self._pending:
+                # The writer may be asleep with no deadline; it sets one now
+                self._first_pending_at = time.monotonic()
+                self._cond.notify_all()
+            self._pending.append(line)
+
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+        return assessment_id
+
+    # ======================================================
+    # JOURNAL SEGMENTS
+    # ======================================================
+    def _open_segment(self):
+        self._segment_seq += 1
+        self._segment_path = os.path.join(
+            self.spill_dir, f"{os.getpid()}-{self._segment_seq:08d}.jsonl"
+        )
+        self._segment_fd = os.open(
+            self._segment_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        if fcntl is not None:
+            # Held until the segment is deleted: a PID can be reused after
+            # a restart, a lock dies with its process
+            fcntl.flock(self._segment_fd, fcntl.LOCK_EX)
+
+    def _close_segment(self, delete_if_empty: bool = False):
+        if self._segment_fd is None:
+            return
+        os.close(self._segment_fd)
+        self._segment_fd = None
+        if delete_if_empty and not self._pending and os.path.getsize(self._segment_path) == 0:
+            os.remove(self._segment_path)
+
+    def replay(self) -> int:
+        """
+        Inserts records from segments whose writer process is gone.
+        Segments of other live workers sharing the directory are locked
+        and left alone.
+        """
+        replayed = 0
+
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "*.jsonl"))):
+            if path == self._segment_path:
+                continue
+            fd = _claim_segment(path)
+            if fd is None:
+                continue
+
+            try:
+                lines = _read_segment(path)
+                if lines:
+                    try:
+                        self._insert(lines, idempotent=True)
+                    except TRANSIENT_ERRORS:
+                        raise
+                    except Exception:
+                        logger.exception("Journaled batch failed, inserting record by record", extra={"path": path})
+                        self._insert_each(lines)
+                os.remove(path)
+            finally:
+                os.close(fd)
+            replayed += len(lines)
+
+        return replayed
+
+    def _dead_letter(self, line: str, error: Exception):
+        """
+        Parks a record that cannot be inserted, with the error, in
+        <spill dir>/dead_letter/<pid>.jsonl (outside the replay glob).
+        """
+        dead_letter_dir = os.path.join(self.spill_dir, "dead_letter")
+        os.makedirs(dead_letter_dir, exist_ok=True)
+        entry = json.dumps({
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+            "error": f"{type(error).__name__}: {error}",
+            "record": line,
+        })
+        with open(os.path.join(dead_letter_dir, f"{os.getpid()}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(entry + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        record_dead_letter()
+        logger.error("Assessment moved to dead letter", extra={"error": str(error)})
+
+    # ======================================================
+    # WRITER THREAD
+    # ======================================================
+    def _due_retry(self) -> Optional[_Batch]:
+        now = time.monotonic()
+        return next((b for b in self._retry if self._stopping or now >= b.retry_at), None)
+
+    def _pending_due(self) -> bool:
+        if not self._pending:
+            return False
+        if self._stopping or len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._first_pending_at >= self.flush_interval
+
+    def _due(self) -> bool:
+        return self._due_retry() is not None or self._pending_due()
+
+    def _next_wakeup(self) -> Optional[float]:
+        deadlines = [b.retry_at for b in self._retry]
+        if self._pending:
+            deadlines.append(self._first_pending_at + self.flush_interval)
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+    def _take_batch(self) -> _Batch:
+        """
+        A retry that is due, else the pending records together with the
+        segment that holds exactly those records (which stays locked
+        until they are committed). Caller holds the lock.
+        """
+        batch = self._due_retry()
+        if batch is not None:
+            self._retry.remove(batch)
+            return batch
+
+        batch = _Batch(self._segment_path, self._segment_fd, self._pending)
+        self._pending = []
+        self._first_pending_at = None
+
+        self._segment_fd = None
+        if not self._stopping:
+            self._open_segment()
+
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._stopping:
+                        return
+                    self._cond.wait(self._next_wakeup())
+
+                batch = self._take_batch()
+                self._in_flight += 1
+
+            ok = True
+            try:
+                if batch.attempts >= WRITE_BEHIND_MAX_RETRIES:
+                    self._insert_each(batch.lines)
+                else:
+                    # A failed attempt may have committed some chunks
+                    self._insert(batch.lines, idempotent=batch.attempts > 0)
+            except Exception:
+                ok = False
+                logger.exception(
+                    "Write-behind batch failed, will retry",
+                    extra={"rows": len(batch.lines), "attempts": batch.attempts + 1},
+                )
+
+            with self._cond:
+                self._in_flight -= 1
+                if ok:
+                    os.remove(batch.path)
+                    os.close(batch.fd)
+                elif self._stopping:
+                    # Unlocked and left in the journal for the next start-up
+                    os.close(batch.fd)
+                else:
+                    batch.attempts += 1
+                    batch.retry_at = time.monotonic() + RETRY_SECONDS
+                    self._retry.append(batch)
+                self._cond.notify_all()
+
+    def _insert(self, lines: List[str], idempotent: bool = False):
+        """
+        Inserts records (and their summary deltas) in transactions of
+        at most `batch_size` rows. `idempotent` skips records whose ID
+        is already stored, so they are not inserted or counted twice.
+        """
+        with self.session_factory() as db:
+            for start in range(0, len(lines), self.batch_size):
+                chunk = [_to_assessment(line) for line in lines[start:start + self.batch_size]]
+                if idempotent:
+                    stored = set(db.scalars(
+                        select(PCOSAssessment.id).where(PCOSAssessment.id.in_([a.id for a in chunk]))
+                    ))
+                    chunk = [a for a in chunk if a.id not in stored]
+
+                db.add_all(chunk)
+                apply_summaries(db, chunk)
+                db.commit()
+
+    def _insert_each(self, lines: List[str]):
+        """
+        Inserts records one at a time, dead-lettering those that fail.
+        Handled records are removed from `lines`, so a transient error
+        (re-raised) resumes where it stopped on the next attempt.
+        """
+        while lines:
+            try:
+                self._insert(lines[:1], idempotent=True)
+            except TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                self._dead_letter(lines[0], e)
+            lines.pop(0)
+
+
+# Global instance (started from app.main when WRITE_BEHIND_ENABLED)
+assessment_writer = AssessmentWriter()
@@ -1,37 +1,40 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.users.user_models import User
-from app.auth.password_utils import hash_password, verify_password
+from app.auth.password_utils import hash_password_async, verify_password_async, needs_rehash
 from app.auth.jwt_utils import create_access_token
-from app.database import SessionLocal
 
-def create_user(email: str, password: str, first_name: str, last_name: str):
-    db = SessionLocal()
-
-    existing_user = db.query(User).filter(User.email == email).first()
+async def create_user(db: AsyncSession, email: str, password: str, first_name: str, last_name: str):
+    result = await db.execute(select(User).where(User.email == email))
+    existing_user = result.scalars().first()
     if existing_user:
         return None
 
     user = User(
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password_async(password),
         first_name=first_name,
         last_name=last_name
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def authenticate_user(email: str, password: str):
-    db = SessionLocal()
-    
-    user = db.query(User).filter(User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if not user:
         return None, None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None, None
-    
+
+    # Bring the stored hash up to the configured bcrypt cost
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(password)
+        await db.commit()
+
     # Generate JWT token
     token = create_access_token({"sub": str(user.id), "email": user.email})
-    return token, user
\ No newline at end of file
+    return token, user
@@ -1,23 +1,15 @@
 from fastapi import Depends, HTTPException, Header, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.auth.jwt_utils import decode_token
-from app.database import SessionLocal
+from app.auth.user_cache import decode_token_cached, load_user
+from app.database import get_async_db, AsyncSessionLocal
 from app.users.user_models import User
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_current_user(
+async def get_current_user(
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Extracts user from JWT and returns User object
@@ -29,7 +21,7 @@ def get_current_user(
         )
 
     token = authorization.replace("Bearer ", "")
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
 
     if not payload or "sub" not in payload:
         raise HTTPException(
@@ -37,7 +29,7 @@ def get_current_user(
             detail="Invalid or expired token"
         )
 
-    user = db.query(User).filter(User.id == payload["sub"]).first()
+    user = await load_user(db, payload["sub"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,9 +39,9 @@ def get_current_user(
     return user
 
 
-def get_current_user_optional(
+async def get_current_user_optional(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     Extracts user from JWT if provided, returns None if not authenticated.
@@ -64,12 +56,45 @@ def get_current_user_optional(
     token = authorization.replace("Bearer ", "")
     
     try:
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
         
         if not payload or "sub" not in payload:
             return None
 
-        user = db.query(User).filter(User.id == payload["sub"]).first()
+        user = await load_user(db, payload["sub"])
         return user
     except Exception:
         return None
+
+
+def require_role(*roles: str):
+    """
+    Dependency factory: the current user, if their role is one of `roles`.
+    """
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+        if current_user.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions"
+            )
+        return current_user
+
+    return dependency
+
+
+async def is_admin_scope(scope) -> bool:
+    """
+    Whether an ASGI request carries an admin's bearer token (for
+    middleware, which runs outside dependency injection).
+    """
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    if not authorization.startswith("Bearer "):
+        return False
+
+    payload = decode_token_cached(authorization.replace("Bearer ", ""))
+    if not payload or "sub" not in payload:
+        return False
+
+    async with AsyncSessionLocal() as db:
+        user = await load_user(db, payload["sub"])
+    return user is not None and user.role == "admin"
@@ -2,8 +2,25 @@ from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+import asyncio
 import hashlib
+import logging
+import multiprocessing as mp
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    PASSWORD_BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_PER_WORKER,
+)
+
+logger = logging.getLogger(__name__)
 
 def _prehash(password: str) -> bytes:
     """
@@ -11,12 +28,106 @@ def _prehash(password: str) -> bytes:
     """
     return hashlib.sha256(password.encode("utf-8")).digest()
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = PASSWORD_BCRYPT_ROUNDS) -> str:
     prehashed = _prehash(password)
-    hashed = bcrypt.hashpw(prehashed, bcrypt.gensalt())
-    
+    hashed = bcrypt.hashpw(prehashed, bcrypt.gensalt(rounds=rounds))
+
     return hashed.decode("utf-8")
 
 def verify_password(password: str, hash: str) -> bool:
     prehashed = _prehash(password)
-    return bcrypt.checkpw(prehashed, hash.encode("utf-8"))
\ No newline at end of file
+    return bcrypt.checkpw(prehashed, hash.encode("utf-8"))
+
+def hash_rounds(hash: str) -> int:
+    """
+    Cost factor of a bcrypt hash ("$2b$12$..." -> 12).
+    """
+    return int(hash.split("$")[2])
+
+def needs_rehash(hash: str, rounds: int = PASSWORD_BCRYPT_ROUNDS) -> bool:
+    try:
+        return hash_rounds(hash) != rounds
+    except (IndexError, ValueError):
+        return True
+
+
+# ======================================================
+# OFF-LOOP HASHING
+# ======================================================
+# bcrypt holds the CPU for ~100-300 ms per call at cost 12. Running it
+# in worker processes keeps the event loop and threadpool free, and the
+# semaphore bounds how many jobs queue up behind the workers.
+_pool = None
+_pool_lock = threading.Lock()
+# One semaphore per event loop: an asyncio.Semaphore belongs to the
+# loop it is first used on
+_slots = weakref.WeakKeyDictionary()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None and PASSWORD_HASH_WORKERS > 0:
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                # Not forkserver: that server is shared process-wide, and
+                # starting it here (at app startup) would freeze its
+                # preload list before parse_sandbox sets the parser modules
+                mp_context=mp.get_context("spawn"),
+            )
+        return _pool
+
+def _replace_broken_pool(broken):
+    """
+    A worker that dies (OOM kill, segfault) breaks the whole pool for
+    good. The first caller to notice swaps in a fresh one; callers that
+    saw the same broken pool then use that.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            logger.error("Password hash pool broken, restarting it")
+            _pool = None
+            broken.shutdown(wait=False, cancel_futures=True)
+    return _get_pool()
+
+def _get_slots():
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(max(1, PASSWORD_HASH_WORKERS) * PASSWORD_HASH_QUEUE_PER_WORKER)
+    return slots
+
+async def _run(fn, *args):
+    async with _get_slots():
+        pool = _get_pool()
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # Hashing is pure, so the call is simply retried once
+            pool = _replace_broken_pool(pool)
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+async def verify_password_async(password: str, hash: str) -> bool:
+    return await _run(verify_password, password, hash)
+
+def start_password_pool():
+    """
+    Starts the workers up front (called at app startup) so the first
+    logins do not pay for process start-up.
+    """
+    pool = _get_pool()
+    if pool is not None:
+        for future in [pool.submit(hash_rounds, "$2b$04$") for _ in range(PASSWORD_HASH_WORKERS)]:
+            future.result()
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,133 @@
+"""
+In-process caches for request authentication.
+
+- Verified JWT payloads, keyed by token, each kept until its `exp`, so
+  a repeated token skips signature verification.
+- User rows, keyed by the `sub` claim, for AUTH_USER_CACHE_TTL
+  seconds, so an authenticated request does not query `users`.
+
+Cached users are stored as column snapshots; every request gets its
+own detached User built from one, never a shared instance. ORM
+updates or deletes of a User or UserProfile evict that user once the
+session commits. Bulk UPDATE statements bypass this; call
+`invalidate_user` after them.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from cachetools import TLRUCache, TTLCache
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import AUTH_USER_CACHE_TTL, AUTH_USER_CACHE_SIZE, AUTH_TOKEN_CACHE_SIZE
+from app.auth.jwt_utils import decode_token
+from app.users.user_models import User
+from app.users.profile_models import UserProfile
+
+_lock = threading.Lock()
+
+_tokens = TLRUCache(
+    maxsize=AUTH_TOKEN_CACHE_SIZE,
+    # Expire with the token itself (`exp` is epoch seconds)
+    ttu=lambda token, payload, now: payload.get("exp", now),
+    timer=time.time,
+)
+_users = TTLCache(maxsize=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL) if AUTH_USER_CACHE_TTL > 0 else None
+
+_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+# ======================================================
+# TOKENS
+# ======================================================
+def decode_token_cached(token: str) -> Optional[dict]:
+    """
+    decode_token with verified payloads cached until they expire.
+    The returned dict is shared; do not modify it.
+    """
+    with _lock:
+        payload = _tokens.get(token)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+    if payload and "exp" in payload:
+        with _lock:
+            _tokens[token] = payload
+    return payload
+
+
+# ======================================================
+# USERS
+# ======================================================
+def _detached_user(snapshot: dict) -> User:
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_user(db, user_id: str) -> Optional[User]:
+    """
+    The User for `user_id`, from the cache when possible.
+    """
+    if _users is None:
+        return await db.get(User, user_id)
+
+    with _lock:
+        snapshot = _users.get(user_id)
+    if snapshot is not None:
+        return _detached_user(snapshot)
+
+    user = await db.get(User, user_id)
+    if user is not None:
+        with _lock:
+            _users[user_id] = {key: getattr(user, key) for key in _COLUMNS}
+    return user
+
+
+def invalidate_user(user_id):
+    if _users is None:
+        return
+    with _lock:
+        _users.pop(str(user_id), None)
+
+
+def clear():
+    with _lock:
+        _tokens.clear()
+        if _users is not None:
+            _users.clear()
+
+
+# ======================================================
+# INVALIDATION
+# ======================================================
+def _touched_user_ids(session: Session):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            yield obj.id
+        elif isinstance(obj, UserProfile):
+            yield obj.user_id
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    touched = session.info.setdefault("auth_user_changes", set())
+    for user_id in _touched_user_ids(session):
+        touched.add(user_id)
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed_users(session):
+    # Evict again: a concurrent request may have re-cached the old row
+    # between the flush and the commit
+    for user_id in session.info.pop("auth_user_changes", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_changes(session):
+    session.info.pop("auth_user_changes", None)
@@ -0,0 +1,219 @@
+# app/core/admission.py
+
+"""
+Admission control for /api/pcos/predict.
+
+At most PREDICT_MAX_CONCURRENCY predictions run at once per worker.
+Up to PREDICT_QUEUE_SIZE more wait for a slot, in arrival order.
+Anything beyond that is refused straight away with 503 and a
+Retry-After estimated from recent service times. So is a request
+that waited PREDICT_QUEUE_TIMEOUT_SECONDS without getting a slot.
+Admitted requests therefore see a bounded wait plus their own
+service time, however much traffic arrives.
+
+- Priority lane (PREDICT_PRIORITY_AUTHENTICATED): waiting
+  authenticated users get free slots before anonymous requests.
+- Per-user cap (PREDICT_MAX_PER_USER): one user's running + queued
+  predictions; beyond it the user gets 429.
+
+A slot is held until the prediction's worker thread finishes, not
+until the request ends: a thread keeps running after its client
+disconnects, and the limit must count it (see `run`).
+
+State is per worker process and lives on the event loop, so no
+locking is needed.
+"""
+
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core import cpu_budget
+from app.core.config import (
+    PREDICT_MAX_CONCURRENCY,
+    PREDICT_QUEUE_SIZE,
+    PREDICT_QUEUE_TIMEOUT_SECONDS,
+    PREDICT_PRIORITY_AUTHENTICATED,
+    PREDICT_MAX_PER_USER,
+)
+from app.core.metrics import PREDICT_QUEUED, PREDICT_RUNNING, record_queue_wait, record_rejection
+
+LANES = ("priority", "standard")  # slots go to the priority lane first
+
+
+class _Slot:
+    """
+    Yielded by `admit`. `hold_until(future)` keeps the slot (and the
+    user's count) past the end of the `async with` until `future` is done.
+    """
+
+    def __init__(self):
+        self.until = None
+
+    def hold_until(self, future):
+        self.until = future
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int = PREDICT_MAX_CONCURRENCY,
+        queue_size: int = PREDICT_QUEUE_SIZE,
+        queue_timeout: float = PREDICT_QUEUE_TIMEOUT_SECONDS,
+        priority_lane: bool = PREDICT_PRIORITY_AUTHENTICATED,
+        max_per_user: int = PREDICT_MAX_PER_USER,
+    ):
+        self._max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.priority_lane = priority_lane
+        self.max_per_user = max_per_user
+
+        self.running = 0
+        self._waiters = {lane: deque() for lane in LANES}
+        self._per_user = Counter()
+        self._service_seconds = 1.0  # moving average, for Retry-After
+
+    @property
+    def max_concurrency(self) -> int:
+        # 0: as many predictions as fit in the CPUs at the thread budget.
+        # Resolved late so app.server workers see their own CPU slice.
+        if self._max_concurrency <= 0:
+            budget = max(1, cpu_budget.threads("tensorflow"))
+            self._max_concurrency = max(1, cpu_budget.available_cpus() // budget)
+        return self._max_concurrency
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a slot is likely free for a new request.
+        """
+        ahead = self.queued + 1
+        return max(1, math.ceil(self._service_seconds * ahead / self.max_concurrency))
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        record_rejection(reason)
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    # ------------------------------------------------------
+    # SLOTS
+    # ------------------------------------------------------
+    def _grant_waiting(self):
+        # Hands free slots to waiters; `running` counts them from here
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self.running < self.max_concurrency:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    self.running += 1
+
+    def _release(self, held_seconds: float):
+        self.running -= 1
+        self._service_seconds = 0.8 * self._service_seconds + 0.2 * held_seconds
+        self._grant_waiting()
+        self._update_gauges()
+
+    def _update_gauges(self):
+        PREDICT_QUEUED.set(self.queued)
+        PREDICT_RUNNING.set(self.running)
+
+    async def _wait_for_slot(self, lane: str):
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        self._update_gauges()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away; give back a slot granted in the meantime
+            if waiter.done():
+                self._release(0.0)
+            else:
+                waiter.cancel()
+                self._waiters[lane].remove(waiter)
+            raise
+        finally:
+            self._update_gauges()
+
+        if not waiter.done():
+            self._waiters[lane].remove(waiter)
+            waiter.cancel()
+            self._update_gauges()
+            self._reject(503, "queue_timeout", "Prediction service is busy, please retry")
+
+    @asynccontextmanager
+    async def admit(self, user_key: Optional[str] = None, priority: bool = False):
+        """
+        Holds a prediction slot for the body of the `async with` (or
+        longer, see `_Slot.hold_until`).
+        Raises 503 (queue full / wait timed out) or 429 (user cap).
+        """
+        if user_key is not None and self.max_per_user and self._per_user[user_key] >= self.max_per_user:
+            self._reject(429, "user_cap", "Too many predictions in progress for this user")
+
+        if user_key is not None:
+            self._per_user[user_key] += 1
+        slot = _Slot()
+        admitted = None
+        try:
+            lane = "priority" if priority and self.priority_lane else "standard"
+            start = time.perf_counter()
+
+            if self.running < self.max_concurrency and not self.queued:
+                self.running += 1
+                self._update_gauges()
+            else:
+                if self.queued >= self.queue_size:
+                    self._reject(503, "queue_full", "Prediction service is busy, please retry")
+                await self._wait_for_slot(lane)
+
+            admitted = time.perf_counter()
+            record_queue_wait(lane, admitted - start)
+            yield slot
+        finally:
+            def release(_=None):
+                if admitted is not None:
+                    self._release(time.perf_counter() - admitted)
+                if user_key is not None:
+                    self._per_user[user_key] -= 1
+                    if not self._per_user[user_key]:
+                        del self._per_user[user_key]
+
+            if slot.until is not None and not slot.until.done():
+                # Done callbacks run on the event loop, like everything else here
+                slot.until.add_done_callback(release)
+            else:
+                release()
+
+    async def run(self, fn, *args, user_key: Optional[str] = None, priority: bool = False):
+        """
+        Runs `fn(*args)` in the threadpool under a slot. If the request
+        is cancelled (client gone) the thread cannot be stopped, so the
+        slot is released when the thread finishes rather than at once.
+        """
+        async with self.admit(user_key=user_key, priority=priority) as slot:
+            work = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            try:
+                return await asyncio.shield(work)
+            except asyncio.CancelledError:
+                # Nobody awaits it any more; retrieve its outcome so a
+                # failure is not reported as never retrieved
+                work.add_done_callback(lambda done: done.cancelled() or done.exception())
+                slot.hold_until(work)
+                raise
+
+
+predict_admission = AdmissionController()
@@ -1,5 +1,6 @@
 # app/core/config.py
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -8,3 +9,231 @@ MODEL_DIR = BASE_DIR / "models"
 
 TABULAR_MODEL_PATH = MODEL_DIR / "catboost_tabular_final.cbm"
 ULTRASOUND_MODEL_PATH = MODEL_DIR / "ultrasound_catboost_combined.cbm"
+
+# ==================================================
+# SUBSYSTEMS
+# ==================================================
+# Routers (and their heavy dependencies) served by this process:
+#   auth        /api/auth, /api/profile
+#   assessments /api/assessments
+#   prediction  /api/pcos/predict; loads TensorFlow, Torch, CatBoost and Gemini at startup
+#   documents   /api/document, /api/pcos/parse-document
+# e.g. ENABLED_SUBSYSTEMS=auth for an auth-only worker
+SUBSYSTEMS = ("auth", "assessments", "prediction", "documents")
+ENABLED_SUBSYSTEMS = {
+    name.strip().lower()
+    for name in os.getenv("ENABLED_SUBSYSTEMS", ",".join(SUBSYSTEMS)).split(",")
+    if name.strip()
+}
+if ENABLED_SUBSYSTEMS - set(SUBSYSTEMS):
+    raise ValueError(
+        f"Unknown ENABLED_SUBSYSTEMS: {', '.join(sorted(ENABLED_SUBSYSTEMS - set(SUBSYSTEMS)))}"
+    )
+
+# ==================================================
+# DOCUMENT PARSING
+# ==================================================
+# Streaming parse stops once every registry field reaches this confidence
+PARSE_CONFIDENCE_THRESHOLD = float(os.getenv("PARSE_CONFIDENCE_THRESHOLD", "0.8"))
+
+# Streaming parse never reads more than this many pages (0 = no limit)
+PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "10"))
+
+# Parse worker budgets (see app/services/parse_sandbox.py)
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+PARSE_MAX_RSS_MB = int(os.getenv("PARSE_MAX_RSS_MB", "1024"))
+PARSE_WORKER_MAX_PAGES = int(os.getenv("PARSE_WORKER_MAX_PAGES", "50"))
+PARSE_WORKER_START_METHOD = os.getenv(
+    "PARSE_WORKER_START_METHOD",
+    "forkserver" if os.name == "posix" else "spawn"
+)
+
+# OCR (scanned PDFs and images)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+
+# Parse-result cache (in-memory LRU + SQLite; empty path disables SQLite).
+# Entries hold the fields extracted from patient documents: keep the
+# SQLite file on private (ideally encrypted) storage. It is created
+# owner-only (0600).
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "512"))
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", str(BASE_DIR / "parse_cache.db"))
+# SQLite tier bounds, enforced on insert (0 = unbounded)
+PARSE_CACHE_DB_MAX_ROWS = int(os.getenv("PARSE_CACHE_DB_MAX_ROWS", "10000"))
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Bulk ingestion (/api/document/bulk)
+BULK_PARSE_CONCURRENCY = int(os.getenv("BULK_PARSE_CONCURRENCY", "4"))
+
+# ==================================================
+# UPLOADS (see app/utils/uploads.py)
+# ==================================================
+UPLOAD_MAX_IMAGE_MB = int(os.getenv("UPLOAD_MAX_IMAGE_MB", "20"))
+UPLOAD_MAX_DOCUMENT_MB = int(os.getenv("UPLOAD_MAX_DOCUMENT_MB", "25"))
+
+# Whole request bodies, enforced before Starlette spools them
+# (the slack covers multipart framing and form fields)
+UPLOAD_MAX_BODY_MB = int(os.getenv(
+    "UPLOAD_MAX_BODY_MB", str(max(UPLOAD_MAX_IMAGE_MB, UPLOAD_MAX_DOCUMENT_MB) + 1)
+))
+BULK_MAX_BODY_MB = int(os.getenv("BULK_MAX_BODY_MB", "1024"))
+
+# Uploads larger than this are spooled to a temp file instead of memory
+UPLOAD_SPOOL_THRESHOLD_MB = int(os.getenv("UPLOAD_SPOOL_THRESHOLD_MB", "2"))
+UPLOAD_CHUNK_KB = int(os.getenv("UPLOAD_CHUNK_KB", "64"))
+
+# Early rejection of implausible images (decompression bombs, thumbnails)
+IMAGE_MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "32"))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+
+# ==================================================
+# DATABASE (see app/database.py)
+# ==================================================
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pcos.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# SQLite tuning, applied on every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# ==================================================
+# ASSESSMENT WRITE-BEHIND (see app/assessments/write_behind.py)
+# ==================================================
+# When enabled, predictions are journaled and inserted in batches by a
+# background writer instead of committing inside the request
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+WRITE_BEHIND_SPILL_DIR = os.getenv("WRITE_BEHIND_SPILL_DIR", str(BASE_DIR / "write_behind"))
+
+# fsync each journal append (off: survives a process crash, not power loss)
+WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "true").lower() == "true"
+# Failed attempts before a batch is inserted record by record and the
+# records that still fail are dead-lettered
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))
+
+# ==================================================
+# ARTIFACT BLOB STORE (see app/storage/blob_store.py)
+# ==================================================
+# Ultrasounds and Grad-CAM heatmaps, stored by content hash
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", str(BASE_DIR / "blobs"))
+
+# ==================================================
+# PROMOTED CLINICAL FIELDS (see app/assessments/promoted_fields.py)
+# ==================================================
+# tabular_data fields copied into typed, indexed columns for cohort queries
+PROMOTED_FIELDS = [
+    name.strip()
+    for name in os.getenv("PROMOTED_FIELDS", "amh,bmi,lh_fsh_ratio,cycle_regular").split(",")
+    if name.strip()
+]
+
+# ==================================================
+# ASSESSMENT EXPORTS (see app/assessments/export_service.py)
+# ==================================================
+# An export's upper bound trails "now" by this much, so rows flushed
+# just before it have committed by the time the export reads them
+EXPORT_SETTLE_SECONDS = float(os.getenv("EXPORT_SETTLE_SECONDS", "30"))
+
+# ==================================================
+# AUTH CACHES (see app/auth/user_cache.py)
+# ==================================================
+# Authenticated users are cached per process for up to this many
+# seconds (0 disables). Updates invalidate the local entry; other
+# worker processes see them once their entry expires.
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+# Verified JWT payloads, each kept until its own `exp`
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+# ==================================================
+# PASSWORD HASHING (see app/auth/password_utils.py)
+# ==================================================
+# bcrypt cost; stored hashes with a different cost are re-hashed on the
+# next successful login
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+# Worker processes for hashing / verification (0 = threadpool instead)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs allowed in flight per worker; further requests wait
+PASSWORD_HASH_QUEUE_PER_WORKER = int(os.getenv("PASSWORD_HASH_QUEUE_PER_WORKER", "4"))
+
+# ==================================================
+# LOGGING (see app/core/logging_setup.py)
+# ==================================================
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. "app.api.pcos=DEBUG,app.services.gradcam_service=WARNING"
+LOG_LEVELS = {
+    name.strip(): level.strip().upper()
+    for name, _, level in (
+        item.partition("=") for item in os.getenv("LOG_LEVELS", "").split(",") if "=" in item
+    )
+}
+# "json" for aggregation, "text" for local development
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of predictions whose per-model probabilities are logged at DEBUG
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+# ==================================================
+# REQUEST PROFILING (see app/core/profiling.py)
+# ==================================================
+# Folded-stack profiles (flamegraph.pl / speedscope input)
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Fraction of all requests profiled into the per-process aggregate
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Individual profiles kept on disk; older ones are deleted
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "100"))
+
+# ==================================================
+# MODEL WARM-UP (see app/core/warmup.py)
+# ==================================================
+# Synthetic passes through every model at startup; /ready answers 503
+# until they are done (off: ready as soon as the models are loaded)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "2"))
+
+# ==================================================
+# SERVER (python -m app.server, see app/server.py)
+# ==================================================
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Pin each worker to its own slice of the CPUs, with TF / Torch intra-op
+# threads sized to the slice
+SERVER_CPU_AFFINITY = os.getenv("SERVER_CPU_AFFINITY", "true").lower() == "true"
+
+# ==================================================
+# CPU THREAD BUDGET (see app/core/cpu_budget.py)
+# ==================================================
+# Compute threads per worker for TensorFlow, Torch, CatBoost, OpenCV and
+# BLAS (0 = the CPUs the worker may run on)
+CPU_THREADS = int(os.getenv("CPU_THREADS", "0"))
+# TF / Torch inter-op threads; the models are single chains of ops
+CPU_INTER_OP_THREADS = int(os.getenv("CPU_INTER_OP_THREADS", "1"))
+# Per-library overrides, e.g. "opencv=1,catboost=2"
+CPU_THREADS_OVERRIDES = {
+    name.strip().lower(): int(count)
+    for name, _, count in (
+        item.partition("=") for item in os.getenv("CPU_THREADS_OVERRIDES", "").split(",") if "=" in item
+    )
+}
+
+# ==================================================
+# PREDICT ADMISSION CONTROL (see app/core/admission.py)
+# ==================================================
+# Predictions running at once per worker (0 = CPUs / CPU thread budget)
+PREDICT_MAX_CONCURRENCY = int(os.getenv("PREDICT_MAX_CONCURRENCY", "0"))
+# Requests allowed to wait for a slot; more get 503 + Retry-After
+PREDICT_QUEUE_SIZE = int(os.getenv("PREDICT_QUEUE_SIZE", "8"))
+# Longest wait for a slot before answering 503
+PREDICT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PREDICT_QUEUE_TIMEOUT_SECONDS", "10"))
+# Waiting authenticated users are admitted before anonymous requests
+PREDICT_PRIORITY_AUTHENTICATED = os.getenv("PREDICT_PRIORITY_AUTHENTICATED", "false").lower() == "true"
+# Running + queued predictions per user (0 = no cap); more get 429
+PREDICT_MAX_PER_USER = int(os.getenv("PREDICT_MAX_PER_USER", "2"))
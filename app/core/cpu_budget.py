@@ -0,0 +1,110 @@
+# app/core/cpu_budget.py
+
+"""
+One CPU thread budget per worker process, shared out to every library
+on the prediction path that runs its own thread pool:
+
+  tensorflow  ResNet50 feature extractor (intra-op / inter-op pools)
+  torch       Grad-CAM (OpenMP intra-op / inter-op pools)
+  catboost    expert and ultrasound models (thread_count per call)
+  opencv      image decode / resize / colour maps
+  blas        numpy / scikit-learn BLAS and OpenMP (threadpoolctl)
+
+Left alone, each sizes itself to every core of the machine (not the
+CPUs the worker is pinned to), so a few concurrent requests run many
+times more threads than cores.
+
+CPU_THREADS is the budget (default: the CPUs this process may run
+on, i.e. its app.server slice). Each library gets the whole budget
+for its intra-op work, because the stages of one prediction run one
+after the other. CPU_THREADS_OVERRIDES sets single libraries, e.g.
+"opencv=1,catboost=2". Pools are sized once, so `apply` runs at
+worker startup, before TensorFlow builds the CNN.
+
+scripts/bench_cpu_budget.py sweeps budgets against concurrency.
+"""
+
+import logging
+import os
+import sys
+
+from app.core.config import CPU_THREADS, CPU_INTER_OP_THREADS, CPU_THREADS_OVERRIDES
+
+logger = logging.getLogger(__name__)
+
+LIBRARIES = ("tensorflow", "torch", "catboost", "opencv", "blas")
+
+_applied = {}
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan(budget: int = None) -> dict:
+    """
+    Threads per library for `budget` (CPU_THREADS if None).
+    """
+    budget = max(1, budget or CPU_THREADS or available_cpus())
+    threads = {library: budget for library in LIBRARIES}
+    threads.update({
+        library: max(1, count)
+        for library, count in CPU_THREADS_OVERRIDES.items()
+        if library in threads
+    })
+    threads["inter_op"] = max(1, CPU_INTER_OP_THREADS)
+    return threads
+
+
+def threads(library: str) -> int:
+    """
+    Applied thread count for `library`; -1 (library default) before
+    `apply` has run, e.g. in scripts.
+    """
+    return _applied.get(library, -1)
+
+
+def apply(budget: int = None) -> dict:
+    """
+    Sizes the pools of every library that is already imported and sets
+    the environment for any loaded later. Returns the plan.
+    """
+    threads_by_library = plan(budget)
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads_by_library["blas"])
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads_by_library["tensorflow"])
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(threads_by_library["inter_op"])
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads_by_library["blas"])
+    except ImportError:
+        pass  # optional; the environment covers libraries loaded later
+
+    if "tensorflow" in sys.modules:
+        tf = sys.modules["tensorflow"]
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads_by_library["tensorflow"])
+            tf.config.threading.set_inter_op_parallelism_threads(threads_by_library["inter_op"])
+        except RuntimeError:
+            # Runtime already started; its pools keep their size
+            logger.warning("TensorFlow already initialised; thread budget not applied to it")
+
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch.set_num_threads(threads_by_library["torch"])
+        try:
+            torch.set_num_interop_threads(threads_by_library["inter_op"])
+        except RuntimeError:
+            pass  # can only be set once, before any inter-op work
+
+    if "cv2" in sys.modules:
+        sys.modules["cv2"].setNumThreads(threads_by_library["opencv"])
+
+    _applied.clear()
+    _applied.update(threads_by_library)
+    logger.info("CPU thread budget applied", extra={"cpus": available_cpus(), "threads": threads_by_library})
+    return threads_by_library
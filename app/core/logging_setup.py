@@ -0,0 +1,167 @@
+# app/core/logging_setup.py
+
+"""
+Structured, non-blocking logging.
+
+Request threads only put records on an in-memory queue (QueueHandler);
+a background QueueListener formats them as one JSON object per line
+and writes them to stdout. Every record carries the request ID of the
+request that produced it, set by RequestIdMiddleware (taken from the
+X-Request-ID header or generated) and propagated through contextvars,
+including into threadpool work.
+
+Levels: LOG_LEVEL for everything, LOG_LEVELS for per-module overrides.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.core.config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps the current request ID on the record. Runs in the calling
+    thread, before the record is queued.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler.prepare() formats the record on the calling thread and
+    folds the traceback into the message (clearing exc_info). This one
+    only resolves the message arguments on a copy of the record, so the
+    listener does the formatting and JSON keeps `exc` as its own field.
+    Records never leave the process, so exc_info needs no pickling.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # Arguments may be mutated after the call returns
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging():
+    """
+    Installs the queue handler on the root logger and starts the
+    listener. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for name, level in LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(); workers forked by
+    # app.server start their own
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: binds a request ID for the duration of each HTTP
+    request and echoes it in the X-Request-ID response header.
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == self.header),
+            None,
+        ) or uuid.uuid4().hex
+        token = request_id_var.set(request_id[:128])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(self.header, request_id_var.get().encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,166 @@
+# app/core/metrics.py
+
+"""
+Prometheus metrics for the prediction pipeline.
+
+Each stage of /api/pcos/predict is timed into one histogram labelled
+by stage; rejections and fallbacks are counters. Recording is a
+perf_counter pair plus a histogram observe (a few microseconds).
+
+Multi-process deployments (gunicorn / uvicorn --workers): set
+PROMETHEUS_MULTIPROC_DIR to an empty, writable directory before the
+workers start. Each process then writes its samples there and
+/metrics aggregates all of them.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.profiling import track_current_thread, untrack
+
+# ======================================================
+# METRICS
+# ======================================================
+STAGES = (
+    "upload_read",
+    "image_decode",
+    "lbp",
+    "cnn_forward",
+    "expert_catboost",
+    "meta_learner",
+    "ultrasound_catboost",
+    "gradcam",
+    "gemini",
+    "artifact_store",
+    "db_save",
+)
+
+# Model stages run in milliseconds, Gemini in seconds
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+PREDICT_STAGE_SECONDS = Histogram(
+    "pcos_predict_stage_seconds",
+    "Time spent in each stage of /api/pcos/predict",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+INSUFFICIENT_DATA = Counter(
+    "pcos_predict_insufficient_data_total",
+    "Predictions rejected for insufficient clinical data",
+    ["gate"],  # request: required-field check, model: sufficiency gate
+)
+FALLBACKS = Counter(
+    "pcos_predict_fallbacks_total",
+    "Pipeline steps that failed and fell back",
+    ["step"],  # gradcam, recommendations, artifact_store, db_save
+)
+
+# Admission control (app/core/admission.py)
+PREDICT_QUEUE_WAIT_SECONDS = Histogram(
+    "pcos_predict_queue_wait_seconds",
+    "Time /api/pcos/predict requests waited for an admission slot",
+    ["lane"],  # priority (authenticated) or standard
+    buckets=_BUCKETS,
+)
+PREDICT_REJECTED = Counter(
+    "pcos_predict_rejected_total",
+    "Predictions turned away by admission control",
+    ["reason"],  # queue_full, queue_timeout, user_cap
+)
+PREDICT_QUEUED = Gauge(
+    "pcos_predict_queued",
+    "Predictions waiting for an admission slot",
+    multiprocess_mode="livesum",
+)
+PREDICT_RUNNING = Gauge(
+    "pcos_predict_running",
+    "Predictions holding an admission slot",
+    multiprocess_mode="livesum",
+)
+
+# Write-behind (app/assessments/write_behind.py)
+WRITE_BEHIND_DEAD_LETTERS = Counter(
+    "pcos_write_behind_dead_letters_total",
+    "Journaled assessments that could not be inserted and were dead-lettered",
+)
+
+# Label lookups are cached; .labels() per call is the slow part
+_stage_children = {name: PREDICT_STAGE_SECONDS.labels(name) for name in STAGES}
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times the block into pcos_predict_stage_seconds{stage=name}, and
+    adds the thread to the request's profile if one is running.
+    """
+    start = time.perf_counter()
+    tracked = track_current_thread()
+    try:
+        yield
+    finally:
+        if tracked:
+            untrack(tracked)
+        child = _stage_children.get(name) or PREDICT_STAGE_SECONDS.labels(name)
+        child.observe(time.perf_counter() - start)
+
+
+def record_fallback(step: str):
+    FALLBACKS.labels(step).inc()
+
+
+def record_insufficient_data(gate: str):
+    INSUFFICIENT_DATA.labels(gate).inc()
+
+
+def record_queue_wait(lane: str, seconds: float):
+    PREDICT_QUEUE_WAIT_SECONDS.labels(lane).observe(seconds)
+
+
+def record_rejection(reason: str):
+    PREDICT_REJECTED.labels(reason).inc()
+
+
+def record_dead_letter():
+    WRITE_BEHIND_DEAD_LETTERS.inc()
+
+
+# ======================================================
+# EXPOSITION
+# ======================================================
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics():
+    """
+    (body, content type) for /metrics, aggregated across worker
+    processes in multi-process mode.
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int = None):
+    """
+    Drops a finished worker's live gauges (multi-process mode); call
+    from the process manager's child-exit hook or on shutdown.
+    """
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid or os.getpid())
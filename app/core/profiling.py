@@ -0,0 +1,290 @@
+# app/core/profiling.py
+
+"""
+Sampling profiler for individual requests.
+
+A profiled request registers the threads doing its work: the event
+loop thread for the whole request, plus every thread that enters a
+pipeline `stage()` (model calls in the threadpool). A background
+thread samples the stacks of registered threads every
+PROFILE_INTERVAL_MS and counts them as folded stacks
+("outer;inner;leaf count"). flamegraph.pl, inferno and speedscope all
+read that format.
+
+- On demand: an admin sends `X-Profile: 1` (or `?profile=1`). The
+  profile is written to PROFILE_DIR/<id>.folded, and the id is
+  returned in the X-Profile-Id response header.
+- Continuous: a PROFILE_SAMPLE_RATE fraction of requests is profiled
+  into the per-process aggregate PROFILE_DIR/aggregate-<pid>.folded.
+
+The event loop thread is shared, so samples taken there while other
+requests are in flight are attributed to the profiled one too.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_SAMPLE_RATE, PROFILE_MAX_STORED
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self, path: str, store: bool):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.store = store  # individual file (on demand) vs aggregate only
+        self.started = time.time()
+        self.duration = None
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads = {}  # thread id -> nesting depth
+        self._lock = threading.Lock()
+
+    def add_thread(self, tid: int):
+        with self._lock:
+            self._threads[tid] = self._threads.get(tid, 0) + 1
+
+    def remove_thread(self, tid: int):
+        with self._lock:
+            depth = self._threads.get(tid, 0) - 1
+            if depth > 0:
+                self._threads[tid] = depth
+            else:
+                self._threads.pop(tid, None)
+
+    def thread_ids(self):
+        with self._lock:
+            return list(self._threads)
+
+
+# ======================================================
+# SAMPLER
+# ======================================================
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    parts = Path(code.co_filename).parts
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """
+    One daemon thread that samples every active profile and writes
+    finished ones to disk (so no file I/O happens on request threads).
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.directory = Path(directory)
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._active = set()
+        self._finished = []
+        self._aggregate = Counter()
+        self._thread = None
+        self._wake = threading.Event()
+
+    def begin(self, profile: RequestProfile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self, profile: RequestProfile):
+        profile.duration = time.time() - profile.started
+        with self._lock:
+            self._active.discard(profile)
+            self._finished.append(profile)
+        self._wake.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            # Cleared before the snapshot so a begin() racing with it
+            # still wakes the wait below
+            self._wake.clear()
+            with self._lock:
+                active = list(self._active)
+                finished, self._finished = self._finished, []
+
+            for profile in finished:
+                self._write(profile)
+
+            if not active:
+                # Idle until the next profiled request
+                if not self._wake.wait(timeout=30):
+                    with self._lock:
+                        if not self._active and not self._finished:
+                            self._thread = None
+                            return
+                continue
+
+            frames = sys._current_frames()
+            for profile in active:
+                for tid in profile.thread_ids():
+                    frame = frames.get(tid)
+                    if frame is not None and tid != own:
+                        profile.stacks[_fold(frame)] += 1
+                        profile.samples += 1
+            del frames
+
+            time.sleep(self.interval)
+
+    # ------------------------------------------------------
+    # OUTPUT
+    # ------------------------------------------------------
+    def _write(self, profile: RequestProfile):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if not profile.store:
+                self._aggregate.update(profile.stacks)
+                _write_folded(self.directory / f"aggregate-{os.getpid()}.folded", self._aggregate)
+            else:
+                _write_folded(self.directory / f"{profile.id}.folded", profile.stacks)
+                meta = {
+                    "id": profile.id,
+                    "path": profile.path,
+                    "started": profile.started,
+                    "duration_seconds": round(profile.duration, 4),
+                    "samples": profile.samples,
+                    "interval_ms": self.interval * 1000,
+                }
+                (self.directory / f"{profile.id}.json").write_text(json.dumps(meta))
+                self._prune()
+        except OSError:
+            pass  # profiling must never take the app down
+
+    def _prune(self):
+        stored = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for meta in stored[:max(0, len(stored) - PROFILE_MAX_STORED)]:
+            meta.unlink(missing_ok=True)
+            meta.with_suffix(".folded").unlink(missing_ok=True)
+
+    # ------------------------------------------------------
+    # RETRIEVAL
+    # ------------------------------------------------------
+    def list_profiles(self):
+        if not self.directory.exists():
+            return []
+        stored = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [json.loads(meta.read_text()) for meta in stored]
+
+    def read_profile(self, profile_id: str) -> Optional[str]:
+        if not profile_id.isalnum():
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        return path.read_text() if path.exists() else None
+
+    def read_aggregate(self) -> str:
+        """
+        Aggregate of every process's sampled requests.
+        """
+        total = Counter()
+        for path in self.directory.glob("aggregate-*.folded"):
+            for line in path.read_text().splitlines():
+                stack, _, count = line.rpartition(" ")
+                if stack:
+                    total[stack] += int(count)
+        return _format_folded(total)
+
+
+def _format_folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _write_folded(path: Path, stacks: Counter):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(_format_folded(stacks))
+    os.replace(tmp, path)
+
+
+sampler = Sampler()
+
+
+# ======================================================
+# THREAD REGISTRATION (used by app.core.metrics.stage)
+# ======================================================
+def track_current_thread():
+    """
+    Registers the calling thread with the active profile, if any.
+    Returns a token for `untrack`, or None (the common, cheap case).
+    """
+    profile = _current.get()
+    if profile is None:
+        return None
+    tid = threading.get_ident()
+    profile.add_thread(tid)
+    return profile, tid
+
+
+def untrack(token):
+    profile, tid = token
+    profile.remove_thread(tid)
+
+
+# ======================================================
+# MIDDLEWARE
+# ======================================================
+class ProfilingMiddleware:
+    """
+    ASGI middleware starting a profile for requests that ask for one
+    (admins only, checked by `is_admin`) or are picked by
+    PROFILE_SAMPLE_RATE.
+    """
+
+    def __init__(self, app, is_admin=None, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.is_admin = is_admin
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value in (b"1", b"true")
+        return b"profile=1" in scope.get("query_string", b"").split(b"&")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        on_demand = self._requested(scope) and self.is_admin is not None and await self.is_admin(scope)
+        if not on_demand and not (self.sample_rate and random.random() < self.sample_rate):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["path"], store=on_demand)
+        profile.add_thread(threading.get_ident())
+        token = _current.set(profile)
+        sampler.begin(profile)
+
+        async def send_with_id(message):
+            if on_demand and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current.reset(token)
+            sampler.end(profile)
@@ -1,15 +1,32 @@
 # app/core/startup.py
 
-from app.models.tabular_model import load_tabular_model
-from app.models.ultrasound_model import load_ultrasound_model
-from app.models.cnn_feature_extractor import load_cnn_model
+import logging
+
+from app.core import cpu_budget
+
+logger = logging.getLogger(__name__)
+
+def preload_models():
+    """
+    Imports the model services, loading every model that is safe to
+    share across fork() (CatBoost, the meta learner, Torch Grad-CAM).
+    Called by app.server in the master, before forking the workers.
+    """
+    from app.services import multimodal_service, gradcam_service, recommendation_service  # noqa: F401
+    return multimodal_service
 
 def startup_event():
-    print("🔄 Loading ML models at startup...")
-    tabular_model = load_tabular_model()
-    print(tabular_model)
-    ultrasound_model = load_ultrasound_model()
-    print(ultrasound_model)
-    cnn_model = load_cnn_model()
-    print(cnn_model)
-    print("✅ All ML models loaded")
\ No newline at end of file
+    """
+    Loads the prediction models. Only called when the prediction
+    subsystem is enabled; nothing at module level imports the model
+    services, so other workers never load TensorFlow / Torch / CatBoost.
+    Warm-up follows (app.core.warmup).
+    """
+    logger.info("Loading ML models at startup...")
+    # Already loaded in the master when launched through app.server;
+    # the TensorFlow CNN is always built here, in the worker
+    multimodal_service = preload_models()
+    # After the imports, before TensorFlow starts its pools (CNN build)
+    cpu_budget.apply()
+    multimodal_service.load_cnn_model()
+    logger.info("All ML models loaded")
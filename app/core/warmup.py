@@ -0,0 +1,154 @@
+# app/core/warmup.py
+
+"""
+Model load / warm-up status and the startup warm-up pass.
+
+Loading a model is not enough for steady-state latency: the first
+TensorFlow predict traces and builds the graph, the first CatBoost
+predict initialises its evaluator and the first Torch forward/backward
+allocates and selects kernels. The services record their model loads
+here (`loading`) and register a warm-up callable per model
+(`register_warmup`) that runs synthetic input through the same code
+path real requests use.
+
+At startup `start_warmup` runs every warm-up WARMUP_ITERATIONS times
+in a background thread, so /health answers straight away while
+/ready returns 503 until every required model is loaded and warm.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from app.core.config import WARMUP_ENABLED, WARMUP_ITERATIONS
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_models = {}  # name -> status dict, in registration order
+_warmers = {}  # name -> callable
+_phase = "loading"  # loading -> warming -> ready | failed
+_warmup_seconds = None
+
+
+def _status(name: str, required: bool = True) -> dict:
+    if name not in _models:
+        _models[name] = {
+            "required": required,
+            "loaded": False,
+            "load_seconds": None,
+            "warmed": False,
+            "first_pass_seconds": None,
+            "steady_pass_seconds": None,
+            "error": None,
+        }
+    return _models[name]
+
+
+# ======================================================
+# REGISTRATION (called by the services at import time)
+# ======================================================
+@contextmanager
+def loading(name: str, required: bool = True):
+    """
+    Times a model load. A failed load is recorded and re-raised.
+    Optional models (required=False) don't hold back readiness.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        with _lock:
+            _status(name, required)["error"] = f"load failed: {e}"
+        raise
+    with _lock:
+        status = _status(name, required)
+        status["loaded"] = True
+        status["load_seconds"] = round(time.perf_counter() - start, 4)
+
+
+def register_warmup(name: str, warm):
+    """
+    `warm()` runs one synthetic pass through the model.
+    """
+    with _lock:
+        _warmers[name] = warm
+
+
+# ======================================================
+# WARM-UP
+# ======================================================
+def run_warmup(iterations: int = WARMUP_ITERATIONS):
+    """
+    Runs every registered warm-up `iterations` times. The first pass
+    pays the one-off costs; the last one shows the steady state.
+    """
+    global _phase, _warmup_seconds
+    with _lock:
+        _phase = "warming"
+        warmers = list(_warmers.items())
+
+    start = time.perf_counter()
+    for name, warm in warmers:
+        timings = []
+        error = None
+        try:
+            for _ in range(max(1, iterations)):
+                pass_start = time.perf_counter()
+                warm()
+                timings.append(time.perf_counter() - pass_start)
+        except Exception as e:
+            error = f"warm-up failed: {e}"
+            logger.exception("Warm-up failed for %s", name)
+
+        with _lock:
+            status = _status(name)
+            status["warmed"] = error is None
+            status["error"] = error or status["error"]
+            if timings:
+                status["first_pass_seconds"] = round(timings[0], 4)
+                status["steady_pass_seconds"] = round(timings[-1], 4)
+        logger.info("Warmed %s", name, extra={"model": name, "passes": [round(t, 4) for t in timings]})
+
+    with _lock:
+        _warmup_seconds = round(time.perf_counter() - start, 4)
+        _phase = "ready" if _all_required(("loaded", "warmed")) else "failed"
+    logger.info("Model warm-up finished", extra={"phase": _phase, "seconds": _warmup_seconds})
+
+
+def start_warmup():
+    """
+    Startup hook: warms the models in a background thread, or just
+    marks them ready once loaded when WARMUP_ENABLED is off.
+    """
+    global _phase
+    if not WARMUP_ENABLED:
+        with _lock:
+            _phase = "ready" if _all_required(("loaded",)) else "failed"
+        return
+    threading.Thread(target=run_warmup, name="model-warmup", daemon=True).start()
+
+
+def _all_required(flags) -> bool:
+    return all(
+        all(status[flag] for flag in flags)
+        for status in _models.values()
+        if status["required"]
+    )
+
+
+# ======================================================
+# READINESS
+# ======================================================
+def readiness():
+    """
+    (ready, report) for /ready.
+    """
+    with _lock:
+        report = {
+            "status": _phase,
+            "warmup_seconds": _warmup_seconds,
+            "models": {name: dict(status) for name, status in _models.items()},
+        }
+    return _phase == "ready", report
@@ -1,13 +1,127 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-DATABASE_URL = "sqlite:///./pcos.db"
-
-engine = create_engine(
+from app.core.config import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False} 
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_ECHO,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
 )
 
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets history reads proceed while an assessment commit is in
+    flight; NORMAL sync is safe under WAL and skips an fsync per commit.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+# Async drivers for the sync URLs in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    if scheme in ASYNC_DRIVERS.values():
+        return url
+    base = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(base, scheme)}://{rest}"
+
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs = {"echo": DB_ECHO}
+
+    if is_sqlite(url):
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+
+    # In-memory SQLite uses a single shared connection; no pool sizing
+    if ":memory:" not in url:
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=not is_sqlite(url),
+        )
+
+    return kwargs
+
+
+def create_db_engine(url: str = DATABASE_URL, sqlite_pragmas: bool = True):
+    """
+    Builds an engine from config. For SQLite the tuning pragmas are
+    applied on every new connection (pass sqlite_pragmas=False for
+    the library defaults, e.g. in benchmarks).
+    """
+    db_engine = create_engine(url, **_engine_kwargs(url))
+
+    if is_sqlite(url) and sqlite_pragmas:
+        event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+
+    return db_engine
+
+
+def create_async_db_engine(url: str = DATABASE_URL, sqlite_pragmas: bool = True):
+    """
+    Async counterpart of create_db_engine (aiosqlite for SQLite).
+    """
+    db_engine = create_async_engine(to_async_url(url), **_engine_kwargs(url))
+
+    if is_sqlite(url) and sqlite_pragmas:
+        event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+    return db_engine
+
+
+engine = create_db_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+async_engine = create_async_db_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+Base = declarative_base()
+
+
+# ======================================================
+# REQUEST-SCOPED SESSIONS (FastAPI dependencies)
+# ======================================================
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,9 +1,91 @@
-from app.database import Base, engine
+import logging
+
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine, SessionLocal, is_sqlite
 
 from app.users.user_models import User
 from app.users.profile_models import UserProfile
-from app.assessments.assessment_model import PCOSAssessment 
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.summary_models import UserRiskSummary, DailyRiskSummary
+from app.assessments.summary_service import rebuild_summaries, check_dialect
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(bind):
+    """
+    `create_all` only creates missing tables. Columns and indexes added
+    to existing models are applied here (nullable columns only, which
+    every dialect can ADD without a table rebuild).
+    """
+    inspector = inspect(bind)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                ))
+            logger.info("Added column %s.%s", table.name, column.name)
+
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
+def _normalize_sqlite_timestamps(bind):
+    """
+    Rows written while created_at had server_default=func.now() hold
+    SQLite's CURRENT_TIMESTAMP ("YYYY-MM-DD HH:MM:SS"). SQLAlchemy
+    writes and binds "YYYY-MM-DD HH:MM:SS.ffffff", and SQLite compares
+    the two as text, so a keyset cursor on such a row matched the row
+    itself. Pads them to the one format; a no-op once done.
+    """
+    if not is_sqlite(str(bind.url)):
+        return
+
+    with bind.begin() as conn:
+        updated = conn.execute(text(
+            f'UPDATE "{PCOSAssessment.__tablename__}" '
+            "SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )).rowcount
+    if updated:
+        logger.info("Normalized created_at on %d assessment(s)", updated)
+
+
+def _backfill_inserted_at(bind):
+    # Rows from before inserted_at existed: the best known insert time
+    with bind.begin() as conn:
+        updated = conn.execute(text(
+            f'UPDATE "{PCOSAssessment.__tablename__}" '
+            "SET inserted_at = created_at WHERE inserted_at IS NULL"
+        )).rowcount
+    if updated:
+        logger.info("Backfilled inserted_at on %d assessment(s)", updated)
 
 
 def init_db():
+    check_dialect(engine.dialect.name)
+
+    inspector = inspect(engine)
+    summaries_missing = not inspector.has_table(UserRiskSummary.__tablename__)
+
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _normalize_sqlite_timestamps(engine)
+    _backfill_inserted_at(engine)
+
+    # First start with summary tables: backfill them from existing rows
+    if summaries_missing:
+        with SessionLocal() as db:
+            counted = rebuild_summaries(db)
+        if counted:
+            logger.info("Built assessment summaries from %d assessment(s)", counted)
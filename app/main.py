@@ -3,22 +3,35 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from app.core.logging_setup import setup_logging, stop_logging, RequestIdMiddleware
+setup_logging()
+
 from fastapi import FastAPI
 from app.core.startup import startup_event
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.health import router as health_router
-from app.api.pcos import router as pcos_router
-from app.api.auth import router as auth_router
-from app.api.assessments import router as assessments_router
+from app.api.metrics import router as metrics_router
+from app.api.profiling import router as profiling_router
 from app.init_db import init_db
-from app.api import profile
+from app.core.config import WRITE_BEHIND_ENABLED, ENABLED_SUBSYSTEMS, BULK_MAX_BODY_MB
+from app.assessments.write_behind import assessment_writer
+from app.auth.password_utils import start_password_pool, shutdown_password_pool
+from app.core.metrics import mark_worker_dead
+from app.core.profiling import ProfilingMiddleware
+from app.core.warmup import start_warmup
+from app.auth.dependencies import is_admin_scope
+from app.utils.uploads import UploadSizeLimitMiddleware
 
 app = FastAPI(
     title="PCOS Multimodal Risk Assessment API",
     version="1.0.0"
 )
 
+app.add_middleware(UploadSizeLimitMiddleware, path_limits={"/api/document/bulk": BULK_MAX_BODY_MB})
+app.add_middleware(ProfilingMiddleware, is_admin=is_admin_scope)
+app.add_middleware(RequestIdMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -32,11 +45,42 @@ app.add_middleware(
 
 @app.on_event("startup")
 def on_startup():
-    startup_event()
+    if "prediction" in ENABLED_SUBSYSTEMS:
+        startup_event()
     init_db()
+    if WRITE_BEHIND_ENABLED and "prediction" in ENABLED_SUBSYSTEMS:
+        assessment_writer.start()
+    if "auth" in ENABLED_SUBSYSTEMS:
+        start_password_pool()
+    start_warmup()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    assessment_writer.stop()
+    shutdown_password_pool()
+    mark_worker_dead()
+    stop_logging()
 
 app.include_router(health_router)
-app.include_router(pcos_router)
-app.include_router(auth_router)
-app.include_router(assessments_router)
-app.include_router(profile.router)
\ No newline at end of file
+app.include_router(metrics_router)
+app.include_router(profiling_router)
+
+# Routers are imported only for enabled subsystems (ENABLED_SUBSYSTEMS);
+# the ML models behind /api/pcos/predict load in on_startup
+if "prediction" in ENABLED_SUBSYSTEMS:
+    from app.api.pcos import router as pcos_router
+    app.include_router(pcos_router)
+if "auth" in ENABLED_SUBSYSTEMS:
+    from app.api.auth import router as auth_router
+    app.include_router(auth_router)
+if "assessments" in ENABLED_SUBSYSTEMS:
+    from app.api.assessments import router as assessments_router
+    app.include_router(assessments_router)
+if "documents" in ENABLED_SUBSYSTEMS:
+    from app.api.pcos import documents_router as pcos_documents_router
+    from app.api.document import router as document_router
+    app.include_router(pcos_documents_router)
+    app.include_router(document_router)
+if "auth" in ENABLED_SUBSYSTEMS:
+    from app.api import profile
+    app.include_router(profile.router)
\ No newline at end of file
@@ -1,15 +1,20 @@
 # app/parsing/document_parser.py
 
 import io
+import logging
 import re
 import os
 import tempfile
+from contextlib import contextmanager
 import pdfplumber
 import camelot
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable
 
 from .field_registry import FIELD_REGISTRY
 from .utils import clean_number, validate_range, normalize_bool
+from app.core.config import PARSE_CONFIDENCE_THRESHOLD, PARSE_MAX_PAGES
+
+logger = logging.getLogger(__name__)
 
 # ======================================================
 # GLOBAL REGEX (DECIMAL SAFE)
@@ -30,11 +35,11 @@ def normalize_text(text: str) -> str:
 # ======================================================
 # SAFE TABLE EXTRACTION (CAMEL0T)
 # ======================================================
-def extract_tables_safe(pdf_bytes: bytes) -> List:
+@contextmanager
+def _temp_pdf(pdf_bytes: bytes):
     """
-    Attempts Camelot extraction safely.
-    Tries lattice first, then stream.
-    Never crashes the pipeline.
+    Writes the PDF to a temp file (Camelot only reads from disk)
+    and removes it afterwards.
     """
     tmp_path = None
 
@@ -43,17 +48,33 @@ def extract_tables_safe(pdf_bytes: bytes) -> List:
             tmp.write(pdf_bytes)
             tmp_path = tmp.name
 
+        yield tmp_path
+
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+def _read_tables(pdf_path: str, pages: str = "all") -> List:
+    """
+    Tries lattice first, then stream.
+    Never crashes the pipeline.
+    """
+    try:
         try:
             tables = camelot.read_pdf(
-                tmp_path,
-                pages="all",
+                pdf_path,
+                pages=pages,
                 flavor="lattice",
                 strip_text="\n"
             )
         except Exception:
             tables = camelot.read_pdf(
-                tmp_path,
-                pages="all",
+                pdf_path,
+                pages=pages,
                 flavor="stream",
                 strip_text="\n"
             )
@@ -61,15 +82,23 @@ def extract_tables_safe(pdf_bytes: bytes) -> List:
         return [t.df for t in tables]
 
     except Exception as e:
-        print("[WARN] Camelot extraction failed:", str(e))
+        logger.warning("Camelot extraction failed: %s", e)
         return []
 
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
+
+def extract_tables_safe(pdf_bytes: bytes, pages: str = "all") -> List:
+    """
+    Attempts Camelot extraction safely.
+    Tries lattice first, then stream.
+    Never crashes the pipeline.
+    """
+    try:
+        with _temp_pdf(pdf_bytes) as tmp_path:
+            return _read_tables(tmp_path, pages)
+
+    except Exception as e:
+        logger.warning("Camelot extraction failed: %s", e)
+        return []
 
 
 # ======================================================
@@ -240,6 +269,45 @@ def parse_text(text: str):
     return extracted
 
 
+# ======================================================
+# CANDIDATE MERGING
+# ======================================================
+def update_candidates(best: Dict[str, Any], *sources: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keeps the highest-confidence candidate per field.
+    Earlier sources win ties.
+    """
+    for source in sources:
+        for field, candidate in source.items():
+            prev = best.get(field)
+            if not prev or candidate["confidence"] > prev["confidence"]:
+                best[field] = candidate
+
+    return best
+
+
+def finalize_candidates(best: Dict[str, Any]) -> Dict[str, Any]:
+    final = {}
+
+    for field in FIELD_REGISTRY:
+        if field in best:
+            final[field] = best[field]
+        else:
+            final[field] = {
+                "value": None,
+                "confidence": 0.0
+            }
+
+    return final
+
+
+def all_fields_found(best: Dict[str, Any], threshold: float) -> bool:
+    return all(
+        field in best and best[field]["confidence"] >= threshold
+        for field in FIELD_REGISTRY
+    )
+
+
 # ======================================================
 # MAIN ENTRY POINT
 # ======================================================
@@ -254,25 +322,67 @@ def parse_document(pdf_bytes: bytes) -> Dict[str, Any]:
     regex_data = parse_regex(text)
     text_data = parse_text(text)
 
-    final = {}
+    best = update_candidates({}, table_data, regex_data, text_data)
 
-    for field in FIELD_REGISTRY:
-        candidates = []
-
-        if field in table_data:
-            candidates.append(table_data[field])
-        if field in regex_data:
-            candidates.append(regex_data[field])
-        if field in text_data:
-            candidates.append(text_data[field])
-
-        if candidates:
-            best = max(candidates, key=lambda x: x["confidence"])
-            final[field] = best
-        else:
-            final[field] = {
-                "value": None,
-                "confidence": 0.0
-            }
+    return finalize_candidates(best)
 
-    return final
+
+# ======================================================
+# STREAMING ENTRY POINT (PAGE BY PAGE, EARLY STOP)
+# ======================================================
+def parse_document_streaming(
+    pdf_bytes: bytes,
+    confidence_threshold: Optional[float] = PARSE_CONFIDENCE_THRESHOLD,
+    max_pages: Optional[int] = PARSE_MAX_PAGES,
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Walks pages in order and updates field candidates after each one.
+    Stops once every registry field has a candidate at or above
+    `confidence_threshold`, or after `max_pages` pages.
+    A `confidence_threshold` of None disables the early stop.
+
+    `on_page` (optional) receives the partial result after every page.
+    """
+    best = {}
+    pages_read = 0
+    early_stop = False
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf, _temp_pdf(pdf_bytes) as tmp_path:
+        pages_total = len(pdf.pages)
+        budget = pages_total if not max_pages else min(pages_total, max_pages)
+
+        for page in pdf.pages[:budget]:
+            page_no = page.page_number
+            text = normalize_text(page.extract_text() or "")
+            page.close()
+
+            dfs = _read_tables(tmp_path, pages=str(page_no))
+
+            update_candidates(
+                best,
+                parse_tables(dfs),
+                parse_regex(text),
+                parse_text(text),
+            )
+            pages_read = page_no
+
+            if confidence_threshold is not None and all_fields_found(best, confidence_threshold):
+                early_stop = True
+
+            if on_page:
+                on_page({
+                    "fields": finalize_candidates(best),
+                    "pages_read": pages_read,
+                    "pages_total": pages_total,
+                })
+
+            if early_stop:
+                break
+
+    return {
+        "fields": finalize_candidates(best),
+        "pages_read": pages_read,
+        "pages_total": pages_total,
+        "early_stop": early_stop,
+    }
@@ -0,0 +1,219 @@
+# app/server.py
+
+"""
+Multi-worker launcher that shares the loaded models between workers.
+
+    python -m app.server --workers 4 --port 8000
+
+`uvicorn --workers N` starts every worker from scratch, so each one
+loads its own copy of every model. This launcher instead:
+
+1. imports the app and loads the prediction models once, in the
+   master (CatBoost experts, meta learner, ultrasound CatBoost, Torch
+   Grad-CAM; see app.core.startup.preload_models),
+2. gc.freeze()s everything allocated so far, so the workers' garbage
+   collector never writes to (and so un-shares) those pages,
+3. binds the socket and fork()s the workers, which share the weights
+   copy-on-write and serve the app with uvicorn.
+
+The Keras ResNet50 is the exception. Building it starts TensorFlow's
+runtime thread pools, which do not survive fork(), so every worker
+builds its own copy at startup. The master keeps Torch single-threaded
+for the same reason (no OpenMP team exists at fork time).
+
+Each worker is pinned to its own slice of the CPUs, and its thread
+budget (app.core.cpu_budget) defaults to the size of that slice. A worker that dies is
+re-forked from the master, with the models already loaded.
+
+Per-worker memory: scripts/worker_memory_report.py <master pid>.
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import tempfile
+import time
+
+from app.core.config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_CPU_AFFINITY,
+    ENABLED_SUBSYSTEMS,
+)
+
+logger = logging.getLogger("app.server")
+
+# A worker dying sooner than this after its start is restarted with a delay
+_MIN_WORKER_LIFETIME = 5.0
+
+
+def cpu_slices(workers: int, cpus=None):
+    """
+    Splits the usable CPUs into one contiguous slice per worker. With
+    more workers than CPUs, workers share single CPUs round-robin.
+    """
+    cpus = sorted(cpus if cpus is not None else os.sched_getaffinity(0))
+    per_worker = max(1, len(cpus) // workers)
+    return [
+        [cpus[(index * per_worker + offset) % len(cpus)] for offset in range(per_worker)]
+        for index in range(workers)
+    ]
+
+
+# ======================================================
+# MASTER
+# ======================================================
+def preload():
+    # Intra-op pools start on first use; with one thread Torch never
+    # starts one, so nothing is left half-alive in the forked workers
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    from app.core.startup import preload_models
+    start = time.perf_counter()
+    preload_models()
+    logger.info("Models preloaded in master", extra={"seconds": round(time.perf_counter() - start, 2)})
+
+
+def bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    def __init__(self, app, sock, slices, affinity: bool):
+        self.app = app
+        self.sock = sock
+        self.slices = slices
+        self.affinity = affinity
+        self.workers = {}  # pid -> (index, started)
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                run_worker(self.app, self.sock, index, self.slices[index] if self.affinity else None)
+                code = 0
+            except Exception:
+                logger.exception("Worker %d crashed", index)
+            finally:
+                os._exit(code)
+        self.workers[pid] = (index, time.monotonic())
+        logger.info("Started worker %d", index, extra={"pid": pid, "cpus": self.slices[index] if self.affinity else None})
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        from app.core.metrics import mark_worker_dead
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(len(self.slices)):
+            self.spawn(index)
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.workers:
+                continue  # not a worker (e.g. a helper process)
+            index, started = self.workers.pop(pid)
+            mark_worker_dead(pid)
+            if self.stopping:
+                continue
+            logger.warning("Worker %d exited, restarting", index, extra={"pid": pid, "status": status})
+            if time.monotonic() - started < _MIN_WORKER_LIFETIME:
+                time.sleep(1)
+            self.spawn(index)
+
+        logger.info("All workers stopped")
+
+
+# ======================================================
+# WORKER
+# ======================================================
+def configure_worker(cpus):
+    """
+    Pins the worker to `cpus`. The worker's startup then sizes every
+    library's thread pool to the slice (app.core.cpu_budget), before
+    TensorFlow creates its pools.
+    """
+    os.sched_setaffinity(0, cpus)
+
+
+def run_worker(app, sock, index: int, cpus):
+    import uvicorn
+    from app.core.logging_setup import stop_logging
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if cpus:
+        configure_worker(cpus)
+
+    # log_config=None: uvicorn's loggers propagate to our JSON queue handler
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None, access_log=False))
+    try:
+        server.run(sockets=[sock])
+    finally:
+        stop_logging()
+
+
+# ======================================================
+# ENTRY POINT
+# ======================================================
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with N forked workers sharing the loaded models")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--no-preload", action="store_true", help="load the models in every worker instead")
+    parser.add_argument("--no-affinity", action="store_true", help="don't pin workers to CPUs")
+    args = parser.parse_args()
+
+    # Metrics from all workers are aggregated through this directory; it
+    # must be set before prometheus_client is imported
+    if args.workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="pcos-metrics-")
+
+    from app.main import app
+
+    if not args.no_preload and "prediction" in ENABLED_SUBSYSTEMS:
+        preload()
+
+    sock = bind(args.host, args.port)
+    affinity = SERVER_CPU_AFFINITY and not args.no_affinity and hasattr(os, "sched_setaffinity")
+
+    gc.collect()
+    gc.freeze()
+
+    logger.info("Forking workers", extra={"workers": args.workers, "host": args.host, "port": args.port})
+    Master(app, sock, cpu_slices(args.workers), affinity).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,84 @@ import pdfplumber
 
 from app.services.extract_pdf import extract_from_pdf
 from app.services.extract_ocr import extract_from_ocr
-from app.services.normalize_fields import normalize_extracted_fields
+from app.services.normalize_fields import normalize_extracted_fields, clean_number
+from app.parsing.field_registry import FIELD_REGISTRY
 
-def is_born_digital(pdf_bytes: bytes) -> bool:
+def is_born_digital(pdf_bytes: bytes, max_pages=None) -> bool:
+    """
+    True if any of the first `max_pages` pages has a text layer.
+    """
     try:
         with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            return any(page.extract_text() for page in pdf.pages)
+            pages = pdf.pages[:max_pages] if max_pages else pdf.pages
+            return any(page.extract_text() for page in pages)
     except:
         return False
 
-def process_document(file_bytes: bytes, filename: str):
-    if filename.lower().endswith(".pdf") and is_born_digital(file_bytes):
-        raw_data = extract_from_pdf(file_bytes)
-        source = "pdf_digital"
-    else:
-        raw_data = extract_from_ocr(file_bytes)
-        source = "ocr"
+def process_document(file_bytes: bytes, filename: str, max_pages=None, on_page=None):
+    """
+    `max_pages` caps how many PDF pages are read.
+    `on_page` (optional) receives the partial result after every page.
+    """
+    if filename.lower().endswith(".pdf") and is_born_digital(file_bytes, max_pages=max_pages):
+        pages_read = None
+        pages_total = None
 
-    cleaned = normalize_extracted_fields(raw_data)
+        def report_page(data, read, total):
+            nonlocal pages_read, pages_total
+            pages_read, pages_total = read, total
+            if on_page:
+                on_page({
+                    "source": "pdf_digital",
+                    "fields": normalize_extracted_fields(data),
+                    "pages_read": read,
+                    "pages_total": total
+                })
+
+        raw_data = extract_from_pdf(file_bytes, max_pages=max_pages, on_page=report_page)
+        cleaned = normalize_extracted_fields(raw_data)
+
+        return {
+            "source": "pdf_digital",
+            "fields": cleaned,
+            "pages_read": pages_read,
+            "pages_total": pages_total
+        }
+
+    # Scanned PDFs and images: OCR matches against FIELD_REGISTRY, which
+    # lists every field; keep only the found ones, like the digital path
+    def report_ocr_page(partial):
+        if on_page:
+            on_page({"source": "ocr", **partial, "fields": _normalize_ocr(partial["fields"])})
+
+    ocr = extract_from_ocr(file_bytes, max_pages=max_pages, on_page=report_ocr_page)
 
     return {
-        "source": source,
-        "fields": cleaned
+        "source": "ocr",
+        **ocr,
+        "fields": _normalize_ocr(ocr["fields"])
     }
+
+
+def _normalize_ocr(fields: dict):
+    """
+    Registry matches are already typed and carry range-checked
+    confidences, so found fields keep both. Only numeric fields that
+    came back as text are cleaned; 0 and False count as found.
+    """
+    found = {}
+
+    for key, field in fields.items():
+        value = field["value"]
+        if value is None:
+            continue
+
+        field_type = FIELD_REGISTRY.get(key, {}).get("type", "float")
+        if field_type == "float" and not isinstance(value, (int, float)):
+            value = clean_number(value)
+            if value is None:
+                continue
+
+        found[key] = {"value": value, "confidence": field["confidence"]}
+
+    return found
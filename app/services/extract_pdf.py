@@ -4,11 +4,18 @@ import io
 import pdfplumber
 import re
 
-def extract_from_pdf(pdf_bytes: bytes):
+def extract_from_pdf(pdf_bytes: bytes, max_pages=None, on_page=None):
+    """
+    `max_pages` caps how many pages are read.
+    `on_page(data, pages_read, pages_total)` is called after every page.
+    """
     data = {}
 
     with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
+        pages_total = len(pdf.pages)
+        pages = pdf.pages[:max_pages] if max_pages else pdf.pages
+
+        for page in pages:
             text = page.extract_text() or ""
             for line in text.split("\n"):
                 # Example pattern
@@ -17,4 +24,7 @@ def extract_from_pdf(pdf_bytes: bytes):
                 if "BMI" in line:
                     data["BMI"] = re.findall(r"\d+\.?\d*", line)
 
+            if on_page:
+                on_page(data, page.page_number, pages_total)
+
     return data
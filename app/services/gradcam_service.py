@@ -2,6 +2,8 @@
 Grad-CAM visualization service for ultrasound images.
 """
 
+import logging
+import threading
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -13,9 +15,14 @@ from pathlib import Path
 import io
 import base64
 
+from app.utils.uploads import as_stream
+from app.core.warmup import loading, register_warmup
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 MODEL_PATH = PROJECT_ROOT / "models" / "resnet50_gradcam.pth"
 
+logger = logging.getLogger(__name__)
+
 class GradCAM:
     """Generate Grad-CAM heatmaps."""
     
@@ -70,6 +77,9 @@ class GradCAMService:
     
     def __init__(self):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # The hooks keep one call's activations / gradients on self.gradcam,
+        # so concurrent predictions take turns
+        self._lock = threading.Lock()
         
         # Load ResNet50 model
         self.model = models.resnet50(weights=None)
@@ -93,12 +103,14 @@ class GradCAMService:
                 weights_only=False  # Allow loading our custom trained model
             )
             self.model.load_state_dict(checkpoint['model_state_dict'])
-            print(f"✅ Loaded ResNet50 Grad-CAM model from {MODEL_PATH}")
-            print(f"   Val Acc: {checkpoint.get('val_acc', 0):.4f}")
-            print(f"   PCOS F1: {checkpoint.get('pcos_f1', 0):.4f}")
-            print(f"   Epoch: {checkpoint.get('epoch', 'N/A')}")
+            logger.info("Loaded ResNet50 Grad-CAM model", extra={
+                "path": str(MODEL_PATH),
+                "val_acc": checkpoint.get("val_acc"),
+                "pcos_f1": checkpoint.get("pcos_f1"),
+                "epoch": checkpoint.get("epoch"),
+            })
         else:
-            print(f"⚠️ ResNet model not found at {MODEL_PATH}")
+            logger.warning("ResNet model not found at %s", MODEL_PATH)
             raise FileNotFoundError(f"Model not found: {MODEL_PATH}")
         
         self.model = self.model.to(self.device)
@@ -114,28 +126,28 @@ class GradCAMService:
             transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
         ])
         
-        print(f"✅ Grad-CAM service initialized on {self.device}")
+        logger.info("Grad-CAM service initialized on %s", self.device)
     
     def generate_heatmap(self, image_bytes):
         """
         Generate Grad-CAM heatmap for an ultrasound image.
         
         Args:
-            image_bytes: Raw image bytes
+            image_bytes: Raw image bytes (or a memoryview / mmap / file over them)
             
         Returns:
             dict with heatmap overlay, prediction, and confidence
         """
         try:
             # Load and preprocess image
-            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+            image = Image.open(as_stream(image_bytes)).convert("RGB")
             original_img = np.array(image)
             
             # Transform for model
             input_tensor = self.transform(image).unsqueeze(0).to(self.device)
             
             # Generate heatmap
-            with torch.set_grad_enabled(True):
+            with self._lock, torch.set_grad_enabled(True):
                 heatmap, predicted_class, output = self.gradcam.generate_cam(
                     input_tensor, 
                     class_idx=1  # Focus on PCOS class (class 1)
@@ -174,15 +186,25 @@ class GradCAMService:
                 "class_index": int(predicted_class)
             }
         
-        except Exception as e:
-            print(f"❌ Error generating Grad-CAM heatmap: {e}")
+        except Exception:
+            logger.exception("Error generating Grad-CAM heatmap")
             raise
 
+    def warm_up(self):
+        """
+        Full heatmap pass (decode, forward, backward, encode) on a
+        synthetic gray image.
+        """
+        _, png = cv2.imencode('.png', np.full((224, 224, 3), 127, dtype=np.uint8))
+        self.generate_heatmap(png.tobytes())
+
 
 # Global instance
 try:
-    gradcam_service = GradCAMService()
+    # Optional: predictions fall back to no visualization without it
+    with loading("gradcam", required=False):
+        gradcam_service = GradCAMService()
+    register_warmup("gradcam", gradcam_service.warm_up)
 except Exception as e:
-    print(f"⚠️ Failed to initialize GradCAM service: {e}")
-    print(f"   This is likely due to missing model file at: {MODEL_PATH}")
+    logger.warning("Failed to initialize Grad-CAM service (model file %s): %s", MODEL_PATH, e)
     gradcam_service = None
\ No newline at end of file
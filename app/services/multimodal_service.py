@@ -1,4 +1,7 @@
+import logging
 import os
+import random
+import threading
 import cv2
 import numpy as np
 import pandas as pd
@@ -8,6 +11,13 @@ from tensorflow.keras.applications import ResNet50
 from tensorflow.keras.applications.resnet50 import preprocess_input
 from skimage.feature import local_binary_pattern
 
+from app.core import cpu_budget
+from app.core.config import LOG_DEBUG_SAMPLE_RATE
+from app.core.metrics import stage
+from app.core.warmup import loading, register_warmup
+
+logger = logging.getLogger(__name__)
+
 # =====================================================
 # PATH SETUP
 # =====================================================
@@ -24,19 +34,16 @@ EXPERT_MODELS = {
     "symptom": CatBoostClassifier(),
 }
 
-EXPERT_MODELS["hormonal"].load_model(
-    os.path.join(MODEL_DIR, "expert_hormonal.cbm")
-)
-EXPERT_MODELS["metabolic"].load_model(
-    os.path.join(MODEL_DIR, "expert_metabolic.cbm")
-)
-EXPERT_MODELS["symptom"].load_model(
-    os.path.join(MODEL_DIR, "expert_symptom.cbm")
-)
+for _name, _model in EXPERT_MODELS.items():
+    with loading(f"expert_{_name}"):
+        _model.load_model(
+            os.path.join(MODEL_DIR, f"expert_{_name}.cbm")
+        )
 
-META_MODEL = joblib.load(
-    os.path.join(MODEL_DIR, "meta_learner.pkl")
-)
+with loading("meta_learner"):
+    META_MODEL = joblib.load(
+        os.path.join(MODEL_DIR, "meta_learner.pkl")
+    )
 
 # =====================================================
 # CLINICAL DATA SUFFICIENCY RULES
@@ -73,23 +80,36 @@ MIN_NUMERIC_FIELDS = 6
 # LOAD ULTRASOUND MODEL
 # =====================================================
 ultrasound_model = CatBoostClassifier()
-ultrasound_model.load_model(
-    os.path.join(MODEL_DIR, "ultrasound_catboost_combined.cbm")
-)
+with loading("ultrasound_catboost"):
+    ultrasound_model.load_model(
+        os.path.join(MODEL_DIR, "ultrasound_catboost_combined.cbm")
+    )
 
 ULTRASOUND_FEATURE_NAMES = ultrasound_model.feature_names_
 
 # =====================================================
 # CNN FOR ULTRASOUND FEATURE EXTRACTION
 # =====================================================
-cnn_model = ResNet50(
-    weights="imagenet",
-    include_top=False,
-    pooling="avg",
-    input_shape=(224, 224, 3)
-)
-
-print("✅ All models loaded successfully")
+# Built by load_cnn_model() at startup, not on import: building it starts
+# the TensorFlow runtime and its thread pools, which do not survive
+# fork(). app.server imports this module in the master and builds the
+# CNN in each worker.
+cnn_model = None
+_cnn_lock = threading.Lock()
+
+def load_cnn_model():
+    global cnn_model
+    with _cnn_lock:
+        if cnn_model is None:
+            with loading("cnn"):
+                cnn_model = ResNet50(
+                    weights="imagenet",
+                    include_top=False,
+                    pooling="avg",
+                    input_shape=(224, 224, 3)
+                )
+            logger.info("CNN feature extractor loaded")
+    return cnn_model
 
 # =====================================================
 # CONSTANTS
@@ -168,26 +188,35 @@ def normalize_tabular_columns(df: pd.DataFrame) -> pd.DataFrame:
 # =====================================================
 # ULTRASOUND FEATURE EXTRACTION
 # =====================================================
-def extract_ultrasound_features(image_bytes: bytes) -> np.ndarray:
-    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
-    if img is None:
-        raise ValueError("Invalid ultrasound image")
-
-    img = cv2.resize(img, (224, 224))
+def extract_ultrasound_features(image_bytes) -> np.ndarray:
+    # Accepts bytes, memoryview or mmap; np.frombuffer does not copy
+    with stage("image_decode"):
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise ValueError("Invalid ultrasound image")
 
-    lbp = local_binary_pattern(img, P=8, R=1, method="uniform")
-    hist, _ = np.histogram(lbp.ravel(), bins=16, range=(0, 16))
-    hist = hist.astype("float32")
-    hist /= hist.sum() + 1e-6
+        img = cv2.resize(img, (224, 224))
 
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-    img_rgb = preprocess_input(np.expand_dims(img_rgb, axis=0))
+    with stage("lbp"):
+        lbp = local_binary_pattern(img, P=8, R=1, method="uniform")
+        hist, _ = np.histogram(lbp.ravel(), bins=16, range=(0, 16))
+        hist = hist.astype("float32")
+        hist /= hist.sum() + 1e-6
 
-    cnn_features = cnn_model.predict(img_rgb, verbose=0).flatten()
+    with stage("cnn_forward"):
+        cnn_features = cnn_forward(img)
 
     features = np.concatenate([cnn_features, hist])
     return features[:len(ULTRASOUND_FEATURE_NAMES)]
 
+def cnn_forward(img: np.ndarray) -> np.ndarray:
+    # img: 224x224 grayscale uint8
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    img_rgb = preprocess_input(np.expand_dims(img_rgb, axis=0))
+
+    model = cnn_model or load_cnn_model()
+    return model.predict(img_rgb, verbose=0).flatten()
+
 def build_meta_features(hormonal_prob, metabolic_prob, symptom_prob):
     probs = np.array([hormonal_prob, metabolic_prob, symptom_prob])
 
@@ -261,6 +290,37 @@ def check_data_sufficiency(df: pd.DataFrame, has_ultrasound: bool):
         "numeric_count": present_numeric,
     }
 
+# =====================================================
+# WARM-UP (synthetic inputs, same code paths as predict_pcos)
+# =====================================================
+def _synthetic_tabular_pool() -> Pool:
+    df = pd.DataFrame([{col: 0.0 for col in TABULAR_FEATURES}])
+    for col in CATEGORICAL_COLS:
+        df[col] = df[col].astype(str)
+    return Pool(df, cat_features=CATEGORICAL_COLS, thread_count=cpu_budget.threads("catboost"))
+
+def _warm_meta_learner():
+    meta_input = build_meta_features(0.5, 0.5, 0.5)
+    META_MODEL.predict_proba(meta_input[META_MODEL.feature_names_in_])
+
+def _warm_ultrasound():
+    us_df = pd.DataFrame(
+        [np.zeros(len(ULTRASOUND_FEATURE_NAMES), dtype="float32")],
+        columns=ULTRASOUND_FEATURE_NAMES
+    )
+    ultrasound_model.predict_proba(us_df, thread_count=cpu_budget.threads("catboost"))
+
+for _name, _model in EXPERT_MODELS.items():
+    register_warmup(
+        f"expert_{_name}",
+        lambda model=_model: model.predict_proba(
+            _synthetic_tabular_pool(), thread_count=cpu_budget.threads("catboost")
+        )
+    )
+register_warmup("meta_learner", _warm_meta_learner)
+register_warmup("ultrasound_catboost", _warm_ultrasound)
+register_warmup("cnn", lambda: cnn_forward(np.zeros((224, 224), dtype=np.uint8)))
+
 # =====================================================
 # MAIN PREDICTION FUNCTION
 # =====================================================
@@ -297,30 +357,36 @@ def predict_pcos(tabular_data: dict, ultrasound_bytes: bytes):
         }
 
 
-    pool = Pool(df, cat_features=CATEGORICAL_COLS)
+    with stage("expert_catboost"):
+        catboost_threads = cpu_budget.threads("catboost")
+        pool = Pool(df, cat_features=CATEGORICAL_COLS, thread_count=catboost_threads)
 
-    expert_probs = {
-        name: model.predict_proba(pool)[0][1]
-        for name, model in EXPERT_MODELS.items()
-    }
+        expert_probs = {
+            name: model.predict_proba(pool, thread_count=catboost_threads)[0][1]
+            for name, model in EXPERT_MODELS.items()
+        }
 
-    # ✅ Build meta features EXACTLY as training
-    meta_input = build_meta_features(
-        hormonal_prob=expert_probs["hormonal"],
-        metabolic_prob=expert_probs["metabolic"],
-        symptom_prob=expert_probs["symptom"],
-    )
+    with stage("meta_learner"):
+        # ✅ Build meta features EXACTLY as training
+        meta_input = build_meta_features(
+            hormonal_prob=expert_probs["hormonal"],
+            metabolic_prob=expert_probs["metabolic"],
+            symptom_prob=expert_probs["symptom"],
+        )
 
-    # 🔒 Enforce column order (extra safety)
-    meta_input = meta_input[META_MODEL.feature_names_in_]
+        # 🔒 Enforce column order (extra safety)
+        meta_input = meta_input[META_MODEL.feature_names_in_]
 
-    p_tabular = META_MODEL.predict_proba(meta_input)[:, 1][0]
+        p_tabular = META_MODEL.predict_proba(meta_input)[:, 1][0]
 
 
     # ---------- ULTRASOUND ----------
     us_features = extract_ultrasound_features(ultrasound_bytes)
-    us_df = pd.DataFrame([us_features], columns=ULTRASOUND_FEATURE_NAMES)
-    p_ultrasound = ultrasound_model.predict_proba(us_df)[0][1]
+    with stage("ultrasound_catboost"):
+        us_df = pd.DataFrame([us_features], columns=ULTRASOUND_FEATURE_NAMES)
+        p_ultrasound = ultrasound_model.predict_proba(
+            us_df, thread_count=cpu_budget.threads("catboost")
+        )[0][1]
 
     # ---------- ADAPTIVE FUSION ----------
     alpha = 0.5
@@ -331,14 +397,16 @@ def predict_pcos(tabular_data: dict, ultrasound_bytes: bytes):
 
     final_score = alpha * p_tabular + (1 - alpha) * p_ultrasound
 
-    print(
-        f"[DEBUG] Hormonal={expert_probs['hormonal']:.3f}, "
-        f"Metabolic={expert_probs['metabolic']:.3f}, "
-        f"Symptom={expert_probs['symptom']:.3f}, "
-        f"Meta={p_tabular:.3f}, "
-        f"Ultrasound={p_ultrasound:.3f}, "
-        f"Final={final_score:.3f}"
-    )
+    # Sampled: one line per prediction is too much at volume
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_DEBUG_SAMPLE_RATE:
+        logger.debug("Prediction probabilities", extra={
+            "hormonal": round(float(expert_probs["hormonal"]), 3),
+            "metabolic": round(float(expert_probs["metabolic"]), 3),
+            "symptom": round(float(expert_probs["symptom"]), 3),
+            "meta": round(float(p_tabular), 3),
+            "ultrasound": round(float(p_ultrasound), 3),
+            "final": round(float(final_score), 3),
+        })
 
     risk = (
         "LOW" if final_score < 0.3
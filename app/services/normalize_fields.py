@@ -9,7 +9,8 @@ FIELD_RANGES = {
 }
 
 def clean_number(val):
-    if not val:
+    # 0 is a reading, not a missing value
+    if val is None or val == "":
         return None
     val = str(val)
     val = re.sub(r"[^\d\.,-]", "", val)
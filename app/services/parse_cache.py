@@ -0,0 +1,198 @@
+# app/services/parse_cache.py
+
+"""
+Two-tier cache for document parse results.
+
+Entries are keyed by a hash of the file bytes plus the parser version
+and a fingerprint of FIELD_REGISTRY, so editing aliases or ranges
+invalidates old entries automatically. Keys of OCR-capable parses also
+carry the OCR settings and Tesseract version (`ocr_options`). A bounded
+in-memory LRU sits in front of a persistent SQLite table.
+
+Cached results are patient data. Both tiers expire entries after
+PARSE_CACHE_TTL_SECONDS; the SQLite file is owner-only and trimmed to
+PARSE_CACHE_DB_MAX_ROWS on every insert.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import (
+    PARSE_CACHE_MAX_ENTRIES,
+    PARSE_CACHE_PATH,
+    PARSE_CACHE_DB_MAX_ROWS,
+    PARSE_CACHE_TTL_SECONDS,
+    OCR_DPI,
+)
+from app.parsing.field_registry import FIELD_REGISTRY
+
+# Bump whenever parsing / extraction logic changes in a way that
+# affects results (registry edits are picked up automatically)
+PARSER_VERSION = "3"
+
+
+def _registry_fingerprint() -> str:
+    encoded = json.dumps(FIELD_REGISTRY, sort_keys=True, default=list)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+CACHE_VERSION = f"{PARSER_VERSION}-{_registry_fingerprint()}"
+
+
+@functools.lru_cache(maxsize=None)
+def _tesseract_version() -> str:
+    try:
+        import pytesseract
+        return str(pytesseract.get_tesseract_version())
+    except Exception:  # not installed: OCR parses fail and are not cached
+        return "none"
+
+
+def ocr_options() -> Dict[str, Any]:
+    """
+    Key options for parses that may OCR: results change with the render
+    DPI and the Tesseract build.
+    """
+    return {"ocr_dpi": OCR_DPI, "tesseract": _tesseract_version()}
+
+
+def document_digest(file_bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class ParseCache:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        max_rows: int = PARSE_CACHE_DB_MAX_ROWS,
+        ttl_seconds: int = PARSE_CACHE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, created_at)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        """
+        Opens the SQLite tier on first use (parse workers import this
+        module but never touch the cache). Caller holds the lock.
+        """
+        if self._db is None and self.path:
+            # Owner-only; SQLite gives the -wal/-shm files the same mode
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            os.chmod(self.path, 0o600)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " key TEXT PRIMARY KEY,"
+                " version TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS ix_parse_cache_created ON parse_cache (created_at)")
+            # Entries from older parser / registry versions can never hit again
+            db.execute("DELETE FROM parse_cache WHERE version != ?", (CACHE_VERSION,))
+            self._evict(db)
+            db.commit()
+            self._db = db
+
+        return self._db
+
+    @staticmethod
+    def make_key(kind: str, digest: str, **options) -> str:
+        opts = ",".join(f"{k}={options[k]}" for k in sorted(options))
+        return f"{CACHE_VERSION}:{kind}:{digest}:{opts}"
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and created_at < time.time() - self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+            db = self._connection()
+            if db is None:
+                return None
+
+            row = db.execute(
+                "SELECT value, created_at FROM parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or self._expired(row[1]):
+                return None
+
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        value = copy.deepcopy(value)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, value, now)
+
+            db = self._connection()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, version, value, created_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, CACHE_VERSION, json.dumps(value), now)
+                )
+                self._evict(db)
+                db.commit()
+
+    def _evict(self, db):
+        """
+        Drops expired rows, then the oldest rows beyond max_rows.
+        """
+        if self.ttl_seconds:
+            db.execute(
+                "DELETE FROM parse_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        if self.max_rows:
+            db.execute(
+                "DELETE FROM parse_cache WHERE key IN ("
+                " SELECT key FROM parse_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM parse_cache")
+                db.commit()
+
+    def _remember(self, key: str, value: Dict[str, Any], created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+# Global instance
+parse_cache = ParseCache(PARSE_CACHE_PATH, PARSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,401 @@
+# app/services/parse_sandbox.py
+
+"""
+Runs document parsing in isolated worker processes.
+
+Camelot, Ghostscript and pdfplumber can hang or balloon on malformed
+PDFs. Each parse runs in its own process with a wall-clock timeout, an
+RSS limit and a page-count limit. On breach the worker is killed and the
+last partial result is returned with an explicit truncation status.
+"""
+
+import hashlib
+import logging
+import multiprocessing as mp
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional, Union
+
+import psutil
+
+from app.core.config import (
+    PARSE_CONFIDENCE_THRESHOLD,
+    PARSE_MAX_PAGES,
+    PARSE_TIMEOUT_SECONDS,
+    PARSE_MAX_RSS_MB,
+    PARSE_WORKER_MAX_PAGES,
+    PARSE_WORKER_START_METHOD,
+)
+from app.services.parse_cache import parse_cache, document_digest, ocr_options
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# STATUSES
+# ======================================================
+STATUS_COMPLETE = "complete"
+STATUS_TRUNCATED = "truncated"
+STATUS_ERROR = "error"
+
+REASON_TIMEOUT = "timeout"
+REASON_MEMORY = "memory_limit"
+REASON_PAGES = "page_limit"
+REASON_CRASHED = "worker_crashed"
+REASON_CANCELLED = "cancelled"
+
+# How often the parent checks the RSS of the worker and its children
+POLL_INTERVAL_SECONDS = 0.05
+
+
+class ParseWorkerError(Exception):
+    """Raised when the parser itself fails inside the worker."""
+
+    def detail(self) -> Dict[str, Any]:
+        # Body of the 422 the API returns for a document that cannot be parsed
+        return {
+            "message": f"Document parsing failed: {self}",
+            "parse_status": STATUS_ERROR,
+            "truncation_reason": None,
+        }
+
+
+# ======================================================
+# WORKER PROCESS CONTEXT
+# ======================================================
+_context = None
+
+def _get_context():
+    global _context
+    if _context is None:
+        _context = mp.get_context(PARSE_WORKER_START_METHOD)
+        if PARSE_WORKER_START_METHOD == "forkserver":
+            # Parser modules are imported once in the fork server,
+            # so each worker forks with them already loaded
+            _context.set_forkserver_preload([
+                "app.parsing.document_parser",
+                "app.services.document_router",
+            ])
+    return _context
+
+
+# ======================================================
+# JOBS (RUN INSIDE THE WORKER)
+# ======================================================
+def _load_source(source) -> bytes:
+    """
+    Jobs receive either the document bytes or the path of a spooled
+    upload, which is read inside the worker instead of being pickled.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return source
+
+
+def _job_parse_document(send_partial, source, streaming, max_pages):
+    from app.parsing.document_parser import parse_document_streaming
+
+    return parse_document_streaming(
+        _load_source(source),
+        confidence_threshold=PARSE_CONFIDENCE_THRESHOLD if streaming else None,
+        max_pages=max_pages,
+        on_page=send_partial,
+    )
+
+
+def _job_process_document(send_partial, source, filename, max_pages):
+    from app.services.document_router import process_document
+
+    return process_document(
+        _load_source(source),
+        filename,
+        max_pages=max_pages,
+        on_page=send_partial,
+    )
+
+
+JOBS = {
+    "parse_document": _job_parse_document,
+    "process_document": _job_process_document,
+}
+
+
+def _worker_main(job_name: str, args: tuple, conn):
+    try:
+        result = JOBS[job_name](lambda partial: conn.send(("partial", partial)), *args)
+        conn.send(("done", result))
+    except Exception as e:
+        conn.send(("error", (str(e), traceback.format_exc())))
+    finally:
+        conn.close()
+
+
+# ======================================================
+# SUPERVISOR (RUNS IN THE API PROCESS)
+# ======================================================
+def _process_tree(pid: int):
+    """
+    The worker and every process it spawned (camelot runs Ghostscript
+    as a child), which count towards the RSS limit.
+    """
+    try:
+        worker = psutil.Process(pid)
+        return [worker] + worker.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def _rss_bytes(procs) -> int:
+    total = 0
+    for proc in procs:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            # Exited since it was listed
+            pass
+    return total
+
+
+def _kill_all(procs):
+    for proc in procs:
+        try:
+            # psutil refuses if the pid now belongs to another process
+            proc.kill()
+        except psutil.Error:
+            pass
+
+
+def run_sandboxed(
+    job_name: str,
+    args: tuple,
+    empty_result: Callable[[], Dict[str, Any]],
+    timeout: float = PARSE_TIMEOUT_SECONDS,
+    max_rss_mb: int = PARSE_MAX_RSS_MB,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a parse job in a fresh worker process and supervises it.
+
+    Returns:
+        {
+            "status": "complete" | "truncated",
+            "truncation_reason": None | "timeout" | "memory_limit"
+                                 | "page_limit" | "worker_crashed"
+                                 | "cancelled",
+            "elapsed_ms": float,
+            "result": last full or partial result
+        }
+
+    The RSS limit applies to the worker plus its child processes, and
+    the children are killed with the worker. Setting `cancelled` (e.g.
+    when the client has gone) kills the worker at the next poll.
+
+    Raises:
+        ParseWorkerError if the parser raised inside the worker.
+    """
+    ctx = _get_context()
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_worker_main,
+        args=(job_name, args, child_conn),
+        daemon=True,
+    )
+
+    start = time.monotonic()
+    deadline = start + timeout
+    max_rss = max_rss_mb * 1024 * 1024
+
+    result = None
+    partial = None
+    reason = None
+    error = None
+    children = set()
+
+    process.start()
+    child_conn.close()
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                reason = REASON_TIMEOUT
+                break
+
+            if parent_conn.poll(min(POLL_INTERVAL_SECONDS, remaining)):
+                try:
+                    kind, payload = parent_conn.recv()
+                except EOFError:
+                    reason = REASON_CRASHED
+                    break
+
+                if kind == "partial":
+                    partial = payload
+                    continue
+                if kind == "done":
+                    result = payload
+                else:
+                    error = payload
+                break
+
+            if not process.is_alive():
+                reason = REASON_CRASHED
+                break
+
+            if cancelled is not None and cancelled.is_set():
+                reason = REASON_CANCELLED
+                break
+
+            tree = _process_tree(process.pid)
+            children.update(tree[1:])
+            if _rss_bytes(tree) > max_rss:
+                reason = REASON_MEMORY
+                break
+
+    finally:
+        if process.is_alive():
+            children.update(_process_tree(process.pid)[1:])
+            process.kill()
+        process.join()
+        # Once the worker is gone its children are reparented and can no
+        # longer be listed from it, so every child seen while supervising
+        # is killed, however the worker exited
+        _kill_all(children)
+        parent_conn.close()
+
+    elapsed_ms = round((time.monotonic() - start) * 1000, 1)
+
+    if error is not None:
+        message, worker_traceback = error
+        logger.error("Parse worker failed", extra={"worker_traceback": worker_traceback})
+        raise ParseWorkerError(message)
+
+    if result is not None:
+        pages_read = result.get("pages_read")
+        pages_total = result.get("pages_total")
+        hit_page_limit = (
+            pages_read is not None
+            and pages_total is not None
+            and pages_read < pages_total
+            and not result.get("early_stop")
+        )
+        return {
+            "status": STATUS_TRUNCATED if hit_page_limit else STATUS_COMPLETE,
+            "truncation_reason": REASON_PAGES if hit_page_limit else None,
+            "elapsed_ms": elapsed_ms,
+            "result": result,
+        }
+
+    logger.warning("Parse worker stopped", extra={"reason": reason, "elapsed_ms": elapsed_ms})
+
+    return {
+        "status": STATUS_TRUNCATED,
+        "truncation_reason": reason,
+        "elapsed_ms": elapsed_ms,
+        "result": partial if partial is not None else empty_result(),
+    }
+
+
+# ======================================================
+# PUBLIC ENTRY POINTS
+# ======================================================
+def _cached(key: str, run: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Serves from the parse cache, or runs the job and stores the result
+    when it is deterministic (complete, or cut at the page limit).
+    A hit reports its own lookup time as elapsed_ms.
+    """
+    start = time.monotonic()
+    hit = parse_cache.get(key)
+    if hit is not None:
+        hit["cached"] = True
+        hit["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+        return hit
+
+    parsed = run()
+    if parsed["truncation_reason"] in (None, REASON_PAGES):
+        parse_cache.set(key, parsed)
+
+    parsed["cached"] = False
+    return parsed
+
+
+def _source_digest(source) -> str:
+    if isinstance(source, str):
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    return document_digest(source)
+
+
+def parse_document_sandboxed(
+    source: Union[bytes, str],
+    streaming: bool = False,
+    max_pages: Optional[int] = None,
+    digest: Optional[str] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Sandboxed `parse_document`. Pages beyond `max_pages` (or the
+    worker page limit, whichever is lower) are never read.
+
+    `source` is the PDF bytes or a path to it. `digest` may be passed
+    if the caller already hashed the bytes. `cancelled` is passed on to
+    `run_sandboxed`.
+    """
+    from app.parsing.document_parser import finalize_candidates
+
+    default_pages = PARSE_MAX_PAGES if streaming else PARSE_WORKER_MAX_PAGES
+    page_limit = min(max_pages or default_pages, PARSE_WORKER_MAX_PAGES)
+
+    key = parse_cache.make_key(
+        "parse_document",
+        digest or _source_digest(source),
+        streaming=streaming,
+        pages=page_limit,
+        threshold=PARSE_CONFIDENCE_THRESHOLD,
+    )
+
+    return _cached(key, lambda: run_sandboxed(
+        "parse_document",
+        (source, streaming, page_limit),
+        empty_result=lambda: {
+            "fields": finalize_candidates({}),
+            "pages_read": 0,
+            "pages_total": None,
+            "early_stop": False,
+        },
+        cancelled=cancelled,
+    ))
+
+
+def process_document_sandboxed(
+    source: Union[bytes, str],
+    filename: str,
+    digest: Optional[str] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Sandboxed `process_document`. `source` is the file bytes or a path.
+    """
+    key = parse_cache.make_key(
+        "process_document",
+        digest or _source_digest(source),
+        pdf=filename.lower().endswith(".pdf"),
+        pages=PARSE_WORKER_MAX_PAGES,
+        **ocr_options(),
+    )
+
+    return _cached(key, lambda: run_sandboxed(
+        "process_document",
+        (source, filename, PARSE_WORKER_MAX_PAGES),
+        empty_result=lambda: {
+            "source": None,
+            "fields": {},
+            "pages_read": 0,
+            "pages_total": None,
+        },
+        cancelled=cancelled,
+    ))
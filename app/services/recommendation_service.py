@@ -8,15 +8,20 @@ import google.generativeai as genai
 from typing import Dict, Any, List, Optional
 import os
 import json
+import logging
 import re
 from PIL import Image
 import io
 
+from app.utils.uploads import as_stream
+
+logger = logging.getLogger(__name__)
+
 class RecommendationService:
     def __init__(self):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
-            print("⚠️ GEMINI_API_KEY not found in environment variables")
+            logger.warning("GEMINI_API_KEY not found in environment variables")
             self.model = None
             return
         
@@ -24,7 +29,7 @@ class RecommendationService:
         # Use gemini-1.5-flash for multimodal support (faster and cheaper)
         # or gemini-1.5-pro for more advanced analysis
         self.model = genai.GenerativeModel('gemini-2.5-flash')
-        print("✅ Gemini AI initialized successfully")
+        logger.info("Gemini AI initialized")
     
     def generate_personalized_recommendations(
         self, 
@@ -38,7 +43,7 @@ class RecommendationService:
         Args:
             assessment_data: Complete form data from assessment
             prediction_result: AI model prediction results
-            ultrasound_image: Optional ultrasound image bytes for visual analysis
+            ultrasound_image: Optional ultrasound image bytes (or memoryview / mmap / file) for visual analysis
             
         Returns:
             Dictionary with recommendations or fallback
@@ -57,16 +62,15 @@ class RecommendationService:
             # Multimodal: Include ultrasound image if provided
             if ultrasound_image:
                 try:
-                    image = Image.open(io.BytesIO(ultrasound_image))
+                    image = Image.open(as_stream(ultrasound_image))
                     # Resize if too large (Gemini has size limits)
                     if image.width > 1024 or image.height > 1024:
                         image.thumbnail((1024, 1024), Image.Lanczos)
                     
                     # Generate with both text and image
                     response = self.model.generate_content([prompt, image])
-                    print("✅ Generated recommendations with ultrasound image analysis")
                 except Exception as img_err:
-                    print(f"⚠️ Image processing failed, using text-only: {img_err}")
+                    logger.warning("Image processing failed, using text-only: %s", img_err)
                     response = self.model.generate_content(prompt)
             else:
                 response = self.model.generate_content(prompt)
@@ -81,7 +85,7 @@ class RecommendationService:
             }
             
         except Exception as e:
-            print(f"❌ Gemini API Error: {e}")
+            logger.error("Gemini API error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -331,15 +335,13 @@ Generate the JSON response now:"""
             # Validate structure
             for rec in recommendations:
                 if not all(key in rec for key in ["category", "title", "description", "priority", "actionable_tips"]):
-                    print(f"⚠️ Invalid recommendation structure: {rec}")
+                    logger.warning("Invalid recommendation structure", extra={"recommendation": rec})
                     return []
             
-            print(f"✅ Successfully parsed {len(recommendations)} recommendations")
             return recommendations
             
         except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing failed: {e}")
-            print(f"Response text: {response_text[:500]}...")
+            logger.warning("Gemini response is not valid JSON: %s", e, extra={"response_text": response_text[:500]})
             return []
 
 # Singleton instance
@@ -0,0 +1,182 @@
+# app/storage/blob_store.py
+
+"""
+Content-addressed store for binary artifacts (ultrasound uploads and
+Grad-CAM heatmaps).
+
+Blobs are keyed by the sha256 of their bytes, so identical uploads are
+stored once. Database rows keep only the reference ("sha256:<hex>").
+Storage is delegated to a backend; the local-disk one is built in and
+others can be added with `register_backend`.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, Optional, Union
+
+from app.core.config import BLOB_STORE_BACKEND, BLOB_STORE_PATH
+from app.utils.uploads import sniff_kind, KIND_PDF, KIND_PNG, KIND_JPEG, KIND_BMP
+
+REF_PREFIX = "sha256:"
+
+MEDIA_TYPES = {
+    KIND_PDF: "application/pdf",
+    KIND_PNG: "image/png",
+    KIND_JPEG: "image/jpeg",
+    KIND_BMP: "image/bmp",
+}
+
+
+class BlobNotFound(KeyError):
+    """Raised when a reference has no stored blob."""
+
+
+def make_ref(digest: str) -> str:
+    return f"{REF_PREFIX}{digest}"
+
+
+def parse_ref(ref: str) -> str:
+    if not ref or not ref.startswith(REF_PREFIX):
+        raise ValueError(f"Not a blob reference: {ref!r}")
+
+    digest = ref[len(REF_PREFIX):]
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Not a blob reference: {ref!r}")
+    return digest
+
+
+def media_type(data) -> str:
+    return MEDIA_TYPES.get(sniff_kind(bytes(data[:16])), "application/octet-stream")
+
+
+# ======================================================
+# BACKENDS
+# ======================================================
+class BlobBackend:
+    """
+    Storage for immutable blobs addressed by their hex digest.
+    """
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def write(self, digest: str, data) -> None:
+        raise NotImplementedError
+
+    def read(self, digest: str) -> bytes:
+        raise NotImplementedError
+
+    def local_path(self, digest: str) -> Optional[str]:
+        """
+        A filesystem path for the blob if the backend has one
+        (lets the API stream it with sendfile), else None.
+        """
+        return None
+
+
+class LocalDiskBackend(BlobBackend):
+    """
+    Blobs under `root/ab/cd/<digest>`. Writes go to a temp file in the
+    same directory and are renamed into place, so readers never see a
+    partial blob and concurrent writers of the same blob are harmless.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def write(self, digest: str, data) -> None:
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, digest: str) -> bytes:
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise BlobNotFound(make_ref(digest))
+
+    def local_path(self, digest: str) -> Optional[str]:
+        path = self._path(digest)
+        return path if os.path.exists(path) else None
+
+
+BACKENDS: Dict[str, Callable[[str], BlobBackend]] = {
+    "local": LocalDiskBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[str], BlobBackend]):
+    """
+    Makes a backend selectable with BLOB_STORE_BACKEND=<name>.
+    `factory` receives BLOB_STORE_PATH (a directory, bucket, ...).
+    """
+    BACKENDS[name] = factory
+
+
+# ======================================================
+# STORE
+# ======================================================
+class BlobStore:
+    """
+    `backend` is a BlobBackend or the name of a registered one, which
+    is resolved on first use so backends registered after import
+    still apply.
+    """
+
+    def __init__(self, backend: Union[BlobBackend, str] = BLOB_STORE_BACKEND, location: str = BLOB_STORE_PATH):
+        self._backend = backend
+        self.location = location
+
+    @property
+    def backend(self) -> BlobBackend:
+        if isinstance(self._backend, str):
+            if self._backend not in BACKENDS:
+                raise ValueError(f"Unknown blob store backend: {self._backend}")
+            self._backend = BACKENDS[self._backend](self.location)
+        return self._backend
+
+    def put(self, data, digest: Optional[str] = None) -> str:
+        """
+        Stores `data` (bytes or any buffer: memoryview, mmap) unless an
+        identical blob exists. Returns its reference. Pass `digest` if
+        the sha256 is already known (e.g. from read_upload).
+        """
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+
+        if not self.backend.exists(digest):
+            self.backend.write(digest, data)
+
+        return make_ref(digest)
+
+    def get(self, ref: str) -> bytes:
+        return self.backend.read(parse_ref(ref))
+
+    def exists(self, ref: str) -> bool:
+        return self.backend.exists(parse_ref(ref))
+
+    def local_path(self, ref: str) -> Optional[str]:
+        return self.backend.local_path(parse_ref(ref))
+
+
+# Global instance
+blob_store = BlobStore()
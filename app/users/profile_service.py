@@ -1,11 +1,13 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.users.profile_models import UserProfile
 
-def get_profile(db: Session, user_id: int):
-    return db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+async def get_profile(db: AsyncSession, user_id: int):
+    result = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+    return result.scalars().first()
 
-def create_or_update_profile(db: Session, user, data):
-    profile = get_profile(db, user.id)
+async def create_or_update_profile(db: AsyncSession, user, data):
+    profile = await get_profile(db, user.id)
 
     if profile:
         for field, value in data.dict().items():
@@ -18,6 +20,6 @@ def create_or_update_profile(db: Session, user, data):
         )
         db.add(profile)
 
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await db.refresh(profile)
     return profile
@@ -0,0 +1,168 @@
+# app/utils/compressed_json.py
+
+"""
+Compressed binary storage for JSON columns.
+
+`CompressedJSON` is a drop-in replacement for `sqlalchemy.JSON`: values
+go in and come out as the same Python objects, but are stored as
+compact JSON compressed with zstd (when `zstandard` is installed) or
+zlib, primed with a preset dictionary of the keys every assessment
+row repeats (the 41 clinical columns and the prediction keys).
+
+Stored layout: [codec byte][dictionary version byte][compressed JSON].
+Rows still holding plain JSON text (written before the switch) decode
+as before, so existing data stays readable until it is migrated.
+"""
+
+import json
+import threading
+import zlib
+
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+from app.utils.column_mapping import COLUMN_RENAME_MAP
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+CODEC_ZLIB = 0x01
+CODEC_ZSTD = 0x02
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Keys and values of the API response that end up in `prediction`
+PREDICTION_TOKENS = (
+    "status", "success", "tabular_risk", "ultrasound_risk",
+    "final_pcos_probability", "risk_level", "HIGH", "MODERATE", "LOW",
+    "prediction", "PCOS", "Non-PCOS", "gradcam_visualization",
+    "predicted_class", "pcos_probability", "non_pcos_probability",
+    "class_index", "confidence", "assessment_date", "assessment_id",
+    "personalized_recommendations", "recommendations_source",
+    "gemini-ai", "fallback", "multimodal_analysis",
+)
+
+
+def _build_dictionary(tokens) -> bytes:
+    # zlib favours the end of a preset dictionary, so the clinical keys
+    # (present on every row) go last
+    return "".join(json.dumps(token) + ":" for token in tokens).encode("utf-8")
+
+
+# Version -> preset dictionary. Never edit a published entry: rows
+# written with it must stay decodable. Add a new version instead.
+DICTIONARIES = {
+    1: _build_dictionary(PREDICTION_TOKENS + tuple(COLUMN_RENAME_MAP)),
+}
+CURRENT_DICTIONARY = max(DICTIONARIES)
+
+
+class _Codecs(threading.local):
+    """
+    zstd (de)compressor objects are not thread-safe and are costly to
+    build with a dictionary, so each thread keeps its own.
+    """
+
+    def __init__(self):
+        self.zstd_compressors = {}
+        self.zstd_decompressors = {}
+
+    def zstd_compressor(self, version):
+        if version not in self.zstd_compressors:
+            self.zstd_compressors[version] = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL, dict_data=_zstd_dict(version)
+            )
+        return self.zstd_compressors[version]
+
+    def zstd_decompressor(self, version):
+        if version not in self.zstd_decompressors:
+            self.zstd_decompressors[version] = zstandard.ZstdDecompressor(
+                dict_data=_zstd_dict(version)
+            )
+        return self.zstd_decompressors[version]
+
+
+_codecs = _Codecs()
+
+
+def _zstd_dict(version):
+    return zstandard.ZstdCompressionDict(
+        DICTIONARIES[version], dict_type=zstandard.DICT_TYPE_RAWCONTENT
+    )
+
+
+# ======================================================
+# ENCODE / DECODE
+# ======================================================
+def encode(value, codec: int = None) -> bytes:
+    if codec is None:
+        codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+    text = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    version = CURRENT_DICTIONARY
+
+    if codec == CODEC_ZSTD:
+        body = _codecs.zstd_compressor(version).compress(text)
+    else:
+        compressor = zlib.compressobj(ZLIB_LEVEL, zdict=DICTIONARIES[version])
+        body = compressor.compress(text) + compressor.flush()
+
+    return bytes((codec, version)) + body
+
+
+def is_compressed(raw) -> bool:
+    return isinstance(raw, (bytes, bytearray, memoryview)) and len(raw) > 2 and raw[0] in (CODEC_ZLIB, CODEC_ZSTD)
+
+
+def decode(raw):
+    if raw is None:
+        return None
+
+    # Plain JSON written before the column was compressed
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if not is_compressed(raw):
+        return json.loads(bytes(raw).decode("utf-8"))
+
+    codec, version = raw[0], raw[1]
+    body = bytes(raw[2:])
+
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed JSON")
+        text = _codecs.zstd_decompressor(version).decompress(body)
+    else:
+        decompressor = zlib.decompressobj(zdict=DICTIONARIES[version])
+        text = decompressor.decompress(body) + decompressor.flush()
+
+    return json.loads(text)
+
+
+# ======================================================
+# COLUMN TYPE
+# ======================================================
+class CompressedJSON(TypeDecorator):
+    """
+    JSON column stored as compressed binary.
+
+    Values are opaque to the database, so JSON path operators are not
+    available; filter on regular columns instead.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode(value)
+
+    def process_result_value(self, value, dialect):
+        return decode(value)
+
+    def result_processor(self, dialect, coltype):
+        # Skip LargeBinary's own processor: it calls bytes() on the raw
+        # value, which fails on legacy rows SQLite returns as str
+        return lambda value: decode(value)
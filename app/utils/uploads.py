@@ -0,0 +1,339 @@
+# app/utils/uploads.py
+
+"""
+Size-bounded upload handling.
+
+Starlette receives and spools the whole multipart body (in memory up to
+UPLOAD_SPOOL_THRESHOLD_MB, then to a temp file) before a handler runs,
+so the body size is capped earlier, by `UploadSizeLimitMiddleware`:
+Content-Length is checked before anything is read and the streamed
+bytes are counted as they arrive.
+
+`read_upload` then sniffs the first chunk (magic bytes, image
+dimensions) and hashes the spooled file in chunks without copying it.
+Consumers get a zero-copy view (`memoryview` or `mmap`), a file object,
+or a path for worker processes.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import struct
+import tempfile
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.formparsers import MultiPartParser
+from starlette.responses import JSONResponse
+
+from app.core.config import (
+    UPLOAD_CHUNK_KB,
+    UPLOAD_SPOOL_THRESHOLD_MB,
+    UPLOAD_MAX_BODY_MB,
+    IMAGE_MIN_SIDE,
+    IMAGE_MAX_PIXELS,
+)
+
+# Starlette's own spool is the only copy of an upload
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_THRESHOLD_MB * 1024 * 1024
+
+KIND_PDF = "pdf"
+KIND_PNG = "png"
+KIND_JPEG = "jpeg"
+KIND_BMP = "bmp"
+
+IMAGE_KINDS = (KIND_PNG, KIND_JPEG, KIND_BMP)
+DOCUMENT_KINDS = (KIND_PDF,) + IMAGE_KINDS
+
+# JPEG start-of-frame markers carry the image dimensions
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+# ======================================================
+# SNIFFING
+# ======================================================
+def sniff_kind(head: bytes) -> Optional[str]:
+    if head.startswith(b"%PDF-"):
+        return KIND_PDF
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return KIND_PNG
+    if head.startswith(b"\xff\xd8\xff"):
+        return KIND_JPEG
+    if head.startswith(b"BM"):
+        return KIND_BMP
+    return None
+
+
+def sniff_dimensions(kind: str, head: bytes) -> Optional[Tuple[int, int]]:
+    """
+    (width, height) from the header bytes, or None if not found
+    within `head`.
+    """
+    try:
+        if kind == KIND_PNG and len(head) >= 24 and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+
+        if kind == KIND_BMP and len(head) >= 26:
+            width, height = struct.unpack("<ii", head[18:26])
+            return abs(width), abs(height)
+
+        if kind == KIND_JPEG:
+            pos = 2
+            while pos + 9 < len(head):
+                if head[pos] != 0xFF:
+                    pos += 1
+                    continue
+                marker = head[pos + 1]
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack(">HH", head[pos + 5:pos + 9])
+                    return width, height
+                if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                    pos += 2 if marker != 0xFF else 1
+                    continue
+                (length,) = struct.unpack(">H", head[pos + 2:pos + 4])
+                pos += 2 + length
+
+    except struct.error:
+        return None
+
+    return None
+
+
+# ======================================================
+# REQUEST BODY LIMIT
+# ======================================================
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware: rejects request bodies over `max_mb` (or the limit
+    of the longest matching prefix in `path_limits`) with a 413 before
+    Starlette spools them. A declared Content-Length over the limit is
+    refused without reading; otherwise bytes are counted as received.
+    """
+
+    def __init__(self, app, max_mb: int = UPLOAD_MAX_BODY_MB, path_limits: Optional[dict] = None):
+        self.app = app
+        self.max_mb = max_mb
+        self.path_limits = sorted((path_limits or {}).items(), key=lambda item: -len(item[0]))
+
+    def _limit_mb(self, path: str) -> int:
+        for prefix, max_mb in self.path_limits:
+            if path.startswith(prefix):
+                return max_mb
+        return self.max_mb
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        max_mb = self._limit_mb(scope["path"])
+        max_bytes = max_mb * 1024 * 1024
+        too_large = HTTPException(status_code=413, detail=f"Request body exceeds {max_mb} MB")
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    return await self._reject(too_large, scope, receive, send)
+                break
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing
+                    raise too_large
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            # Body read outside FastAPI's request parsing
+            if e is not too_large or started:
+                raise
+            await self._reject(too_large, scope, receive, send)
+
+    @staticmethod
+    async def _reject(error: HTTPException, scope, receive, send):
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+        await response(scope, receive, send)
+
+
+# ======================================================
+# SPOOLED UPLOAD
+# ======================================================
+class SpooledUpload:
+    """
+    A validated upload over Starlette's spooled file (in memory below
+    the spool threshold, an anonymous temp file above it). The file is
+    not copied; Starlette closes it after the response.
+    """
+
+    def __init__(self, filename, kind, size, digest, dimensions, file):
+        self.filename = filename
+        self.kind = kind
+        self.size = size
+        self.digest = digest
+        self.dimensions = dimensions
+        self._spooled = file
+        self._data = None
+        self._mmap = None
+        self._worker_copy = None
+
+    @property
+    def on_disk(self) -> bool:
+        # SpooledTemporaryFile._rolled, the same check Starlette makes
+        return getattr(self._spooled, "_rolled", True)
+
+    def _bytes(self) -> bytes:
+        if self._data is None:
+            self._spooled.seek(0)
+            self._data = self._spooled.read()
+        return self._data
+
+    def view(self):
+        """
+        Zero-copy, read-only buffer over the body (memoryview or mmap).
+        Works with np.frombuffer and anything taking the buffer protocol.
+        """
+        if not self.on_disk:
+            return memoryview(self._bytes())
+
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self._spooled.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def open(self):
+        """
+        A file object positioned at the start of the body.
+        """
+        return as_stream(self.view())
+
+    def source(self):
+        """
+        What to hand a worker process: a path to the spooled file when
+        on disk, otherwise the bytes.
+        """
+        if not self.on_disk:
+            return self._bytes()
+
+        # The temp file is unlinked; Linux exposes it through procfs,
+        # which worker processes of the same user can open
+        proc_path = f"/proc/{os.getpid()}/fd/{self._spooled.fileno()}"
+        if os.path.exists(proc_path):
+            return proc_path
+
+        if self._worker_copy is None:
+            with tempfile.NamedTemporaryFile(suffix=f".{self.kind}", delete=False) as copy:
+                self._spooled.seek(0)
+                for chunk in iter(lambda: self._spooled.read(1024 * 1024), b""):
+                    copy.write(chunk)
+            self._worker_copy = copy.name
+        return self._worker_copy
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A decoder still holds a view; the map is freed with it
+                pass
+            self._mmap = None
+        if self._worker_copy and os.path.exists(self._worker_copy):
+            try:
+                os.remove(self._worker_copy)
+            except Exception:
+                pass
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def as_stream(data):
+    """
+    File-like object over bytes, a memoryview of bytes, an mmap or an
+    open file, without copying the body.
+    """
+    if hasattr(data, "read") and hasattr(data, "seek"):
+        data.seek(0)
+        return data
+    if isinstance(data, memoryview) and isinstance(data.obj, (bytes, mmap.mmap)):
+        return as_stream(data.obj)
+    return io.BytesIO(data)
+
+
+# ======================================================
+# READING
+# ======================================================
+async def read_upload(
+    upload: UploadFile,
+    allowed_kinds: Tuple[str, ...],
+    max_mb: int,
+    label: str = "Uploaded file",
+) -> SpooledUpload:
+    """
+    Validates `upload` (already spooled by Starlette) from its first
+    chunk and hashes it in chunks without copying:
+      - 413 if the size exceeds `max_mb`
+      - 400 if empty
+      - 415 if the magic bytes are not one of `allowed_kinds`
+      - 400 if image dimensions are implausible
+    """
+    max_bytes = max_mb * 1024 * 1024
+    chunk_size = UPLOAD_CHUNK_KB * 1024
+
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{label} exceeds {max_mb} MB")
+
+    await upload.seek(0)
+    head = await upload.read(chunk_size)
+    if not head:
+        raise HTTPException(status_code=400, detail=f"{label} is empty")
+
+    kind = sniff_kind(head)
+    if kind not in allowed_kinds:
+        raise HTTPException(
+            status_code=415,
+            detail=f"{label} must be one of: {', '.join(allowed_kinds)}"
+        )
+
+    dimensions = None
+    if kind in IMAGE_KINDS:
+        dimensions = sniff_dimensions(kind, head)
+        if dimensions is not None:
+            width, height = dimensions
+            if min(width, height) < IMAGE_MIN_SIDE or width * height > IMAGE_MAX_PIXELS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{label} has unsupported dimensions {width}x{height}"
+                )
+
+    digest = hashlib.sha256()
+    size = 0
+
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"{label} exceeds {max_mb} MB")
+        digest.update(chunk)
+        chunk = await upload.read(chunk_size)
+
+    return SpooledUpload(upload.filename, kind, size, digest.hexdigest(), dimensions, upload.file)
@@ -0,0 +1,72 @@
+"""
+Fills the promoted clinical columns (PROMOTED_FIELDS) from tabular_data.
+
+Needed once after enabling promoted fields, or after adding a field to
+PROMOTED_FIELDS, for rows written before that. New rows get the values
+when they are saved.
+
+Run from the project root:
+    python scripts/backfill_promoted_fields.py [--batch-size 1000] [--all]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from sqlalchemy import or_, select, update
+
+from app.database import SessionLocal
+from app.init_db import init_db
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.promoted_fields import PROMOTED, promoted_values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="recompute rows that already have values")
+    args = parser.parse_args()
+
+    if not PROMOTED:
+        print("PROMOTED_FIELDS is empty; nothing to do")
+        return
+
+    # Adds the promoted columns and their indexes to older databases
+    init_db()
+
+    columns = [getattr(PCOSAssessment, name) for name in PROMOTED]
+    updated = 0
+    last_id = None
+    start = time.perf_counter()
+
+    while True:
+        with SessionLocal() as db:
+            query = select(PCOSAssessment.id, PCOSAssessment.tabular_data).order_by(PCOSAssessment.id)
+            if not args.all:
+                query = query.where(or_(*[column.is_(None) for column in columns]))
+            if last_id is not None:
+                query = query.where(PCOSAssessment.id > last_id)
+
+            rows = db.execute(query.limit(args.batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            db.execute(
+                update(PCOSAssessment),
+                [{"id": row.id, **promoted_values(row.tabular_data)} for row in rows],
+            )
+            db.commit()
+            updated += len(rows)
+
+        print(f"   ... {updated} rows", end="\r")
+
+    print(f"✅ Backfilled {', '.join(PROMOTED)} on {updated} row(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
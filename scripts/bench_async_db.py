@@ -0,0 +1,162 @@
+"""
+Throughput comparison: sync vs async DB sessions for DB-bound routes
+while the threadpool is busy with blocking inference work.
+
+Sync `def` routes run on FastAPI's threadpool and queue behind
+inference; async routes with AsyncSession stay on the event loop.
+
+Run from the project root:
+    python scripts/bench_async_db.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import anyio
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, create_db_engine, create_async_db_engine
+from app.users.user_models import User
+from app.users.profile_models import UserProfile  # noqa: F401 (registers mapper)
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import build_assessment
+
+# ======================================================
+# CONFIG
+# ======================================================
+THREADPOOL_SIZE = int(os.getenv("BENCH_THREADPOOL", "8"))
+INFERENCE_CLIENTS = int(os.getenv("BENCH_INFERENCE_CLIENTS", "16"))
+INFERENCE_SECONDS = float(os.getenv("BENCH_INFERENCE_SECONDS", "0.2"))
+HISTORY_CLIENTS = int(os.getenv("BENCH_HISTORY_CLIENTS", "32"))
+DURATION_SECONDS = float(os.getenv("BENCH_SECONDS", "10"))
+
+PREDICTION = {
+    "tabular_risk": 0.71, "ultrasound_risk": 0.64,
+    "final_pcos_probability": 0.68, "risk_level": "HIGH",
+}
+
+# ======================================================
+# DATABASE
+# ======================================================
+url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+engine = create_db_engine(url)
+async_engine = create_async_db_engine(url)
+SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+Base.metadata.create_all(bind=engine)
+with SyncSession() as db:
+    user = User(email="bench@example.com", password_hash="x", first_name="B", last_name="B")
+    db.add(user)
+    db.flush()
+    USER_ID = uuid.UUID(user.id)
+    for _ in range(50):
+        db.add(build_assessment(user.id, {"Age (yrs)": 28}, None, PREDICTION))
+    db.commit()
+
+
+def get_sync_db():
+    db = SyncSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_bench_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ======================================================
+# APP
+# ======================================================
+app = FastAPI()
+
+
+@app.get("/infer")
+def infer():
+    # Stands in for TF / CatBoost / Torch work holding a threadpool slot
+    time.sleep(INFERENCE_SECONDS)
+    return {"ok": True}
+
+
+@app.get("/history-sync")
+def history_sync(db: Session = Depends(get_sync_db)):
+    rows = (
+        db.query(PCOSAssessment)
+        .filter(PCOSAssessment.user_id == USER_ID)
+        .order_by(PCOSAssessment.created_at.desc())
+        .limit(10)
+        .all()
+    )
+    return {"count": len(rows)}
+
+
+@app.get("/history-async")
+async def history_async(db: AsyncSession = Depends(get_bench_async_db)):
+    result = await db.execute(
+        select(PCOSAssessment)
+        .where(PCOSAssessment.user_id == USER_ID)
+        .order_by(PCOSAssessment.created_at.desc())
+        .limit(10)
+    )
+    return {"count": len(result.scalars().all())}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(path):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    transport = httpx.ASGITransport(app=app)
+    stop = time.monotonic() + DURATION_SECONDS
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def inference_client():
+            while time.monotonic() < stop:
+                await client.get("/infer")
+
+        async def history_client():
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(
+            *[inference_client() for _ in range(INFERENCE_CLIENTS)],
+            *[history_client() for _ in range(HISTORY_CLIENTS)],
+        )
+
+    print(
+        f"  {path:<15} {len(latencies) / DURATION_SECONDS:8.1f} req/s"
+        f"  p50 {percentile(latencies, 50) * 1000:7.2f} ms"
+        f"  p99 {percentile(latencies, 99) * 1000:7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    print(
+        f"🔄 threadpool={THREADPOOL_SIZE}, {INFERENCE_CLIENTS} inference clients "
+        f"({INFERENCE_SECONDS * 1000:.0f} ms each), {HISTORY_CLIENTS} history clients, "
+        f"{DURATION_SECONDS:.0f}s per route"
+    )
+    asyncio.run(run("/history-sync"))
+    asyncio.run(run("/history-async"))
@@ -0,0 +1,133 @@
+"""
+Cohort filters: JSON scan vs promoted, indexed columns.
+
+Builds a SQLite table of synthetic assessments holding both the plain
+JSON tabular_data (queried with json_extract, i.e. a full scan) and
+the promoted columns with their indexes, then times the same cohort
+filters both ways.
+
+Run from the project root:
+    python scripts/bench_cohort_queries.py              # 1,000,000 rows
+    BENCH_ROWS=100000 python scripts/bench_cohort_queries.py
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.assessments.promoted_fields import CATALOGUE
+
+# ======================================================
+# CONFIG
+# ======================================================
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+REPEATS = int(os.getenv("BENCH_REPEATS", "5"))
+BATCH = 20_000
+
+FIELDS = ("amh", "bmi", "lh_fsh_ratio", "cycle_regular")
+
+# (label, JSON-scan WHERE, promoted-column WHERE)
+QUERIES = [
+    (
+        "AMH 8-12",
+        "json_extract(tabular_data, '$.\"AMH(ng/mL)\"') BETWEEN 8 AND 12",
+        "amh BETWEEN 8 AND 12",
+    ),
+    (
+        "BMI >= 35, HIGH risk",
+        "json_extract(tabular_data, '$.BMI') >= 35 AND risk_level = 'HIGH'",
+        "bmi >= 35 AND risk_level = 'HIGH'",
+    ),
+    (
+        "LH:FSH > 3, irregular",
+        "json_extract(tabular_data, '$.\"LH(mIU/mL)\"')"
+        " / json_extract(tabular_data, '$.\"FSH(mIU/mL)\"') > 3"
+        " AND json_extract(tabular_data, '$.\"Cycle(R/I)\"') = 'I'",
+        "lh_fsh_ratio > 3 AND cycle_regular = 0",
+    ),
+]
+
+
+def synthetic_tabular(rng):
+    return {
+        "Age (yrs)": rng.randint(18, 45),
+        "BMI": round(rng.gauss(26, 5), 1),
+        "Cycle(R/I)": rng.choice("RRI"),
+        "Cycle length(days)": rng.randint(21, 45),
+        "FSH(mIU/mL)": round(rng.uniform(2, 12), 2),
+        "LH(mIU/mL)": round(rng.uniform(2, 25), 2),
+        "AMH(ng/mL)": round(rng.lognormvariate(1.3, 0.6), 2),
+        "TSH (mIU/L)": round(rng.uniform(0.5, 5), 2),
+        "Follicle No. (L)": rng.randint(0, 20),
+        "Follicle No. (R)": rng.randint(0, 20),
+    }
+
+
+def build(path):
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE assessments ("
+        " id INTEGER PRIMARY KEY, created_at TEXT, risk_level TEXT,"
+        " final_pcos_probability REAL, tabular_data TEXT,"
+        " amh REAL, bmi REAL, lh_fsh_ratio REAL, cycle_regular BOOLEAN)"
+    )
+
+    rng = random.Random(42)
+    for offset in range(0, ROWS, BATCH):
+        batch = []
+        for i in range(offset, min(offset + BATCH, ROWS)):
+            tabular = synthetic_tabular(rng)
+            probability = rng.random()
+            risk = "LOW" if probability < 0.3 else "MODERATE" if probability < 0.6 else "HIGH"
+            promoted = [CATALOGUE[name].extract(tabular) for name in FIELDS]
+            batch.append((i, f"2026-01-01 00:00:{i:07d}", risk, probability, json.dumps(tabular), *promoted))
+        db.executemany("INSERT INTO assessments VALUES (?,?,?,?,?,?,?,?,?)", batch)
+    db.commit()
+
+    for column in FIELDS + ("risk_level",):
+        db.execute(f"CREATE INDEX ix_{column} ON assessments ({column})")
+    db.execute("ANALYZE")
+    db.commit()
+    return db
+
+
+def timed(db, where):
+    latencies = []
+    count = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        count = db.execute(f"SELECT COUNT(*) FROM (SELECT id FROM assessments WHERE {where})").fetchone()[0]
+        latencies.append(time.perf_counter() - start)
+    return count, min(latencies)
+
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "cohort.db")
+
+    print(f"🔄 Building {ROWS:,} synthetic assessments ...")
+    start = time.perf_counter()
+    db = build(path)
+    print(f"   built in {time.perf_counter() - start:.0f}s, {os.path.getsize(path) / 1024 / 1024:.0f} MB")
+
+    for label, json_where, promoted_where in QUERIES:
+        json_count, json_seconds = timed(db, json_where)
+        promoted_count, promoted_seconds = timed(db, promoted_where)
+        plan = db.execute(f"EXPLAIN QUERY PLAN SELECT id FROM assessments WHERE {promoted_where}").fetchall()
+
+        print(f"  {label}")
+        print(f"    json_extract scan  {json_seconds * 1000:9.1f} ms  rows={json_count}")
+        print(f"    promoted columns   {promoted_seconds * 1000:9.1f} ms  rows={promoted_count}"
+              f"  ({json_seconds / max(promoted_seconds, 1e-9):.0f}x)")
+        print(f"    plan: {'; '.join(step[-1] for step in plan)}")
+
+    db.close()
+    os.remove(path)
+    os.rmdir(workdir)
@@ -0,0 +1,168 @@
+"""
+Size and read-latency report: plain JSON vs CompressedJSON columns.
+
+Builds two SQLite databases with the same synthetic assessments (all
+41 clinical fields in tabular_data, a post-blob-store prediction),
+one with JSON columns and one with CompressedJSON, then reports
+file size, bytes per row, point-read latency and full-scan decode
+throughput.
+
+Run from the project root:
+    python scripts/bench_compressed_json.py             # 1,000,000 rows
+    BENCH_ROWS=100000 python scripts/bench_compressed_json.py
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from sqlalchemy import Column, Float, Integer, JSON, MetaData, String, Table, create_engine, insert, select
+
+from app.utils.column_mapping import COLUMN_RENAME_MAP
+from app.utils.compressed_json import CompressedJSON, CODEC_ZLIB, CODEC_ZSTD, encode, zstandard
+
+# ======================================================
+# CONFIG
+# ======================================================
+ROWS = int(os.getenv("BENCH_ROWS", "1000000"))
+BATCH = 10_000
+POINT_READS = int(os.getenv("BENCH_POINT_READS", "5000"))
+SCAN_ROWS = int(os.getenv("BENCH_SCAN_ROWS", "100000"))
+
+YES_NO = {k for k in COLUMN_RENAME_MAP if "(Y/N)" in k}
+
+
+def synthetic_row(rng, i):
+    tabular = {
+        key: (rng.randint(0, 1) if key in YES_NO else round(rng.uniform(0, 120), 2))
+        for key in COLUMN_RENAME_MAP
+    }
+    probability = round(rng.random(), 4)
+    prediction = {
+        "status": "success",
+        "tabular_risk": round(rng.random(), 4),
+        "ultrasound_risk": round(rng.random(), 4),
+        "final_pcos_probability": probability,
+        "risk_level": "HIGH" if probability >= 0.6 else "MODERATE" if probability >= 0.3 else "LOW",
+        "prediction": "PCOS" if probability > 0.5 else "Non-PCOS",
+        "gradcam_visualization": {
+            "predicted_class": "PCOS",
+            "pcos_probability": probability,
+            "non_pcos_probability": round(1 - probability, 4),
+            "confidence": probability,
+            "class_index": 1,
+        },
+        "confidence": round(probability * 100, 1),
+        "assessment_date": None,
+        "personalized_recommendations": None,
+        "recommendations_source": "fallback",
+    }
+    return {
+        "id": i,
+        "uid": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "final_pcos_probability": probability,
+        "tabular_data": tabular,
+        "prediction": prediction,
+    }
+
+
+def build(path, json_type):
+    engine = create_engine(f"sqlite:///{path}")
+    metadata = MetaData()
+    table = Table(
+        "assessments", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("uid", String(32)),
+        Column("final_pcos_probability", Float),
+        Column("tabular_data", json_type),
+        Column("prediction", json_type),
+    )
+    metadata.create_all(engine)
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, ROWS, BATCH):
+            conn.execute(insert(table), [synthetic_row(rng, i) for i in range(offset, min(offset + BATCH, ROWS))])
+    load_seconds = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+
+    return engine, table, load_seconds
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def report(label, path, engine, table, load_seconds):
+    size = os.path.getsize(path)
+
+    rng = random.Random(7)
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(POINT_READS):
+            row_id = rng.randrange(ROWS)
+            start = time.perf_counter()
+            row = conn.execute(select(table.c.tabular_data, table.c.prediction).where(table.c.id == row_id)).one()
+            latencies.append(time.perf_counter() - start)
+            assert row.tabular_data and row.prediction
+
+        start = time.perf_counter()
+        scanned = 0
+        for row in conn.execute(select(table.c.tabular_data, table.c.prediction).limit(SCAN_ROWS)):
+            scanned += 1
+        scan_seconds = time.perf_counter() - start
+
+    print(
+        f"  {label:<16} {size / 1024 / 1024:9.1f} MB  {size / ROWS:7.0f} B/row"
+        f"  load {ROWS / load_seconds:8.0f} rows/s"
+        f"  point read p50 {percentile(latencies, 50) * 1e6:6.1f} us p99 {percentile(latencies, 99) * 1e6:6.1f} us"
+        f"  scan {scanned / scan_seconds:8.0f} rows/s"
+    )
+
+
+class ZlibJSON(CompressedJSON):
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode(value, CODEC_ZLIB)
+
+
+if __name__ == "__main__":
+    print(f"🔄 {ROWS:,} synthetic assessments (SQLite, VACUUMed)")
+
+    sample = synthetic_row(random.Random(1), 0)
+    plain = len(json.dumps(sample["tabular_data"])) + len(json.dumps(sample["prediction"]))
+    print(f"  sample row JSON: {plain} B plain", end="")
+    for name, codec in (("zlib", CODEC_ZLIB), ("zstd", CODEC_ZSTD)):
+        if codec == CODEC_ZSTD and zstandard is None:
+            continue
+        packed = len(encode(sample["tabular_data"], codec)) + len(encode(sample["prediction"], codec))
+        print(f", {packed} B {name}", end="")
+    print()
+
+    variants = [("JSON (text)", JSON), ("zlib + dict", ZlibJSON)]
+    if zstandard is not None:
+        variants.append(("zstd + dict", CompressedJSON))
+
+    workdir = tempfile.mkdtemp()
+    try:
+        for label, json_type in variants:
+            path = os.path.join(workdir, f"{len(os.listdir(workdir))}.db")
+            engine, table, load_seconds = build(path, json_type)
+            report(label, path, engine, table, load_seconds)
+            engine.dispose()
+            os.remove(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
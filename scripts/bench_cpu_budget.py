@@ -0,0 +1,133 @@
+"""
+Prediction throughput and tail latency per CPU thread budget.
+
+Thread pools are sized once per process, so every budget in
+BENCH_BUDGETS runs in a fresh process with CPU_THREADS=<budget>. That
+process loads and warms the models, then runs BENCH_REQUESTS
+predictions at each concurrency in BENCH_CONCURRENCY. Each prediction
+is the CPU part of /api/pcos/predict: multimodal_service.predict_pcos
+plus the Grad-CAM heatmap (Gemini is a network call and is skipped).
+
+Reports predictions/s, p50 and p99 per (budget, concurrency). Pick
+the budget with the best throughput at an acceptable p99 for the
+node's core count, then cap concurrency near that point.
+
+Run from the project root:
+    python scripts/bench_cpu_budget.py
+    BENCH_BUDGETS=1,2,4,8 BENCH_CONCURRENCY=1,2,4,8,16 BENCH_REQUESTS=64 python scripts/bench_cpu_budget.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# ======================================================
+# CONFIG
+# ======================================================
+CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+BUDGETS = [int(b) for b in os.getenv("BENCH_BUDGETS", ",".join(str(b) for b in (1, 2, 4, 8) if b <= CPUS) or "1").split(",")]
+CONCURRENCY = [int(c) for c in os.getenv("BENCH_CONCURRENCY", "1,2,4,8").split(",")]
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "32"))
+
+TABULAR = {
+    "Age (yrs)": 28,
+    "Weight (Kg)": 62,
+    "Height(Cm)": 160,
+    "BMI": 24.2,
+    "Cycle(R/I)": 4,
+    "Cycle length(days)": 5,
+    "LH(mIU/mL)": 9.1,
+    "FSH(mIU/mL)": 5.2,
+    "AMH(ng/mL)": 6.3,
+    "Follicle No. (L)": 12,
+    "Follicle No. (R)": 13,
+    "Endometrium (mm)": 8.5,
+}
+
+
+def synthetic_ultrasound() -> bytes:
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (600, 800), dtype=np.uint8), (9, 9), 0)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def run_budget():
+    """
+    Child: one budget (CPU_THREADS from the environment), every concurrency.
+    """
+    from app.core import cpu_budget
+    from app.core.startup import startup_event
+    from app.core.warmup import run_warmup
+
+    startup_event()
+    run_warmup()
+
+    from app.services import multimodal_service
+    from app.services.gradcam_service import gradcam_service
+
+    image = synthetic_ultrasound()
+
+    def predict():
+        start = time.perf_counter()
+        multimodal_service.predict_pcos(tabular_data=TABULAR, ultrasound_bytes=image)
+        if gradcam_service:
+            gradcam_service.generate_heatmap(image)
+        return time.perf_counter() - start
+
+    for concurrency in CONCURRENCY:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            latencies = sorted(pool.map(lambda _: predict(), range(REQUESTS)))
+            elapsed = time.perf_counter() - start
+
+        print(json.dumps({
+            "budget": cpu_budget.threads("tensorflow"),
+            "concurrency": concurrency,
+            "throughput": REQUESTS / elapsed,
+            "p50": latencies[len(latencies) // 2],
+            "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_budget()
+        sys.exit(0)
+
+    print(f"🔄 {REQUESTS} predictions per point, {CPUS} CPU(s), budgets {BUDGETS}, concurrency {CONCURRENCY}")
+    print(f"  {'budget':>6}  {'conc':>4}  {'pred/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}")
+
+    for budget in BUDGETS:
+        env = dict(
+            os.environ,
+            CPU_THREADS=str(budget),
+            JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "bench-secret"),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        )
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child"],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"  {budget:>6}  failed: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+
+        for line in proc.stdout.splitlines():
+            result = json.loads(line) if line.startswith("{") else {}
+            if "concurrency" not in result:
+                continue  # log output
+            print(
+                f"  {result['budget']:>6}  {result['concurrency']:>4}  {result['throughput']:8.2f}  "
+                f"{result['p50'] * 1000:8.1f}  {result['p99'] * 1000:8.1f}"
+            )
@@ -0,0 +1,158 @@
+"""
+Concurrency benchmark: mixed assessment-history reads and assessment
+writes against SQLite, with the library defaults vs the tuned settings
+from app/database.py (WAL, synchronous=NORMAL, busy timeout, mmap).
+
+Run from the project root:
+    python scripts/bench_db_concurrency.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.users.user_models import User
+from app.users.profile_models import UserProfile  # noqa: F401 (registers mapper)
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import build_assessment
+
+# ======================================================
+# CONFIG
+# ======================================================
+READER_THREADS = int(os.getenv("BENCH_READERS", "8"))
+WRITER_THREADS = int(os.getenv("BENCH_WRITERS", "2"))
+DURATION_SECONDS = float(os.getenv("BENCH_SECONDS", "10"))
+USERS = 20
+SEED_ASSESSMENTS_PER_USER = 50
+
+TABULAR = {
+    "Age (yrs)": 28, "BMI": 24.5, "Cycle(R/I)": "I", "Cycle length(days)": 45,
+    "LH(mIU/mL)": 12.5, "FSH(mIU/mL)": 5.2, "AMH(ng/mL)": 8.4,
+    "Follicle No. (L)": 14, "Follicle No. (R)": 12,
+}
+PREDICTION = {
+    "tabular_risk": 0.71, "ultrasound_risk": 0.64,
+    "final_pcos_probability": 0.68, "risk_level": "HIGH",
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def seed(Session):
+    user_ids = []
+    with Session() as db:
+        for i in range(USERS):
+            user = User(
+                email=f"bench{i}@example.com",
+                password_hash="x",
+                first_name="Bench",
+                last_name=str(i),
+            )
+            db.add(user)
+            db.flush()
+            user_ids.append(user.id)
+            for _ in range(SEED_ASSESSMENTS_PER_USER):
+                db.add(PCOSAssessment(
+                    user_id=uuid.UUID(user.id),
+                    tabular_data=TABULAR,
+                    tabular_risk=PREDICTION["tabular_risk"],
+                    ultrasound_risk=PREDICTION["ultrasound_risk"],
+                    final_pcos_probability=PREDICTION["final_pcos_probability"],
+                    risk_level=PREDICTION["risk_level"],
+                    prediction=PREDICTION,
+                ))
+        db.commit()
+    return user_ids
+
+
+def run(label, sqlite_pragmas):
+    tmp_dir = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine = create_db_engine(url, sqlite_pragmas=sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user_ids = seed(Session)
+
+    stop = time.monotonic() + DURATION_SECONDS
+    lock = threading.Lock()
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+
+    def reader(n):
+        user_id = uuid.UUID(user_ids[n % len(user_ids)])
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    (
+                        db.query(PCOSAssessment)
+                        .filter(PCOSAssessment.user_id == user_id)
+                        .order_by(PCOSAssessment.created_at.desc())
+                        .limit(10)
+                        .all()
+                    )
+            except Exception:
+                with lock:
+                    errors["read"] += 1
+                continue
+            with lock:
+                latencies["read"].append(time.perf_counter() - start)
+
+    def writer(n):
+        user_id = user_ids[n % len(user_ids)]
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.add(build_assessment(user_id, TABULAR, None, PREDICTION))
+                    db.commit()
+            except Exception:
+                with lock:
+                    errors["write"] += 1
+                continue
+            with lock:
+                latencies["write"].append(time.perf_counter() - start)
+
+    threads = (
+        [threading.Thread(target=reader, args=(i,)) for i in range(READER_THREADS)]
+        + [threading.Thread(target=writer, args=(i,)) for i in range(WRITER_THREADS)]
+    )
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    engine.dispose()
+
+    print(f"\n{label}")
+    for op in ("read", "write"):
+        values = latencies[op]
+        print(
+            f"  {op:<5} {len(values) / DURATION_SECONDS:8.1f} ops/s"
+            f"  p50 {percentile(values, 50) * 1000:7.2f} ms"
+            f"  p99 {percentile(values, 99) * 1000:7.2f} ms"
+            f"  errors {errors[op]}"
+        )
+
+
+if __name__ == "__main__":
+    print(
+        f"🔄 {READER_THREADS} readers + {WRITER_THREADS} writers, "
+        f"{DURATION_SECONDS:.0f}s per configuration"
+    )
+    run("SQLite defaults (rollback journal, synchronous=FULL)", sqlite_pragmas=False)
+    run("Tuned (WAL, synchronous=NORMAL, busy_timeout, mmap)", sqlite_pragmas=True)
@@ -0,0 +1,142 @@
+"""
+Login throughput: bcrypt inline vs threadpool vs process pool.
+
+Creates users in a scratch SQLite database, then fires concurrent
+POST /api/auth/login requests at the auth router (in-process ASGI)
+while a probe hits a trivial endpoint every 10 ms. Reports logins/s
+and the probe's delay, which shows how long the event loop is
+blocked.
+
+Modes:
+  inline   - bcrypt on the event loop (the old behaviour)
+  thread   - PASSWORD_HASH_WORKERS=0, Starlette threadpool
+  process  - PASSWORD_HASH_WORKERS=N worker processes
+
+Run from the project root:
+    python scripts/bench_login.py
+    BENCH_LOGINS=200 BENCH_CONCURRENCY=32 PASSWORD_BCRYPT_ROUNDS=10 python scripts/bench_login.py
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# ======================================================
+# CONFIG
+# ======================================================
+LOGINS = int(os.getenv("BENCH_LOGINS", "64"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "16"))
+USERS = int(os.getenv("BENCH_USERS", "16"))
+PASSWORD = "correct horse battery staple"
+
+
+async def run_mode(mode: str):
+    import httpx
+    from fastapi import FastAPI
+
+    from app.database import AsyncSessionLocal
+    from app.init_db import init_db
+    from app.api.auth import router as auth_router
+    from app.auth import auth_service, password_utils
+    from app.users.user_models import User
+
+    if mode == "inline":
+        async def verify_inline(password, hash):
+            return password_utils.verify_password(password, hash)
+
+        async def hash_inline(password):
+            return password_utils.hash_password(password)
+
+        auth_service.verify_password_async = verify_inline
+        auth_service.hash_password_async = hash_inline
+
+    init_db()
+    hashed = password_utils.hash_password(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            User(email=f"user{i}@example.com", password_hash=hashed, first_name="B", last_name="U")
+            for i in range(USERS)
+        ])
+        await db.commit()
+
+    password_utils.start_password_pool()
+
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # Sleep + request; anything over the 10 ms sleep is time the
+            # loop was busy elsewhere
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                await client.get("/ping")
+                probe_latencies.append(time.perf_counter() - start - 0.01)
+
+        slots = asyncio.Semaphore(CONCURRENCY)
+        failures = 0
+
+        async def login(i):
+            nonlocal failures
+            async with slots:
+                response = await client.post(
+                    "/api/auth/login",
+                    json={"email": f"user{i % USERS}@example.com", "password": PASSWORD},
+                )
+                failures += response.status_code != 200
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(LOGINS)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    password_utils.shutdown_password_pool()
+
+    probe_latencies.sort()
+    p99 = probe_latencies[min(len(probe_latencies) - 1, int(len(probe_latencies) * 0.99))]
+    print(
+        f"  {mode:<8} {LOGINS / elapsed:7.1f} logins/s   "
+        f"probe delay p50 {statistics.median(probe_latencies) * 1000:7.1f} ms  "
+        f"p99 {p99 * 1000:7.1f} ms  failures={failures}"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        asyncio.run(run_mode(sys.argv[1]))
+        sys.exit(0)
+
+    workers = os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+    print(
+        f"🔄 {LOGINS} logins, concurrency {CONCURRENCY}, "
+        f"bcrypt cost {os.getenv('PASSWORD_BCRYPT_ROUNDS', '12')}, {os.cpu_count()} CPU(s)"
+    )
+
+    # Each mode in a fresh process with its own scratch database
+    for mode, hash_workers in (("inline", "0"), ("thread", "0"), ("process", workers)):
+        workdir = tempfile.mkdtemp()
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            PASSWORD_HASH_WORKERS=hash_workers,
+            JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "bench-secret"),
+        )
+        subprocess.run([sys.executable, __file__, mode], env=env, check=True)
@@ -0,0 +1,79 @@
+"""
+Exports assessments to CSV or Parquet for research / retraining.
+
+Rows are streamed in batches, so memory use does not grow with the
+table. For nightly incremental exports pass the `until` printed by the
+previous run as --since.
+
+Run from the project root:
+    python scripts/export_assessments.py --format parquet --output exports/all.parquet
+    python scripts/export_assessments.py --since 2026-01-01T00:00:00+00:00 > new.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.database import SessionLocal
+from app.assessments.export_service import (
+    EXPORT_FORMATS,
+    check_format,
+    export_watermark,
+    iter_batches,
+    iter_csv,
+    iter_parquet,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", help="file to write (default: stdout, CSV only)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only rows stored after this (the previous run's until)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    check_format(args.format)
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for parquet")
+
+    until = export_watermark()
+    exported = 0
+    start = time.perf_counter()
+
+    def counted(batches):
+        nonlocal exported
+        for batch in batches:
+            exported += len(batch)
+            yield batch
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        out = open(args.output, "w" if args.format == "csv" else "wb", newline="" if args.format == "csv" else None)
+    else:
+        out = sys.stdout
+
+    try:
+        with SessionLocal() as db:
+            batches = counted(iter_batches(db, since=args.since, until=until, batch_size=args.batch_size))
+            chunks = iter_csv(batches) if args.format == "csv" else iter_parquet(batches)
+            for chunk in chunks:
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(
+        f"✅ Exported {exported} assessment(s) in {time.perf_counter() - start:.1f}s; "
+        f"next incremental run: --since {until.isoformat()}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
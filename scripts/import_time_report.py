@@ -0,0 +1,128 @@
+"""
+Import-time report for the API (a summary of `python -X importtime`).
+
+Imports app.main in a fresh interpreter with -X importtime and
+reports:
+  - wall time of `import app.main`
+  - the slowest top-level packages (self time summed over every
+    module in the package)
+  - the slowest app.* modules (cumulative, i.e. including what they
+    pulled in)
+  - which heavy ML / parsing dependencies were imported at all
+
+Run from the project root:
+    python scripts/import_time_report.py
+    ENABLED_SUBSYSTEMS=auth python scripts/import_time_report.py
+    python scripts/import_time_report.py --top 30 --raw importtime.txt
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only be imported by the subsystem that needs them
+HEAVY_PACKAGES = (
+    "tensorflow",
+    "keras",
+    "torch",
+    "torchvision",
+    "catboost",
+    "skimage",
+    "cv2",
+    "pandas",
+    "camelot",
+    "pdfplumber",
+    "pytesseract",
+    "pypdfium2",
+    "google.generativeai",
+    "pyarrow",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_PROBE = (
+    "import time; start = time.perf_counter(); "
+    "import app.main; "
+    "print(f'__import_seconds__ {time.perf_counter() - start:.4f}')"
+)
+
+
+def run_importtime():
+    env = dict(os.environ, PYTHONPATH=BASE_DIR)
+    env.setdefault("JWT_SECRET_KEY", "import-report")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    return proc
+
+
+def parse(stderr: str):
+    """
+    [(module, self_us, cumulative_us)] in import order.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--raw", help="also write the raw -X importtime output to this file")
+    args = parser.parse_args()
+
+    proc = run_importtime()
+    if args.raw:
+        with open(args.raw, "w") as f:
+            f.write(proc.stderr)
+
+    modules = parse(proc.stderr)
+    seconds = re.search(r"__import_seconds__ ([\d.]+)", proc.stdout)
+
+    print(f"🔄 import app.main  (ENABLED_SUBSYSTEMS={os.getenv('ENABLED_SUBSYSTEMS', '<all>')})")
+    if proc.returncode != 0:
+        # Still useful: shows what was imported before the failure
+        print(f"❌ import failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    else:
+        print(f"   wall time       {float(seconds.group(1)) * 1000:9.1f} ms")
+    print(f"   modules         {len(modules):9d}")
+    print(f"   sum of self     {sum(m[1] for m in modules) / 1000:9.1f} ms")
+
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"\nSlowest packages (self time, all submodules):")
+    for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"   {us / 1000:9.1f} ms  {package}")
+
+    print(f"\nSlowest app modules (cumulative):")
+    app_modules = [m for m in modules if m[0] == "app" or m[0].startswith("app.")]
+    for name, _, cumulative_us in sorted(app_modules, key=lambda m: -m[2])[:args.top]:
+        print(f"   {cumulative_us / 1000:9.1f} ms  {name}")
+
+    imported = {m[0] for m in modules}
+    missing = set(re.findall(r"No module named '([^']+)'", proc.stderr))
+    print(f"\nHeavy dependencies:")
+    for package in HEAVY_PACKAGES:
+        state = "missing" if package in missing else "imported" if package in imported else "-"
+        print(f"   {state:>8}  {package}")
+
+    sys.exit(proc.returncode)
+
+
+if __name__ == "__main__":
+    main()
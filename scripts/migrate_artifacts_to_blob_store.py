@@ -0,0 +1,89 @@
+"""
+Moves base64 Grad-CAM images out of existing assessment rows.
+
+For every row whose `prediction` JSON still embeds the heatmaps, the
+PNGs are written to the blob store, the row gets heatmap_*_ref and the
+images are removed from the JSON. Prints row size before and after.
+
+Run from the project root:
+    python scripts/migrate_artifacts_to_blob_store.py [--batch-size 200] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.database import SessionLocal
+from app.init_db import init_db
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import store_artifacts, HEATMAP_REF_COLUMNS
+
+
+def has_inline_images(prediction) -> bool:
+    gradcam = (prediction or {}).get("gradcam_visualization") or {}
+    return any(key in gradcam for key in HEATMAP_REF_COLUMNS)
+
+
+def row_bytes(assessment) -> int:
+    return len(json.dumps(assessment.prediction)) + len(json.dumps(assessment.tabular_data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    # Adds the *_ref columns to older databases
+    init_db()
+
+    migrated = 0
+    before = after = 0
+    last_id = None
+
+    while True:
+        with SessionLocal() as db:
+            query = db.query(PCOSAssessment).order_by(PCOSAssessment.id)
+            if last_id is not None:
+                query = query.filter(PCOSAssessment.id > last_id)
+            batch = query.limit(args.batch_size).all()
+
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for assessment in batch:
+                if not has_inline_images(assessment.prediction):
+                    continue
+
+                before += row_bytes(assessment)
+                if args.dry_run:
+                    continue
+
+                refs, prediction = store_artifacts(prediction=assessment.prediction)
+                for column, ref in refs.items():
+                    setattr(assessment, column, ref)
+                assessment.prediction = prediction
+
+                after += row_bytes(assessment)
+                migrated += 1
+
+            if not args.dry_run:
+                db.commit()
+
+    print(f"✅ Migrated {migrated} assessment(s)")
+    if migrated:
+        print(
+            f"   JSON payload: {before / 1024:.1f} KB -> {after / 1024:.1f} KB"
+            f" ({before / max(after, 1):.0f}x smaller)"
+        )
+    elif args.dry_run and before:
+        print(f"   {before / 1024:.1f} KB of rows would be rewritten")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Rewrites assessment JSON columns in the compressed binary format.
+
+Rows are processed in id order, `--batch-size` per transaction, so the
+migration can be stopped and re-run: rows already compressed are
+skipped. Reads work throughout since CompressedJSON still decodes
+plain JSON rows.
+
+Run from the project root:
+    python scripts/migrate_compress_json.py [--batch-size 1000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils.compressed_json import encode, decode, is_compressed
+
+TABLE = "pcos_assessments"
+COLUMNS = ("tabular_data", "prediction")
+
+
+def prepare_columns(conn):
+    """
+    SQLite stores any value in any column. PostgreSQL needs the json
+    columns converted to bytea first (existing values become UTF-8
+    JSON bytes, which CompressedJSON reads as legacy rows).
+    """
+    if engine.dialect.name == "postgresql":
+        for column in COLUMNS:
+            conn.execute(text(
+                f"ALTER TABLE {TABLE} ALTER COLUMN {column} TYPE bytea"
+                f" USING convert_to({column}::text, 'UTF8')"
+            ))
+    elif engine.dialect.name != "sqlite":
+        raise SystemExit(
+            f"Convert {TABLE}.{', '.join(COLUMNS)} to a binary type before running this on {engine.dialect.name}"
+        )
+
+
+def to_value(raw):
+    # Drivers that parse json columns hand back Python objects
+    if isinstance(raw, (dict, list)):
+        return raw
+    return decode(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        prepare_columns(conn)
+
+    rewritten = skipped = 0
+    before = after = 0
+    last_id = None
+    start = time.perf_counter()
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM {TABLE}"
+                    + (" WHERE id > :last_id" if last_id is not None else "")
+                    + " ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": args.batch_size},
+            ).all()
+
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row in rows:
+                raws = row[1:]
+                if all(raw is None or is_compressed(raw) for raw in raws):
+                    skipped += 1
+                    continue
+
+                values = {}
+                for column, raw in zip(COLUMNS, raws):
+                    encoded = None if raw is None else encode(to_value(raw))
+                    values[column] = encoded
+                    before += len(raw if not isinstance(raw, (dict, list)) else json.dumps(raw))
+                    after += len(encoded or b"")
+                updates.append({"id": row[0], **values})
+
+            if updates:
+                conn.execute(
+                    text(
+                        f"UPDATE {TABLE} SET "
+                        + ", ".join(f"{c} = :{c}" for c in COLUMNS)
+                        + " WHERE id = :id"
+                    ),
+                    updates,
+                )
+                rewritten += len(updates)
+
+        print(f"   ... {rewritten} rewritten, {skipped} already compressed", end="\r")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Rewrote {rewritten} row(s), skipped {skipped}, in {elapsed:.1f}s          ")
+    if rewritten:
+        print(f"   JSON columns: {before / 1024:.1f} KB -> {after / 1024:.1f} KB ({before / max(after, 1):.1f}x)")
+    if engine.dialect.name == "sqlite" and rewritten:
+        print("   Run VACUUM to return the freed pages to the filesystem")
+
+
+if __name__ == "__main__":
+    main()
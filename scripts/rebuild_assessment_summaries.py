@@ -0,0 +1,30 @@
+"""
+Recomputes the assessment summary tables from pcos_assessments.
+
+Use after backfills, bulk imports or manual edits that bypass
+save_assessment / the write-behind writer.
+
+Run from the project root:
+    python scripts/rebuild_assessment_summaries.py
+"""
+
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app.database import SessionLocal
+from app.init_db import init_db
+from app.assessments.summary_service import rebuild_summaries
+
+
+if __name__ == "__main__":
+    init_db()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        counted = rebuild_summaries(db)
+
+    print(f"✅ Rebuilt summaries from {counted} assessment(s) in {time.perf_counter() - start:.1f}s")
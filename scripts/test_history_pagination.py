@@ -0,0 +1,119 @@
+"""
+Keyset pagination over assessments written in both created_at formats.
+
+Rows saved while created_at had a server default hold SQLite's
+CURRENT_TIMESTAMP ("YYYY-MM-DD HH:MM:SS", no fractional seconds);
+newer rows hold "YYYY-MM-DD HH:MM:SS.ffffff". This builds a scratch
+SQLite database with both kinds (including several legacy rows in the
+same second), runs init_db, then pages the history and cohort queries
+at every page size and checks that each row comes back exactly once,
+newest first.
+
+Run from the project root:
+    python scripts/test_history_pagination.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+SCRATCH = tempfile.mkdtemp(prefix="pcos-pagination-")
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH}/pcos.db"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, AsyncSessionLocal, engine
+from app.init_db import init_db
+from app.users.user_models import User
+from app.assessments.assessment_model import PCOSAssessment
+from app.assessments.assessment_service import build_assessment, list_assessments, cohort_assessments
+
+PREDICTION = {
+    "tabular_risk": 0.4,
+    "ultrasound_risk": 0.5,
+    "final_pcos_probability": 0.45,
+    "risk_level": "MODERATE",
+}
+LEGACY_TIMES = [
+    "2026-01-09 14:32:58",
+    "2026-01-09 15:06:48",
+    "2026-01-09 15:06:48",
+    "2026-01-09 15:06:48",
+    "2026-01-10 10:57:25",
+]
+
+
+def seed():
+    init_db()
+    user_id = str(uuid.uuid4())
+    ids = []
+
+    with SessionLocal() as db:
+        db.add(User(id=user_id, email="pager@example.com", password_hash="x", first_name="P", last_name="Q"))
+
+        # Legacy rows: written by the ORM, then given the old text format
+        legacy = [build_assessment(user_id, {}, None, PREDICTION) for _ in LEGACY_TIMES]
+        # Current rows, after the legacy ones
+        start = datetime(2026, 1, 11, 9, 0, tzinfo=timezone.utc)
+        current = [
+            build_assessment(user_id, {}, None, PREDICTION, created_at=start + timedelta(minutes=i, microseconds=i * 1000))
+            for i in range(4)
+        ]
+        db.add_all(legacy + current)
+        db.commit()
+
+        for row, created_at in zip(legacy, LEGACY_TIMES):
+            db.execute(
+                text("UPDATE pcos_assessments SET created_at = :created_at WHERE id = :id"),
+                {"created_at": created_at, "id": row.id.hex},
+            )
+        db.commit()
+        ids = [row.id for row in legacy + current]
+
+    # What an upgraded server does at startup
+    init_db()
+    return user_id, ids
+
+
+async def page_all(fetch, limit: int):
+    seen, cursor = [], None
+    for _ in range(100):
+        items, cursor = await fetch(limit, cursor)
+        seen.extend(item["id"] for item in items)
+        if cursor is None:
+            return seen
+    raise AssertionError(f"limit={limit}: pagination did not terminate")
+
+
+async def main():
+    user_id, ids = seed()
+
+    with engine.connect() as conn:
+        formats = {len(v) for (v,) in conn.execute(text("SELECT created_at FROM pcos_assessments"))}
+    assert formats == {26}, f"created_at not normalized: lengths {formats}"
+
+    async with AsyncSessionLocal() as db:
+        history = lambda limit, cursor: list_assessments(db, user_id, limit=limit, cursor=cursor)
+        cohort = lambda limit, cursor: cohort_assessments(db, [], limit=limit, cursor=cursor)
+
+        expected = None
+        for name, fetch in (("history", history), ("cohort", cohort)):
+            for limit in range(1, len(ids) + 2):
+                seen = await page_all(fetch, limit)
+                assert len(seen) == len(set(seen)), f"{name} limit={limit}: repeated rows"
+                assert set(seen) == set(ids), f"{name} limit={limit}: {len(seen)} of {len(ids)} rows"
+                expected = expected or seen
+                assert seen == expected, f"{name} limit={limit}: order differs"
+
+    print(f"✅ {len(ids)} rows paged exactly once at every page size (history and cohort)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""
+Per-worker memory of a multi-worker API deployment.
+
+Lists a master process and its direct children (the workers) with:
+  RSS  resident memory, counting pages shared with other processes
+  PSS  shared pages split evenly between the processes sharing them;
+       the PSS column sums to the real total
+  USS  pages private to the process: what one more worker costs
+
+With app.server most of the model weights are shared, so worker USS
+stays far below RSS. With `uvicorn --workers N` each worker's RSS is
+almost all private.
+
+Run from the project root, against a running server:
+    python scripts/worker_memory_report.py <master pid>
+    python scripts/worker_memory_report.py $(pgrep -of "app.server")
+"""
+
+import sys
+
+import psutil
+
+MB = 1024 * 1024
+
+
+def row(label, proc):
+    info = proc.memory_full_info()
+    print(f"  {label:<16} {proc.pid:>7}  {info.rss / MB:9.1f}  {info.pss / MB:9.1f}  {info.uss / MB:9.1f}")
+    return info
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    master = psutil.Process(int(sys.argv[1]))
+    # Skip multiprocessing helpers (forkserver, resource tracker)
+    workers = [
+        p for p in master.children()
+        if not any(helper in " ".join(p.cmdline()) for helper in ("forkserver", "resource_tracker"))
+    ]
+
+    print(f"  {'process':<16} {'pid':>7}  {'RSS MB':>9}  {'PSS MB':>9}  {'USS MB':>9}")
+    total_pss = row("master", master).pss
+    worker_infos = []
+    for index, worker in enumerate(workers):
+        info = row(f"worker {index}", worker)
+        worker_infos.append(info)
+        total_pss += info.pss
+
+    if worker_infos:
+        n = len(worker_infos)
+        print(
+            f"\n  {n} worker(s): mean RSS {sum(i.rss for i in worker_infos) / n / MB:.1f} MB, "
+            f"mean USS {sum(i.uss for i in worker_infos) / n / MB:.1f} MB"
+        )
+    print(f"  total (sum of PSS, master + workers): {total_pss / MB:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()